@@ -1,91 +1,775 @@
-“”“Интеграция для автоматического полива газона.”””
+"""Интеграция для автоматического полива газона."""
 import logging
+from collections.abc import Callable, Iterable
+from typing import Any
 from datetime import timedelta
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_ON, STATE_UNAVAILABLE, STATE_UNKNOWN, Platform, UnitOfTemperature
+from homeassistant.core import CALLBACK_TYPE, CoreState, Event, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_track_entity_registry_updated_event
+from homeassistant.helpers.start import async_at_started
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, PLATFORMS
+from .const import (
+    DOMAIN,
+    PLATFORMS,
+    DATA_HUB,
+    CONF_ZONES,
+    CONF_MOISTURE_SENSORS,
+    CONF_ZONE_SENSORS,
+    CONF_ZONE_SETTINGS,
+    CONF_MAX_CONCURRENT_ZONES,
+    CONF_FLOW_CAPACITY,
+    CONF_SUPPLY_CAPACITY,
+    CONF_WATERING_DURATION,
+    CONF_MOISTURE_THRESHOLD,
+    CONF_RAIN_THRESHOLD,
+    CONF_WEATHER_ENTITY,
+    CONF_FORECAST_WINDOW,
+    CONF_METRICS,
+    DEFAULT_MAX_CONCURRENT_ZONES,
+    DEFAULT_FLOW_CAPACITY,
+    DEFAULT_SUPPLY_CAPACITY,
+    DEFAULT_RAIN_THRESHOLD,
+    DEFAULT_WEATHER_ENTITY,
+    DEFAULT_FORECAST_WINDOW,
+    DEFAULT_METRICS,
+    DEFAULT_ET0,
+    DEFAULT_APPLICATION_RATE,
+    DEFAULT_TARGET_MARGIN,
+    SCHEDULE_KEY,
+    ZONE_NAME_KEY,
+)
+from .backfill import BACKFILL_PERIOD, async_load_history
+from .evapotranspiration import ZoneForecast, estimate_temperature_range, hargreaves_et0
+from .hub import get_hub, moisture_level
+from .journal import IrrigationJournal
+from .learning import RunTimeLearner
+from .metrics import STAGE_REFRESH, STAGE_SNAPSHOT, RuntimeMetrics
+from .moisture_history import HISTORY_INTERVAL
+from .planner import SiteSnapshot, forecast_site
+from .scheduler import IrrigationScheduler
+from .valves import ValveCommander
+from .water_usage import WaterUsageTracker
+from .weather import expected_rain
+from .windows import WateringSchedule
+from .zone_config import build_zone_configs
+from .zone_index import build_zone_sensor_index
+
+_LOGGER = logging.getLogger(__name__)
 
-_LOGGER = logging.getLogger(**name**)
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-“”“Настройка интеграции из конфигурации.”””
-coordinator = LawnIrrigationDataUpdateCoordinator(hass, entry)
-await coordinator.async_config_entry_first_refresh()
+    """Настройка интеграции из конфигурации."""
+    coordinator = LawnIrrigationDataUpdateCoordinator(hass, entry)
+    await coordinator.water_usage.async_load()
+    await coordinator.journal.async_load()
+    await coordinator.learner.async_load()
+
+    running = hass.state is CoreState.running
+    if running:
+        await coordinator.async_config_entry_first_refresh()
+    else:
+        # При загрузке HA переключатели и датчики зон еще не созданы:
+        # сущности регистрируются сразу по сохраненной конфигурации, данные
+        # зон заполняются событиями по мере их появления, а полный снимок
+        # с прогнозом погоды откладывается до запуска HA
+        coordinator.async_prime()
+
+    hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][entry.entry_id] = coordinator
+
+    coordinator.async_start_push()
+    entry.async_on_unload(coordinator.async_stop_push)
+    entry.async_on_unload(coordinator.scheduler.async_cancel)
+    entry.async_on_unload(coordinator.learner.async_cancel)
+    entry.async_on_unload(
+        coordinator.hub.arbiter.async_register(
+            entry.entry_id,
+            coordinator.scheduler.async_resume,
+            coordinator.settings.get(CONF_SUPPLY_CAPACITY, DEFAULT_SUPPLY_CAPACITY),
+        )
+    )
+
+    async def _async_started(_hass: HomeAssistant) -> None:
+        """Восстановление полива, история и полный снимок данных после запуска HA."""
+        coordinator.async_reconcile_runs()
+        # Просроченные клапаны закрываются до любых запросов к регистратору
+        await coordinator.scheduler.async_restore()
+        seeded = await coordinator.async_backfill()
+        if seeded or not running:
+            await coordinator.async_refresh()
 
-```
-hass.data.setdefault(DOMAIN, {})
-hass.data[DOMAIN][entry.entry_id] = coordinator
+    entry.async_on_unload(async_at_started(hass, _async_started))
+    entry.async_on_unload(entry.add_update_listener(async_update_entry))
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    return True
 
-await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-return True
-```
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-“”“Удаление интеграции.”””
-if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-hass.data[DOMAIN].pop(entry.entry_id)
-return unload_ok
+    """Удаление интеграции."""
+    if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        domain_data = hass.data[DOMAIN]
+        domain_data.pop(entry.entry_id)
+        # Общие данные не нужны после выгрузки последней записи
+        if domain_data.keys() == {DATA_HUB}:
+            domain_data.pop(DATA_HUB).async_shutdown()
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Удаление данных интеграции из хранилища."""
+    await IrrigationJournal(hass, entry.entry_id).async_remove()
+    await WaterUsageTracker(hass, entry.entry_id).async_remove()
+    await RunTimeLearner(hass, entry.entry_id, lambda zone_id: None).async_remove()
+
+
+async def async_update_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Применение измененных настроек без перезагрузки записи."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    await coordinator.async_apply_settings()
+
+
+def _friendly_name(state: State | None) -> str | None:
+    """friendly_name из состояния сущности."""
+    return state.attributes.get("friendly_name") if state is not None else None
+
+
+def _round(value: float | None, digits: int = 1) -> float | None:
+    """Округление статистики, чтобы шум датчика не порождал лишние записи."""
+    return round(value, digits) if value is not None else None
+
 
 class LawnIrrigationDataUpdateCoordinator(DataUpdateCoordinator):
-“”“Координатор обновления данных для полива газона.”””
-
-```
-def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
-    """Инициализация координатора."""
-    super().__init__(
-        hass,
-        _LOGGER,
-        name=DOMAIN,
-        update_interval=timedelta(minutes=5),
-    )
-    self.entry = entry
-    self.zones = entry.data.get("zones", [])
-    self.moisture_sensors = entry.data.get("moisture_sensors", [])
-    
-async def _async_update_data(self):
-    """Обновление данных."""
-    data = {
-        "zones": {},
-        "moisture_levels": {},
-        "weather_conditions": {},
-    }
-    
-    # Получение данных о зонах полива
-    for zone_id in self.zones:
-        zone_entity = self.hass.states.get(zone_id)
-        if zone_entity:
-            data["zones"][zone_id] = {
-                "state": zone_entity.state,
-                "last_watered": zone_entity.attributes.get("last_watered"),
-                "duration": zone_entity.attributes.get("duration", 0),
-            }
-    
-    # Получение данных о влажности почвы
-    for sensor_id in self.moisture_sensors:
-        sensor_entity = self.hass.states.get(sensor_id)
-        if sensor_entity:
-            try:
-                level = float(sensor_entity.state) if sensor_entity.state not in ['unavailable', 'unknown'] else 0
-            except (ValueError, TypeError):
-                level = 0
-                
-            data["moisture_levels"][sensor_id] = {
-                "level": level,
-                "unit": sensor_entity.attributes.get("unit_of_measurement", "%"),
-            }
-    
-    # Получение погодных условий
-    weather_entity = self.hass.states.get("weather.home")
-    if weather_entity:
-        data["weather_conditions"] = {
-            "condition": weather_entity.state,
-            "temperature": weather_entity.attributes.get("temperature"),
-            "humidity": weather_entity.attributes.get("humidity"),
-            "precipitation": weather_entity.attributes.get("precipitation", 0),
+    """Координатор обновления данных для полива газона."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry):
+        """Инициализация координатора."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=timedelta(minutes=30),
+        )
+        self.entry = entry
+        self.hub = get_hub(hass)
+        self.settings = {**entry.data, **entry.options}
+        self.zones = []
+        self.moisture_sensors = []
+        self.zone_sensors = {}
+        self.zone_configs = {}
+        self.weather_entity = DEFAULT_WEATHER_ENTITY
+        self.forecast_window = timedelta(hours=DEFAULT_FORECAST_WINDOW)
+        self.forecast_rain = 0.0
+        self.unmatched_zones = []
+        self.watering_schedule = WateringSchedule()
+        self._zone_set = frozenset()
+        self._sensor_set = frozenset()
+        self._unsub_state_changes = None
+        self._unsub_registry = None
+        self._views = {}
+        self._zone_names = {}
+        self._key_listeners = {}
+        self._key_index = None
+        self._changed_keys = None
+        self._notified_success = None
+        self.moisture_history = {}
+        self.journal = IrrigationJournal(hass, entry.entry_id)
+        self.metrics = RuntimeMetrics(self.settings.get(CONF_METRICS, DEFAULT_METRICS))
+        self.water_usage = WaterUsageTracker(hass, entry.entry_id)
+        self.valves = ValveCommander(hass, self.metrics)
+        self.learner = RunTimeLearner(
+            hass, entry.entry_id, self._zone_moisture_level, self._async_invalidate_views
+        )
+        self.scheduler = IrrigationScheduler(
+            hass,
+            self.settings.get(CONF_MAX_CONCURRENT_ZONES, DEFAULT_MAX_CONCURRENT_ZONES),
+            self.settings.get(CONF_FLOW_CAPACITY, DEFAULT_FLOW_CAPACITY),
+            self.journal,
+            self.metrics,
+            self.hub.arbiter,
+            entry.entry_id,
+            self.valves,
+            self.learner,
+        )
+        self.rebuild_zone_index()
+
+    def rebuild_zone_index(self) -> None:
+        """Построение индекса зона → датчик влажности и настроек зон.
+
+        Индекс строится один раз при загрузке и при изменении записи
+        конфигурации, сущности получают датчик зоны поиском по словарю.
+        Опции записи имеют приоритет над данными, заданными при создании.
+        """
+        settings = self.settings = {**self.entry.data, **self.entry.options}
+        self.zones = settings.get(CONF_ZONES, [])
+        self.weather_entity = settings.get(CONF_WEATHER_ENTITY, DEFAULT_WEATHER_ENTITY)
+        self.forecast_window = timedelta(
+            hours=settings.get(CONF_FORECAST_WINDOW, DEFAULT_FORECAST_WINDOW)
+        )
+        self.moisture_sensors = list(settings.get(CONF_MOISTURE_SENSORS, []))
+        explicit = settings.get(CONF_ZONE_SENSORS, {})
+
+        # Явно назначенные датчики опрашиваются, даже если их нет в общем списке
+        for sensor_id in explicit.values():
+            if sensor_id and sensor_id not in self.moisture_sensors:
+                self.moisture_sensors.append(sensor_id)
+
+        if CONF_ZONE_SENSORS in settings:
+            self.zone_sensors = {zone_id: explicit.get(zone_id) for zone_id in self.zones}
+        else:
+            # Записи, созданные до явного сопоставления, подбирают датчик по имени
+            self.zone_sensors = build_zone_sensor_index(self.zones, self.moisture_sensors)
+
+        # Зона без датчика не поливается автоматически, а не берет чужой датчик
+        self.unmatched_zones = [
+            zone_id for zone_id, sensor_id in self.zone_sensors.items() if not sensor_id
+        ]
+        if self.unmatched_zones:
+            _LOGGER.warning(
+                "Для зон %s не назначен датчик влажности, автоматический полив для них отключен",
+                ", ".join(self.unmatched_zones),
+            )
+        self.zone_configs = build_zone_configs(
+            self.zones,
+            settings.get(CONF_ZONE_SETTINGS, {}),
+            settings.get(CONF_MOISTURE_THRESHOLD),
+            settings.get(CONF_WATERING_DURATION),
+        )
+        self._zone_set = frozenset(self.zones)
+        self._sensor_set = frozenset(self.moisture_sensors)
+        self._key_index = None
+        # Пороги зон и привязка датчиков влияют на производные данные
+        self._views = {}
+
+        # История датчиков общая для всех записей, отслеживающих датчик
+        self.moisture_history = {
+            sensor_id: self.hub.moisture_buffer(sensor_id)
+            for sensor_id in self.moisture_sensors
         }
-    
-    return data
-```
+
+    async def async_apply_settings(self) -> None:
+        """Применение новых настроек к работающей записи.
+
+        Открытые зоны, очередь, таймеры и сущности сохраняются: меняются
+        пороги, длительности и лимиты планировщика. Данные перечитываются,
+        только если изменился набор отслеживаемых сущностей.
+        """
+        tracked = (self._zone_set, self._sensor_set, self.weather_entity, self.forecast_window)
+        self.rebuild_zone_index()
+        self.metrics.enabled = self.settings.get(CONF_METRICS, DEFAULT_METRICS)
+
+        await self.scheduler.async_update_limits(
+            self.settings.get(CONF_MAX_CONCURRENT_ZONES, DEFAULT_MAX_CONCURRENT_ZONES),
+            self.settings.get(CONF_FLOW_CAPACITY, DEFAULT_FLOW_CAPACITY),
+        )
+        self.hub.arbiter.async_set_capacity(
+            self.entry.entry_id,
+            self.settings.get(CONF_SUPPLY_CAPACITY, DEFAULT_SUPPLY_CAPACITY),
+        )
+
+        if tracked != (self._zone_set, self._sensor_set, self.weather_entity, self.forecast_window):
+            self.async_start_push()
+            await self.async_refresh()
+
+        # Пороги и длительности влияют на все сущности
+        super().async_update_listeners()
+
+    def zone_name(self, zone_id: str) -> str:
+        """Получение читаемого имени зоны.
+
+        Имя берется из friendly_name и кэшируется до его изменения или
+        до изменения записи реестра; имя из ID не кэшируется, пока зона
+        не появилась.
+        """
+        friendly_name = self._zone_names.get(zone_id)
+        if friendly_name is not None:
+            return friendly_name
+
+        # Получение friendly_name из состояния сущности
+        entity_state = self.hass.states.get(zone_id)
+        if entity_state:
+            friendly_name = entity_state.attributes.get("friendly_name")
+            if friendly_name:
+                self._zone_names[zone_id] = friendly_name
+                return friendly_name
+
+        # Если нет friendly_name, используем ID
+        return zone_id.replace("switch.", "").replace("_", " ").title()
+
+    def _view(self, name: str, compute: Callable[[], Any]) -> Any:
+        """Производные данные, вычисляемые один раз до следующего изменения данных."""
+        views = self._views
+        if name not in views:
+            views[name] = compute()
+        return views[name]
+
+    @property
+    def active_zones(self) -> list[str]:
+        """Зоны с открытым клапаном."""
+        return self._view("active_zones", lambda: [
+            zone_id for zone_id, zone_data in (self.data or {}).get("zones", {}).items()
+            if zone_data.get("state") == "on"
+        ])
+
+    @property
+    def zone_moisture_levels(self) -> dict[str, float | None]:
+        """Сглаженная влажность каждой зоны по ее датчику."""
+        def compute():
+            levels = {}
+            for zone_id in self.zones:
+                sensor_data = self.get_zone_moisture(zone_id)
+                levels[zone_id] = sensor_data.get("smoothed") if sensor_data else None
+            return levels
+
+        return self._view("zone_moisture_levels", compute)
+
+    @property
+    def zones_need_watering(self) -> list[str]:
+        """Зоны с влажностью ниже порога зоны."""
+        return self._view("zones_need_watering", lambda: [
+            zone_id for zone_id, level in self.zone_moisture_levels.items()
+            if level is not None and level < self.zone_configs[zone_id].moisture_threshold
+        ])
+
+    @property
+    def average_moisture(self) -> float | None:
+        """Средняя сглаженная влажность по всем датчикам."""
+        def compute():
+            moisture_data = (self.data or {}).get("moisture_levels", {})
+            levels = [sensor_data["smoothed"] for sensor_data in moisture_data.values()
+                      if sensor_data.get("smoothed") is not None]
+            return round(sum(levels) / len(levels), 1) if levels else None
+
+        return self._view("average_moisture", compute)
+
+    def get_zone_moisture(self, zone_id: str) -> dict | None:
+        """Получение данных датчика влажности зоны."""
+        moisture_data = (self.data or {}).get("moisture_levels", {})
+        return moisture_data.get(self.zone_sensors.get(zone_id))
+
+    def _zone_moisture_level(self, zone_id: str) -> float | None:
+        """Сглаженная влажность зоны для обучения времени полива."""
+        sensor_data = self.get_zone_moisture(zone_id)
+        return sensor_data.get("smoothed") if sensor_data else None
+
+    def reference_et0(self) -> float:
+        """Эталонная эвапотранспирация по текущей погоде, мм/сут."""
+        weather = (self.data or {}).get("weather_conditions", {})
+        temperature = weather.get("temperature")
+        if temperature is None:
+            return DEFAULT_ET0
+
+        if weather.get("temperature_unit") == UnitOfTemperature.FAHRENHEIT:
+            temperature = (temperature - 32) * 5 / 9
+
+        return hargreaves_et0(
+            temperature,
+            estimate_temperature_range(weather.get("humidity")),
+            self.hass.config.latitude,
+            dt_util.now().timetuple().tm_yday,
+        )
+
+    def snapshot(self) -> SiteSnapshot:
+        """Снимок всех зон и погоды для движка принятия решений.
+
+        Снимок кэшируется до следующего изменения данных и не должен
+        изменяться вызывающим.
+        """
+        return self._view("snapshot", self._build_snapshot)
+
+    def _build_snapshot(self) -> SiteSnapshot:
+        """Построение снимка всех зон и погоды."""
+        started = self.metrics.start()
+        weather = (self.data or {}).get("weather_conditions", {})
+
+        snapshot = SiteSnapshot(
+            et0=self.reference_et0(),
+            precipitation=weather.get("precipitation") or 0,
+            forecast_rain=self.forecast_rain,
+            rain_threshold=self.settings.get(CONF_RAIN_THRESHOLD, DEFAULT_RAIN_THRESHOLD),
+            target_margin=DEFAULT_TARGET_MARGIN,
+        )
+
+        for zone_id in self.zones:
+            sensor_data = self.get_zone_moisture(zone_id) or {}
+            config = self.zone_configs[zone_id]
+            snapshot.add_zone(
+                zone_id,
+                sensor_data.get("smoothed"),
+                sensor_data.get("slope"),
+                config.moisture_threshold,
+                config.watering_duration,
+                config.flow_rate,
+                config.crop_coefficient,
+                config.root_depth,
+                # Интенсивность по отклику датчика зоны на прошлые поливы
+                self.learner.application_rate(
+                    zone_id, config.root_depth, DEFAULT_APPLICATION_RATE
+                ),
+            )
+
+        self.metrics.stop(STAGE_SNAPSHOT, started)
+        return snapshot
+
+    async def async_update_forecast(self) -> float:
+        """Обновление ожидаемых осадков из общего кэша прогнозов, мм.
+
+        Изменившийся прогноз сразу доходит до подписчиков погоды:
+        задержки из-за дождя и состояния полива.
+        """
+        if await self._async_fetch_forecast():
+            self._async_notify_keys((self.weather_entity,))
+        return self.forecast_rain
+
+    async def _async_fetch_forecast(self) -> bool:
+        """Пересчет ожидаемых осадков без уведомления, True — значение изменилось."""
+        forecast = await self.hub.weather.async_get_forecast(self.weather_entity)
+        forecast_rain = expected_rain(forecast, self.forecast_window)
+        if forecast_rain == self.forecast_rain:
+            return False
+
+        self.forecast_rain = forecast_rain
+        # Ожидаемые осадки входят в снимок зон и прогноз полива
+        self._async_invalidate_views()
+        return True
+
+    def watering_forecast(self) -> dict[str, ZoneForecast]:
+        """Прогноз времени и длительности полива для всех зон одним проходом."""
+        return self._view("watering_forecast", lambda: forecast_site(self.snapshot()))
+
+    @callback
+    def _async_invalidate_views(self) -> None:
+        """Сброс производных данных при изменении прогноза или обученных моделей."""
+        self._views = {}
+
+    @callback
+    def async_set_schedule(self, schedule: WateringSchedule) -> None:
+        """Сохранение расписания окна полива и уведомление его подписчиков."""
+        self.watering_schedule = schedule
+        self._async_notify_keys((SCHEDULE_KEY,))
+
+    @callback
+    def async_start_push(self) -> None:
+        """Подписка на изменения состояний отслеживаемых сущностей.
+
+        Опрос по таймеру остается только страховкой на случай пропущенных
+        событий. Подписка оформляется через общий узел, одна на все записи;
+        новая подписка оформляется до отмены прежней, чтобы не потерять
+        общую историю датчиков.
+        """
+        unsub_previous = self._unsub_state_changes
+        self._unsub_state_changes = self.hub.async_subscribe(
+            [*self.zones, *self.moisture_sensors, self.weather_entity],
+            self._async_handle_state_change,
+        )
+        if unsub_previous is not None:
+            unsub_previous()
+
+        if self._unsub_registry is not None:
+            self._unsub_registry()
+        self._unsub_registry = async_track_entity_registry_updated_event(
+            self.hass, self.zones, self._async_handle_registry_update
+        )
+
+    @callback
+    def async_stop_push(self) -> None:
+        """Отписка от изменений состояний."""
+        if self._unsub_state_changes is not None:
+            self._unsub_state_changes()
+            self._unsub_state_changes = None
+        if self._unsub_registry is not None:
+            self._unsub_registry()
+            self._unsub_registry = None
+
+    @callback
+    def _async_handle_registry_update(self, event: Event) -> None:
+        """Сброс кэшированного имени зоны при изменении записи реестра."""
+        zone_id = event.data["entity_id"]
+        self._zone_names.pop(zone_id, None)
+        self._async_notify_keys((ZONE_NAME_KEY.format(zone_id),))
+
+    @callback
+    def _async_handle_state_change(self, event: Event) -> None:
+        """Обновление части данных по событию изменения состояния."""
+        if self.data is None:
+            return
+
+        entity_id = event.data["entity_id"]
+        new_state = event.data["new_state"]
+        keys = (entity_id,)
+
+        if entity_id in self._zone_set:
+            section = self.data["zones"]
+            old_state = event.data["old_state"]
+            self._track_zone_run(entity_id, old_state, new_state)
+            if _friendly_name(old_state) != _friendly_name(new_state):
+                # Имя зоны изменилось или зона только что появилась
+                self._zone_names.pop(entity_id, None)
+                keys = (entity_id, ZONE_NAME_KEY.format(entity_id))
+            value = self._parse_zone(entity_id, new_state) if new_state else None
+        elif entity_id in self._sensor_set:
+            section = self.data["moisture_levels"]
+            value = self._parse_moisture(entity_id, new_state) if new_state else None
+        elif entity_id == self.weather_entity:
+            value = self._parse_weather(new_state) if new_state else {}
+            if value == self.data["weather_conditions"]:
+                return
+            self.data["weather_conditions"] = value
+            self._async_notify_keys((entity_id,))
+            return
+        else:
+            return
+
+        if section.get(entity_id) == value:
+            if len(keys) > 1:
+                self._async_notify_keys(keys[1:])
+            return
+
+        if value is None:
+            section.pop(entity_id, None)
+        else:
+            section[entity_id] = value
+
+        self._async_notify_keys(keys)
+
+    @callback
+    def async_add_key_listener(
+        self, update_callback: CALLBACK_TYPE, get_keys: Callable[[], Iterable[str]]
+    ) -> CALLBACK_TYPE:
+        """Подписка сущности на изменения конкретных зон, датчиков и погоды.
+
+        get_keys возвращает идентификаторы отслеживаемых сущностей, от
+        которых зависит состояние подписчика.
+        """
+        self._key_listeners[update_callback] = get_keys
+        self._key_index = None
+
+        @callback
+        def remove_listener() -> None:
+            self._key_listeners.pop(update_callback, None)
+            self._key_index = None
+
+        return remove_listener
+
+    @callback
+    def _async_notify_keys(self, keys: Iterable[str]) -> None:
+        """Уведомление только тех подписчиков, которые зависят от ключей."""
+        # Уведомление означает новое поколение данных
+        self._views = {}
+
+        if self._key_index is None:
+            key_index = {}
+            for update_callback, get_keys in self._key_listeners.items():
+                for key in get_keys():
+                    key_index.setdefault(key, []).append(update_callback)
+            self._key_index = key_index
+
+        callbacks = {}
+        for key in keys:
+            for update_callback in self._key_index.get(key, ()):
+                callbacks[update_callback] = None
+
+        for update_callback in callbacks:
+            update_callback()
+        self.metrics.record_writes(len(callbacks))
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Уведомление подписчиков после полного обновления.
+
+        Всех подписчиков будим только при первом обновлении и при смене
+        доступности данных, иначе только зависящих от изменившихся ключей.
+        """
+        changed_keys = self._changed_keys
+        self._changed_keys = None
+        self._views = {}
+
+        if changed_keys is None or self.last_update_success != self._notified_success:
+            self._notified_success = self.last_update_success
+            super().async_update_listeners()
+            self.metrics.record_writes(len(self._listeners))
+            return
+
+        if changed_keys:
+            self._async_notify_keys(changed_keys)
+
+    def _diff_keys(self, old: dict, new: dict) -> set[str]:
+        """Ключи, данные которых изменились между двумя снимками."""
+        changed = set()
+
+        for section in ("zones", "moisture_levels"):
+            old_section = old.get(section, {})
+            new_section = new.get(section, {})
+            for key in old_section.keys() | new_section.keys():
+                if old_section.get(key) != new_section.get(key):
+                    changed.add(key)
+
+        if old.get("weather_conditions") != new.get("weather_conditions"):
+            changed.add(self.weather_entity)
+
+        return changed
+
+    def _parse_zone(self, zone_id: str, state: State) -> dict:
+        """Данные зоны полива из состояния сущности.
+
+        Если переключатель не сообщает время и длительность последнего
+        полива в атрибутах, используются данные учета расхода.
+        """
+        usage = self.water_usage.zones.get(zone_id, {})
+
+        return {
+            "state": state.state,
+            "last_watered": state.attributes.get("last_watered", usage.get("last_watered")),
+            "duration": state.attributes.get("duration", usage.get("last_duration", 0)),
+        }
+
+    @callback
+    def _track_zone_run(self, zone_id: str, old_state: State | None, new_state: State | None) -> None:
+        """Учет открытия и закрытия клапана зоны по событию."""
+        was_on = old_state is not None and old_state.state == STATE_ON
+        is_on = new_state is not None and new_state.state == STATE_ON
+
+        if is_on and not was_on:
+            self.water_usage.async_zone_opened(zone_id, new_state.last_changed)
+        elif was_on and not is_on:
+            self.water_usage.async_zone_closed(
+                zone_id, dt_util.utcnow(), self.zone_configs[zone_id].flow_rate
+            )
+
+    @callback
+    def async_reconcile_runs(self) -> None:
+        """Сверка незакрытых поливов с текущими состояниями зон при запуске."""
+        for zone_id in self.zones:
+            state = self.hass.states.get(zone_id)
+            if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+                continue
+            if state.state == STATE_ON:
+                self.water_usage.async_zone_opened(zone_id, state.last_changed)
+            elif zone_id in self.water_usage.running:
+                self.water_usage.async_zone_closed(
+                    zone_id, state.last_changed, self.zone_configs[zone_id].flow_rate
+                )
+
+    def _parse_moisture(self, sensor_id: str, state: State) -> dict:
+        """Данные датчика влажности из состояния сущности.
+
+        Недоступный датчик дает level=None, а не 0: отсутствие данных не
+        должно выглядеть как пересохшая почва. Решения о поливе принимаются
+        по сглаженному значению из общей истории датчика, которую
+        пополняет хаб.
+        """
+        level = moisture_level(state)
+
+        history = self.moisture_history.get(sensor_id)
+        if history is None:
+            history = self.moisture_history[sensor_id] = self.hub.moisture_buffer(sensor_id)
+
+        return {
+            "level": level,
+            "smoothed": _round(history.smoothed) if level is not None else None,
+            "mean": _round(history.mean),
+            "min": _round(history.minimum),
+            "slope": _round(history.slope, 2),
+            "unit": state.attributes.get("unit_of_measurement", "%"),
+        }
+
+    @staticmethod
+    def _parse_weather(state: State) -> dict:
+        """Погодные условия из состояния сущности погоды."""
+        return {
+            "condition": state.state,
+            "temperature": state.attributes.get("temperature"),
+            "humidity": state.attributes.get("humidity"),
+            "precipitation": state.attributes.get("precipitation", 0),
+            "temperature_unit": state.attributes.get("temperature_unit"),
+        }
+
+    async def async_backfill(self) -> bool:
+        """Заполнение истории датчиков и последних поливов из регистратора.
+
+        Загружаются датчики, общая история которых не охватывает окно
+        BACKFILL_PERIOD, — только показания старше первой накопленной
+        точки, — и зоны без известного последнего полива. Возвращает
+        True, если что-то добавлено и данные стоит перечитать.
+        """
+        now = dt_util.utcnow()
+        # Запас в один интервал: полная история начинается чуть позже границы окна
+        horizon = (now - BACKFILL_PERIOD).timestamp() + HISTORY_INTERVAL
+        sensors = {}
+        for sensor_id in self.moisture_sensors:
+            first_time = self.hub.moisture_buffer(sensor_id).first_time
+            if first_time is None:
+                sensors[sensor_id] = now
+            elif first_time > horizon:
+                sensors[sensor_id] = dt_util.utc_from_timestamp(first_time)
+        zone_ids = [
+            zone_id for zone_id in self.zones
+            if self.water_usage.zones.get(zone_id, {}).get("last_watered") is None
+        ]
+
+        backfill = await async_load_history(self.hass, sensors, zone_ids)
+        if backfill is None:
+            return False
+
+        seeded = 0
+        for sensor_id, samples in backfill.moisture.items():
+            seeded += self.hub.moisture_buffer(sensor_id).backfill(samples)
+        for zone_id, (started, ended) in backfill.last_runs.items():
+            seeded += self.water_usage.async_seed_last_run(zone_id, started, ended)
+
+        _LOGGER.debug("Из истории регистратора загружено записей: %s", seeded)
+        return bool(seeded)
+
+    @callback
+    def async_prime(self) -> None:
+        """Начальные данные из уже известных состояний, без вызова служб."""
+        self.data = self._collect_states()
+        self._views = {}
+
+    def _collect_states(self) -> dict:
+        """Снимок состояний зон, датчиков влажности и погоды."""
+        data = {
+            "zones": {},
+            "moisture_levels": {},
+            "weather_conditions": {},
+        }
+
+        # Получение данных о зонах полива
+        for zone_id in self.zones:
+            zone_entity = self.hass.states.get(zone_id)
+            if zone_entity:
+                data["zones"][zone_id] = self._parse_zone(zone_id, zone_entity)
+
+        # Получение данных о влажности почвы
+        for sensor_id in self.moisture_sensors:
+            sensor_entity = self.hass.states.get(sensor_id)
+            if sensor_entity:
+                self.hub.async_record_moisture(sensor_id, sensor_entity)
+                data["moisture_levels"][sensor_id] = self._parse_moisture(sensor_id, sensor_entity)
+
+        # Получение погодных условий
+        weather_entity = self.hass.states.get(self.weather_entity)
+        if weather_entity:
+            data["weather_conditions"] = self._parse_weather(weather_entity)
+
+        return data
+
+    async def _async_update_data(self):
+        """Полное обновление данных (страховочный опрос)."""
+        started = self.metrics.start()
+        data = self._collect_states()
+
+        forecast_changed = await self._async_fetch_forecast()
+
+        if self.data is not None:
+            self._changed_keys = self._diff_keys(self.data, data)
+            # Прогноз осадков относится к той же сущности погоды; подписчики
+            # уведомляются вместе с новыми данными
+            if forecast_changed:
+                self._changed_keys.add(self.weather_entity)
+
+        self.metrics.stop(STAGE_REFRESH, started)
+        return data
@@ -0,0 +1,121 @@
+"""Загрузка недавней истории датчиков и зон из регистратора при запуске."""
+import asyncio
+import logging
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from homeassistant.const import STATE_ON, STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .moisture_history import HISTORY_INTERVAL, HISTORY_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+BACKFILL_PERIOD = timedelta(seconds=HISTORY_SIZE * HISTORY_INTERVAL)  # окно истории датчика
+BACKFILL_TIMEOUT = 30  # секунд на запрос к регистратору
+MAX_SAMPLES = HISTORY_SIZE * 4  # показаний на датчик, самые свежие
+MAX_ZONE_STATES = 16  # состояний зоны, достаточно для последнего полива
+
+
+@dataclass(slots=True)
+class HistoryBackfill:
+    """Сжатая история из регистратора."""
+
+    moisture: dict[str, list[tuple[float, float]]] = field(default_factory=dict)  # (timestamp, %)
+    last_runs: dict[str, tuple[datetime, datetime]] = field(default_factory=dict)  # (начало, конец)
+
+
+async def async_load_history(
+    hass: HomeAssistant,
+    sensors: Mapping[str, datetime],
+    zone_ids: Iterable[str],
+) -> HistoryBackfill | None:
+    """История датчиков влажности и зон из регистратора.
+
+    sensors — датчик и момент, до которого нужна история (первая точка
+    уже накопленной истории или текущее время). Запросы и сжатие
+    состояний выполняются в пуле регистратора, в цикл событий
+    возвращаются только числа. Без регистратора или при превышении
+    времени возвращается None.
+    """
+    sensors, zone_ids = dict(sensors), list(zone_ids)
+    if "recorder" not in hass.config.components or not (sensors or zone_ids):
+        return None
+
+    from homeassistant.components.recorder import get_instance
+
+    start = dt_util.utcnow() - BACKFILL_PERIOD
+    try:
+        # Крайний срок прекращает только ожидание: запрос, уже начатый в
+        # пуле регистратора, выполняется до конца. Поэтому каждый запрос
+        # ограничен одной сущностью и числом строк.
+        async with asyncio.timeout(BACKFILL_TIMEOUT):
+            return await get_instance(hass).async_add_executor_job(
+                _load_history, hass, start, sensors, zone_ids
+            )
+    except TimeoutError:
+        _LOGGER.warning("История из регистратора не загружена за %s с", BACKFILL_TIMEOUT)
+    except Exception as err:
+        # История не обязательна: интеграция продолжит с текущих значений
+        _LOGGER.warning("Ошибка загрузки истории из регистратора: %s", err)
+    return None
+
+
+def _load_history(
+    hass: HomeAssistant,
+    start: datetime,
+    sensors: dict[str, datetime],
+    zone_ids: list[str],
+) -> HistoryBackfill:
+    """Запросы к регистратору и сжатие состояний, выполняется в пуле."""
+    result = HistoryBackfill()
+
+    for sensor_id, end in sensors.items():
+        samples = []
+        for state in _recent_states(hass, sensor_id, start, end, MAX_SAMPLES):
+            try:
+                samples.append((state.last_updated.timestamp(), float(state.state)))
+            except (ValueError, TypeError):
+                continue
+        if samples:
+            result.moisture[sensor_id] = samples
+
+    for zone_id in zone_ids:
+        started = None
+        for state in _recent_states(hass, zone_id, start, None, MAX_ZONE_STATES):
+            if state.state == STATE_ON:
+                started = started or state.last_changed
+            elif state.state not in (STATE_UNAVAILABLE, STATE_UNKNOWN) and started:
+                result.last_runs[zone_id] = (started, state.last_changed)
+                started = None
+
+    return result
+
+
+def _recent_states(
+    hass: HomeAssistant,
+    entity_id: str,
+    start: datetime,
+    end: datetime | None,
+    limit: int,
+) -> list:
+    """Не больше limit последних изменений сущности за период, от старых к новым.
+
+    Регистратор сам сортирует по убыванию времени и отсекает лишние
+    строки, так что в память попадает не больше limit состояний.
+    """
+    from homeassistant.components.recorder import history
+
+    states = history.state_changes_during_period(
+        hass,
+        start,
+        end,
+        entity_id=entity_id,
+        no_attributes=True,
+        descending=True,
+        limit=limit,
+        include_start_time_state=False,
+    )
+    return list(reversed(states.get(entity_id, ())))
@@ -0,0 +1,328 @@
+"""Бинарные датчики потребности в поливе и неисправностей."""
+import logging
+from abc import abstractmethod
+from datetime import datetime, timedelta
+
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import STATE_ON
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, CONF_RAIN_THRESHOLD, DEFAULT_RAIN_THRESHOLD
+from .entity import LawnIrrigationEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+NEEDS_WATER_DEBOUNCE = 300  # секунд, влажность должна устояться
+VALVE_GRACE = timedelta(minutes=2)  # запас на закрытие клапана
+MOISTURE_RESPONSE_TIMEOUT = timedelta(minutes=60)  # ожидание отклика датчика
+MIN_MOISTURE_RISE = 1.0  # %, рост влажности, засчитываемый как отклик
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Настройка бинарных датчиков."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    entities = [RainDelayBinarySensor(coordinator, config_entry)]
+
+    for zone_id in coordinator.zones:
+        entities.append(ZoneNeedsWaterBinarySensor(coordinator, config_entry, zone_id))
+        entities.append(ValveStuckOpenBinarySensor(coordinator, config_entry, zone_id))
+        entities.append(NoMoistureResponseBinarySensor(coordinator, config_entry, zone_id))
+
+    async_add_entities(entities)
+
+
+class LawnIrrigationBinarySensor(LawnIrrigationEntity, BinarySensorEntity):
+    """Бинарный датчик с отложенной сменой состояния.
+
+    Состояние пересчитывается только при изменении зависимостей. Новое
+    значение записывается, если оно продержалось _debounce секунд, так что
+    дребезг датчика влажности не порождает записей состояния. Внутреннее
+    состояние и таймеры меняет только _async_track, один раз на событие;
+    _evaluate лишь читает его и может вызываться повторно.
+    """
+
+    _debounce = 0  # секунд, 0 — без задержки
+
+    def __init__(self, coordinator, config_entry, zone_id: str | None = None):
+        """Инициализация датчика."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        self.zone_id = zone_id
+        self._pending = None
+        self._recheck = None
+
+    @abstractmethod
+    def _evaluate(self) -> bool | None:
+        """Текущее значение датчика по данным координатора."""
+
+    @callback
+    def _async_track(self) -> None:
+        """Учет события зависимостей до оценки значения."""
+
+    def _zone_is_on(self) -> bool:
+        """Открыт ли клапан зоны."""
+        zone_data = self.coordinator.data.get("zones", {}).get(self.zone_id, {})
+        return zone_data.get("state") == STATE_ON
+
+    async def async_added_to_hass(self) -> None:
+        """Начальное значение без задержки."""
+        await super().async_added_to_hass()
+        self._async_track()
+        self._attr_is_on = self._evaluate()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Отмена отложенных проверок."""
+        await super().async_will_remove_from_hass()
+        self._cancel_pending()
+        self._cancel_recheck()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Пересчет значения при изменении зависимостей."""
+        self._async_track()
+        value = self._evaluate()
+
+        if value == self._attr_is_on:
+            # Значение вернулось раньше окончания задержки
+            self._cancel_pending()
+            return
+
+        if not self._debounce:
+            self._attr_is_on = value
+            self.async_write_ha_state()
+            return
+
+        if self._pending is None:
+            self._pending = self.hass.loop.call_later(self._debounce, self._confirm)
+
+    @callback
+    def _confirm(self) -> None:
+        """Запись значения, продержавшегося весь интервал задержки."""
+        self._pending = None
+        value = self._evaluate()
+        if value != self._attr_is_on:
+            self._attr_is_on = value
+            self.async_write_ha_state()
+
+    @callback
+    def _schedule_recheck(self, when: datetime) -> None:
+        """Повторная оценка в заданный момент без событий от зависимостей."""
+        self._cancel_recheck()
+        delay = max((when - dt_util.utcnow()).total_seconds(), 0)
+        self._recheck = self.hass.loop.call_later(delay, self._recheck_due)
+
+    @callback
+    def _recheck_due(self) -> None:
+        """Срабатывание отложенной оценки."""
+        self._recheck = None
+        self._handle_coordinator_update()
+
+    def _cancel_pending(self) -> None:
+        """Отмена отложенной записи значения."""
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+
+    def _cancel_recheck(self) -> None:
+        """Отмена отложенной оценки."""
+        if self._recheck is not None:
+            self._recheck.cancel()
+            self._recheck = None
+
+
+class RainDelayBinarySensor(LawnIrrigationBinarySensor):
+    """Полив отложен из-за текущих или ожидаемых осадков."""
+
+    def __init__(self, coordinator, config_entry):
+        """Инициализация датчика."""
+        super().__init__(coordinator, config_entry)
+        self._attr_name = "Задержка полива из-за дождя"
+        self._attr_unique_id = f"{config_entry.entry_id}_rain_delay"
+        self._attr_icon = "mdi:weather-rainy"
+
+    def _dependency_keys(self):
+        """Датчик зависит только от погоды."""
+        return (self.coordinator.weather_entity,)
+
+    def _evaluate(self) -> bool:
+        """Те же условия, при которых планировщик пропускает полив."""
+        weather = self.coordinator.data.get("weather_conditions", {})
+        rain_threshold = self.coordinator.settings.get(CONF_RAIN_THRESHOLD, DEFAULT_RAIN_THRESHOLD)
+        return (
+            (weather.get("precipitation") or 0) > rain_threshold
+            or self.coordinator.forecast_rain > rain_threshold
+        )
+
+    @property
+    def extra_state_attributes(self):
+        """Дополнительные атрибуты."""
+        weather = self.coordinator.data.get("weather_conditions", {})
+        return {
+            "precipitation": weather.get("precipitation", 0),
+            "forecast_rain": self.coordinator.forecast_rain,
+        }
+
+
+class ZoneNeedsWaterBinarySensor(LawnIrrigationBinarySensor):
+    """Влажность зоны ниже ее порога."""
+
+    _zone_name_format = "Нужен полив {}"
+    _debounce = NEEDS_WATER_DEBOUNCE
+
+    def __init__(self, coordinator, config_entry, zone_id):
+        """Инициализация датчика."""
+        super().__init__(coordinator, config_entry, zone_id)
+        self._attr_unique_id = f"{config_entry.entry_id}_needs_water_{zone_id.replace('.', '_')}"
+        self._attr_icon = "mdi:water-alert"
+
+    def _dependency_keys(self):
+        """Датчик зоны зависит только от своего датчика влажности."""
+        sensor_id = self.coordinator.zone_sensors.get(self.zone_id)
+        return (sensor_id,) if sensor_id else ()
+
+    def _evaluate(self) -> bool | None:
+        """Сравнение сглаженной влажности с порогом зоны."""
+        level = self.coordinator.zone_moisture_levels.get(self.zone_id)
+        if level is None:
+            return None
+        return level < self.coordinator.zone_configs[self.zone_id].moisture_threshold
+
+
+class ValveStuckOpenBinarySensor(LawnIrrigationBinarySensor):
+    """Клапан зоны открыт дольше запланированного полива."""
+
+    _zone_name_format = "Клапан открыт слишком долго {}"
+
+    def __init__(self, coordinator, config_entry, zone_id):
+        """Инициализация датчика."""
+        super().__init__(coordinator, config_entry, zone_id)
+        self._attr_unique_id = f"{config_entry.entry_id}_valve_stuck_{zone_id.replace('.', '_')}"
+        self._attr_device_class = BinarySensorDeviceClass.PROBLEM
+
+    def _dependency_keys(self):
+        """Датчик зависит только от своей зоны."""
+        return (self.zone_id,)
+
+    def _expected_end(self) -> datetime | None:
+        """Плановое время закрытия: по планировщику или по длительности зоны."""
+        coordinator = self.coordinator
+        ends_at = coordinator.scheduler.scheduled_end(self.zone_id)
+        if ends_at is not None:
+            return ends_at
+
+        # Зона включена вручную или извне — ограничиваем длительностью зоны
+        started = coordinator.water_usage.running.get(self.zone_id)
+        if started is None:
+            return None
+        duration = coordinator.zone_configs[self.zone_id].watering_duration
+        return dt_util.parse_datetime(started) + timedelta(minutes=duration)
+
+    def _deadline(self) -> datetime | None:
+        """Крайний срок закрытия открытого клапана с запасом."""
+        if not self._zone_is_on():
+            return None
+        ends_at = self._expected_end()
+        return ends_at + VALVE_GRACE if ends_at is not None else None
+
+    @callback
+    def _async_track(self) -> None:
+        """Проверка в крайний срок; закрытый вовремя клапан ее отменит."""
+        deadline = self._deadline()
+        if deadline is None or dt_util.utcnow() >= deadline:
+            self._cancel_recheck()
+        else:
+            self._schedule_recheck(deadline)
+
+    def _evaluate(self) -> bool:
+        """Клапан открыт позже планового закрытия с запасом."""
+        deadline = self._deadline()
+        return deadline is not None and dt_util.utcnow() >= deadline
+
+
+class NoMoistureResponseBinarySensor(LawnIrrigationBinarySensor):
+    """Датчик влажности не отреагировал на полив зоны."""
+
+    _zone_name_format = "Нет отклика влажности {}"
+
+    def __init__(self, coordinator, config_entry, zone_id):
+        """Инициализация датчика."""
+        super().__init__(coordinator, config_entry, zone_id)
+        self._attr_unique_id = f"{config_entry.entry_id}_no_response_{zone_id.replace('.', '_')}"
+        self._attr_device_class = BinarySensorDeviceClass.PROBLEM
+        self._baseline = None
+        self._deadline = None
+        self._watering = False
+        self._fault = False
+
+    def _dependency_keys(self):
+        """Датчик зависит от своей зоны и ее датчика влажности."""
+        sensor_id = self.coordinator.zone_sensors.get(self.zone_id)
+        return (self.zone_id, sensor_id) if sensor_id else (self.zone_id,)
+
+    @callback
+    def _async_track(self) -> None:
+        """Отслеживание роста влажности от начала полива до истечения ожидания.
+
+        Уровень влажности запоминается только при открытии клапана, так
+        что рост во время полива засчитывается как отклик; после закрытия
+        клапана датчику дается MOISTURE_RESPONSE_TIMEOUT, чтобы показать
+        рост не меньше MIN_MOISTURE_RISE.
+        """
+        if not self.coordinator.zone_sensors.get(self.zone_id):
+            return
+
+        sensor_data = self.coordinator.get_zone_moisture(self.zone_id) or {}
+        level = sensor_data.get("level")
+
+        if self._zone_is_on():
+            if not self._watering:
+                self._watering = True
+                self._baseline = level
+                self._deadline = None
+                self._cancel_recheck()
+        elif self._watering:
+            self._watering = False
+            if self._baseline is not None:
+                self._deadline = dt_util.utcnow() + MOISTURE_RESPONSE_TIMEOUT
+                self._schedule_recheck(self._deadline)
+
+        if self._baseline is None:
+            return
+
+        if level is not None and level >= self._baseline + MIN_MOISTURE_RISE:
+            self._baseline = None
+            self._deadline = None
+            self._fault = False
+            self._cancel_recheck()
+        elif self._deadline is not None and dt_util.utcnow() >= self._deadline:
+            _LOGGER.warning(
+                "Влажность зоны %s не выросла после полива (было %s%%)",
+                self.zone_id,
+                self._baseline,
+            )
+            self._baseline = None
+            self._deadline = None
+            self._fault = True
+
+    def _evaluate(self) -> bool | None:
+        """Неисправность держится до отклика датчика на следующий полив."""
+        if not self.coordinator.zone_sensors.get(self.zone_id):
+            return None
+        return self._fault
+
+    @property
+    def extra_state_attributes(self):
+        """Дополнительные атрибуты."""
+        return {
+            "moisture_sensor": self.coordinator.zone_sensors.get(self.zone_id),
+            "baseline": self._baseline,
+            "response_deadline": self._deadline.isoformat() if self._deadline else None,
+        }
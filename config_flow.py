@@ -1,152 +1,430 @@
-“”“Настройка конфигурации для интеграции полива газона.”””
+"""Настройка конфигурации для интеграции полива газона."""
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import CONF_NAME
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import selector
-from homeassistant.helpers.entity_registry import async_get
 
 from .const import (
-DOMAIN,
-CONF_ZONES,
-CONF_MOISTURE_SENSORS,
-CONF_WATERING_DURATION,
-CONF_MOISTURE_THRESHOLD,
-CONF_RAIN_THRESHOLD,
-DEFAULT_WATERING_DURATION,
-DEFAULT_MOISTURE_THRESHOLD,
-DEFAULT_RAIN_THRESHOLD,
+    DOMAIN,
+    CONF_ZONES,
+    CONF_MOISTURE_SENSORS,
+    CONF_ZONE_SENSORS,
+    CONF_WATERING_DURATION,
+    CONF_MOISTURE_THRESHOLD,
+    CONF_RAIN_THRESHOLD,
+    CONF_MAX_CONCURRENT_ZONES,
+    CONF_FLOW_CAPACITY,
+    CONF_SUPPLY_CAPACITY,
+    CONF_CYCLE_SOAK,
+    CONF_WEATHER_ENTITY,
+    CONF_FORECAST_WINDOW,
+    CONF_ZONE_SETTINGS,
+    CONF_ZONE_TYPE,
+    CONF_FLOW_RATE,
+    CONF_SOIL_TYPE,
+    CONF_CONFIGURE_MORE,
+    CONF_ZONE_IMPORT,
+    CONF_METRICS,
+    CONF_WATERING_WINDOW,
+    CONF_WINDOW_START,
+    CONF_WINDOW_END,
+    CONF_FINISH_BY_SUNRISE,
+    DEFAULT_WATERING_DURATION,
+    DEFAULT_MOISTURE_THRESHOLD,
+    DEFAULT_RAIN_THRESHOLD,
+    DEFAULT_MAX_CONCURRENT_ZONES,
+    DEFAULT_FLOW_CAPACITY,
+    DEFAULT_SUPPLY_CAPACITY,
+    DEFAULT_CYCLE_SOAK,
+    DEFAULT_WEATHER_ENTITY,
+    DEFAULT_FORECAST_WINDOW,
+    DEFAULT_METRICS,
+    DEFAULT_WATERING_WINDOW,
+    DEFAULT_WINDOW_START,
+    DEFAULT_WINDOW_END,
+    DEFAULT_FINISH_BY_SUNRISE,
+    DEFAULT_ZONE_TYPE,
+    DEFAULT_SOIL_TYPE,
+    ZONE_TYPES,
+    SOIL_TYPES,
 )
+from .discovery import Discovery, async_discover, suggest_zone_sensors
+from .zone_config import describe_overrides
+from .zone_import import (
+    INVALID_DEFINITION,
+    ZoneImportError,
+    parse_zone_definitions,
+    validate_zone_definitions,
+)
+
 
 class LawnIrrigationConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
-“”“Обработка конфигурации интеграции.”””
-
-```
-VERSION = 1
-
-async def async_step_user(self, user_input=None):
-    """Обработка пользовательского ввода."""
-    errors = {}
-    
-    if user_input is not None:
-        # Проверка данных
-        if not user_input.get(CONF_ZONES):
-            errors[CONF_ZONES] = "no_zones_selected"
-        else:
-            return self.async_create_entry(
-                title=user_input[CONF_NAME],
-                data=user_input
-            )
-    
-    # Получение списка доступных переключателей и датчиков
-    switches = await self._get_switches()
-    sensors = await self._get_sensors()
-    
-    data_schema = vol.Schema({
-        vol.Required(CONF_NAME, default="Полив газона"): str,
-        vol.Required(CONF_ZONES, default=[]): selector.SelectSelector(
-            selector.SelectSelectorConfig(
-                options=switches,
-                multiple=True,
-                mode=selector.SelectSelectorMode.DROPDOWN,
-            )
-        ),
-        vol.Optional(CONF_MOISTURE_SENSORS, default=[]): selector.SelectSelector(
+    """Обработка конфигурации интеграции."""
+
+    VERSION = 1
+
+    def __init__(self):
+        """Инициализация потока конфигурации."""
+        self._data = {}
+        self._discovery: Discovery | None = None
+
+    async def async_step_user(self, user_input=None):
+        """Обработка пользовательского ввода.
+
+        Зоны выбираются в списке и/или импортируются текстом YAML или CSV.
+        Зонам без явно указанного датчика подбирается датчик влажности на
+        том же устройстве или в том же помещении.
+        """
+        errors = {}
+        import_errors = []
+        import_error = "invalid_import"
+
+        if user_input is not None:
+            user_input = dict(user_input)
+            import_text = user_input.pop(CONF_ZONE_IMPORT, "") or ""
+            zones = list(user_input.get(CONF_ZONES, []))
+            zone_sensors = {}
+            zone_settings = {}
+
+            if import_text.strip():
+                try:
+                    imported = validate_zone_definitions(
+                        parse_zone_definitions(import_text),
+                        {entity.entity_id for entity in self._get_discovery().switches},
+                        set(self.hass.states.async_entity_ids("sensor")),
+                    )
+                except ZoneImportError as err:
+                    import_errors = [str(err)]
+                else:
+                    import_errors = imported.errors
+                    if imported.invalid:
+                        import_error = INVALID_DEFINITION
+                    zones.extend(zone_id for zone_id in imported.zones if zone_id not in zones)
+                    zone_sensors = imported.zone_sensors
+                    zone_settings = imported.zone_settings
+
+            # Проверка данных
+            if import_errors:
+                errors[CONF_ZONE_IMPORT] = import_error
+            elif not zones:
+                errors[CONF_ZONES] = "no_zones_selected"
+            else:
+                discovery = self._get_discovery()
+                zone_sensors = suggest_zone_sensors(
+                    discovery,
+                    zones,
+                    (entity.entity_id for entity in discovery.sensors),
+                    zone_sensors,
+                )
+                moisture_sensors = list(user_input.get(CONF_MOISTURE_SENSORS, []))
+                moisture_sensors.extend(
+                    sensor_id
+                    for sensor_id in dict.fromkeys(zone_sensors.values())
+                    if sensor_id not in moisture_sensors
+                )
+
+                self._data = {
+                    **user_input,
+                    CONF_ZONES: zones,
+                    CONF_MOISTURE_SENSORS: moisture_sensors,
+                    CONF_ZONE_SENSORS: zone_sensors,
+                    CONF_ZONE_SETTINGS: zone_settings,
+                }
+
+                # Ручное сопоставление нужно только для зон, не найденных автоматически
+                if moisture_sensors and any(zone_id not in zone_sensors for zone_id in zones):
+                    return await self.async_step_zone_sensors()
+                return await self.async_step_zone_settings()
+
+        # Получение списка доступных переключателей и датчиков
+        switches = await self._get_switches()
+        sensors = await self._get_sensors()
+
+        data_schema = vol.Schema({
+            vol.Required(CONF_NAME, default="Полив газона"): str,
+            vol.Optional(CONF_ZONES, default=[]): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=switches,
+                    multiple=True,
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                )
+            ),
+            vol.Optional(CONF_MOISTURE_SENSORS, default=[]): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=sensors,
+                    multiple=True,
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                )
+            ),
+            vol.Optional(CONF_ZONE_IMPORT): selector.TextSelector(
+                selector.TextSelectorConfig(multiline=True)
+            ),
+            vol.Optional(CONF_WATERING_DURATION, default=DEFAULT_WATERING_DURATION): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=120)
+            ),
+            vol.Optional(CONF_MOISTURE_THRESHOLD, default=DEFAULT_MOISTURE_THRESHOLD): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=100)
+            ),
+            vol.Optional(CONF_RAIN_THRESHOLD, default=DEFAULT_RAIN_THRESHOLD): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=50)
+            ),
+            vol.Optional(CONF_MAX_CONCURRENT_ZONES, default=DEFAULT_MAX_CONCURRENT_ZONES): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=50)
+            ),
+            vol.Optional(CONF_FLOW_CAPACITY, default=DEFAULT_FLOW_CAPACITY): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=10000)
+            ),
+            vol.Optional(CONF_SUPPLY_CAPACITY, default=DEFAULT_SUPPLY_CAPACITY): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=10000)
+            ),
+            vol.Optional(CONF_CYCLE_SOAK, default=DEFAULT_CYCLE_SOAK): bool,
+            vol.Optional(CONF_WEATHER_ENTITY, default=DEFAULT_WEATHER_ENTITY): selector.EntitySelector(
+                selector.EntitySelectorConfig(domain="weather")
+            ),
+            vol.Optional(CONF_FORECAST_WINDOW, default=DEFAULT_FORECAST_WINDOW): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=48)
+            ),
+        })
+
+        return self.async_show_form(
+            step_id="user",
+            data_schema=data_schema,
+            errors=errors,
+            description_placeholders={
+                "switches_count": str(len(switches)),
+                "sensors_count": str(len(sensors)),
+                "import_errors": "\n".join(import_errors),
+            }
+        )
+
+    async def async_step_zone_sensors(self, user_input=None):
+        """Явное сопоставление зон и датчиков влажности.
+
+        Форма заполнена найденными соответствиями, ненайденные зоны
+        перечислены в описании шага и остаются без датчика, если
+        пользователь не выберет его сам.
+        """
+        zones = self._data[CONF_ZONES]
+        sensors = self._data[CONF_MOISTURE_SENSORS]
+
+        if user_input is not None:
+            self._data[CONF_ZONE_SENSORS] = {
+                zone_id: sensor_id
+                for zone_id, sensor_id in user_input.items()
+                if zone_id in zones and sensor_id
+            }
+            return await self.async_step_zone_settings()
+
+        suggested = self._data.get(CONF_ZONE_SENSORS, {})
+        unmatched = [zone_id for zone_id in zones if zone_id not in suggested]
+        sensor_selector = selector.SelectSelector(
             selector.SelectSelectorConfig(
                 options=sensors,
-                multiple=True,
                 mode=selector.SelectSelectorMode.DROPDOWN,
             )
-        ),
-        vol.Optional(CONF_WATERING_DURATION, default=DEFAULT_WATERING_DURATION): vol.All(
-            vol.Coerce(int), vol.Range(min=1, max=120)
-        ),
-        vol.Optional(CONF_MOISTURE_THRESHOLD, default=DEFAULT_MOISTURE_THRESHOLD): vol.All(
-            vol.Coerce(int), vol.Range(min=0, max=100)
-        ),
-        vol.Optional(CONF_RAIN_THRESHOLD, default=DEFAULT_RAIN_THRESHOLD): vol.All(
-            vol.Coerce(float), vol.Range(min=0, max=50)
-        ),
-    })
-    
-    return self.async_show_form(
-        step_id="user",
-        data_schema=data_schema,
-        errors=errors,
-        description_placeholders={
-            "switches_count": str(len(switches)),
-            "sensors_count": str(len(sensors)),
-        }
-    )
-
-async def _get_switches(self) -> list:
-    """Получение списка доступных переключателей."""
-    switches = []
-    
-    for entity_id, entity in self.hass.states.async_all().items():
-        if entity_id.startswith("switch."):
-            friendly_name = entity.attributes.get("friendly_name", entity_id)
-            switches.append({"value": entity_id, "label": friendly_name})
-    
-    return switches
-
-async def _get_sensors(self) -> list:
-    """Получение списка доступных датчиков влажности."""
-    sensors = []
-    
-    for entity_id, entity in self.hass.states.async_all().items():
-        if entity_id.startswith("sensor."):
-            # Поиск датчиков влажности по названию или атрибутам
-            entity_name = entity_id.lower()
-            friendly_name = entity.attributes.get("friendly_name", "").lower()
-            device_class = entity.attributes.get("device_class", "").lower()
-            
-            if any(keyword in entity_name or keyword in friendly_name for keyword in 
-                  ["moisture", "humidity", "влажность", "soil", "почва"]) or device_class == "humidity":
-                display_name = entity.attributes.get("friendly_name", entity_id)
-                sensors.append({"value": entity_id, "label": display_name})
-    
-    return sensors
-
-@staticmethod
-@config_entries.HANDLERS.register(DOMAIN)
-def async_get_options_flow(config_entry):
-    """Получение потока настроек опций."""
-    return LawnIrrigationOptionsFlow(config_entry)
-```
+        )
+
+        data_schema = vol.Schema({
+            vol.Optional(
+                zone_id,
+                description={"suggested_value": suggested.get(zone_id)},
+            ): sensor_selector
+            for zone_id in zones
+        })
+
+        return self.async_show_form(
+            step_id="zone_sensors",
+            data_schema=data_schema,
+            description_placeholders={
+                "unmatched_count": str(len(unmatched)),
+                "unmatched_zones": ", ".join(unmatched),
+            }
+        )
+
+    async def async_step_zone_settings(self, user_input=None):
+        """Настройка типа, порога и расхода для групп зон.
+
+        Шаг повторяется, пока пользователь настраивает очередные группы,
+        ненастроенные зоны получают профиль газона с общими настройками.
+        """
+        zone_settings = self._data.setdefault(CONF_ZONE_SETTINGS, {})
+
+        if user_input is not None:
+            settings = {
+                key: user_input[key]
+                for key in (
+                    CONF_ZONE_TYPE,
+                    CONF_MOISTURE_THRESHOLD,
+                    CONF_WATERING_DURATION,
+                    CONF_FLOW_RATE,
+                    CONF_SOIL_TYPE,
+                )
+                if user_input.get(key) is not None
+            }
+            for zone_id in user_input.get(CONF_ZONES, []):
+                zone_settings[zone_id] = settings
+
+            if not user_input.get(CONF_CONFIGURE_MORE):
+                return self.async_create_entry(
+                    title=self._data[CONF_NAME],
+                    data=self._data
+                )
+
+        unconfigured = [zone_id for zone_id in self._data[CONF_ZONES] if zone_id not in zone_settings]
+
+        # Все зоны уже настроены импортом
+        if user_input is None and not unconfigured:
+            return self.async_create_entry(
+                title=self._data[CONF_NAME],
+                data=self._data
+            )
+
+        data_schema = vol.Schema({
+            vol.Optional(CONF_ZONES, default=unconfigured): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=self._data[CONF_ZONES],
+                    multiple=True,
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                )
+            ),
+            vol.Required(CONF_ZONE_TYPE, default=DEFAULT_ZONE_TYPE): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=[
+                        {"value": zone_type, "label": label}
+                        for zone_type, label in ZONE_TYPES.items()
+                    ],
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                )
+            ),
+            vol.Required(CONF_SOIL_TYPE, default=DEFAULT_SOIL_TYPE): selector.SelectSelector(
+                selector.SelectSelectorConfig(
+                    options=[
+                        {"value": soil_type, "label": label}
+                        for soil_type, label in SOIL_TYPES.items()
+                    ],
+                    mode=selector.SelectSelectorMode.DROPDOWN,
+                )
+            ),
+            vol.Optional(CONF_MOISTURE_THRESHOLD): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=100)
+            ),
+            vol.Optional(CONF_WATERING_DURATION): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=120)
+            ),
+            vol.Optional(CONF_FLOW_RATE): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=1000)
+            ),
+            vol.Optional(CONF_CONFIGURE_MORE, default=False): bool,
+        })
+
+        return self.async_show_form(
+            step_id="zone_settings",
+            data_schema=data_schema,
+            description_placeholders={
+                "unconfigured_count": str(len(unconfigured)),
+            }
+        )
+
+    def _get_discovery(self) -> Discovery:
+        """Результат поиска сущностей, один раз за поток конфигурации."""
+        if self._discovery is None:
+            self._discovery = async_discover(self.hass)
+        return self._discovery
+
+    async def _get_switches(self) -> list:
+        """Получение списка доступных переключателей."""
+        return [entity.option for entity in self._get_discovery().switches]
+
+    async def _get_sensors(self) -> list:
+        """Получение списка датчиков влажности по классу устройства."""
+        return [entity.option for entity in self._get_discovery().sensors]
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Получение потока настроек опций.
+
+        Запись потоку передает сам Home Assistant через self.config_entry.
+        """
+        return LawnIrrigationOptionsFlow()
+
 
 class LawnIrrigationOptionsFlow(config_entries.OptionsFlow):
-“”“Поток настроек опций для интеграции.”””
-
-```
-def __init__(self, config_entry):
-    """Инициализация потока опций."""
-    self.config_entry = config_entry
-
-async def async_step_init(self, user_input=None):
-    """Обработка начального шага настроек."""
-    if user_input is not None:
-        return self.async_create_entry(title="", data=user_input)
-    
-    current_data = self.config_entry.data
-    
-    data_schema = vol.Schema({
-        vol.Optional(
-            CONF_WATERING_DURATION, 
-            default=current_data.get(CONF_WATERING_DURATION, DEFAULT_WATERING_DURATION)
-        ): vol.All(vol.Coerce(int), vol.Range(min=1, max=120)),
-        vol.Optional(
-            CONF_MOISTURE_THRESHOLD, 
-            default=current_data.get(CONF_MOISTURE_THRESHOLD, DEFAULT_MOISTURE_THRESHOLD)
-        ): vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
-        vol.Optional(
-            CONF_RAIN_THRESHOLD, 
-            default=current_data.get(CONF_RAIN_THRESHOLD, DEFAULT_RAIN_THRESHOLD)
-        ): vol.All(vol.Coerce(float), vol.Range(min=0, max=50)),
-    })
-    
-    return self.async_show_form(
-        step_id="init",
-        data_schema=data_schema,
-    )
-```
\ No newline at end of file
+    """Поток настроек опций для интеграции."""
+
+    async def async_step_init(self, user_input=None):
+        """Обработка начального шага настроек."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        current_data = {**self.config_entry.data, **self.config_entry.options}
+
+        data_schema = vol.Schema({
+            vol.Optional(
+                CONF_WATERING_DURATION,
+                default=current_data.get(CONF_WATERING_DURATION, DEFAULT_WATERING_DURATION)
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=120)),
+            vol.Optional(
+                CONF_MOISTURE_THRESHOLD,
+                default=current_data.get(CONF_MOISTURE_THRESHOLD, DEFAULT_MOISTURE_THRESHOLD)
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
+            vol.Optional(
+                CONF_RAIN_THRESHOLD,
+                default=current_data.get(CONF_RAIN_THRESHOLD, DEFAULT_RAIN_THRESHOLD)
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=50)),
+            vol.Optional(
+                CONF_MAX_CONCURRENT_ZONES,
+                default=current_data.get(CONF_MAX_CONCURRENT_ZONES, DEFAULT_MAX_CONCURRENT_ZONES)
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=50)),
+            vol.Optional(
+                CONF_FLOW_CAPACITY,
+                default=current_data.get(CONF_FLOW_CAPACITY, DEFAULT_FLOW_CAPACITY)
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10000)),
+            vol.Optional(
+                CONF_SUPPLY_CAPACITY,
+                default=current_data.get(CONF_SUPPLY_CAPACITY, DEFAULT_SUPPLY_CAPACITY)
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10000)),
+            vol.Optional(
+                CONF_CYCLE_SOAK,
+                default=current_data.get(CONF_CYCLE_SOAK, DEFAULT_CYCLE_SOAK)
+            ): bool,
+            vol.Optional(
+                CONF_WEATHER_ENTITY,
+                default=current_data.get(CONF_WEATHER_ENTITY, DEFAULT_WEATHER_ENTITY)
+            ): selector.EntitySelector(selector.EntitySelectorConfig(domain="weather")),
+            vol.Optional(
+                CONF_FORECAST_WINDOW,
+                default=current_data.get(CONF_FORECAST_WINDOW, DEFAULT_FORECAST_WINDOW)
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=48)),
+            vol.Optional(
+                CONF_WATERING_WINDOW,
+                default=current_data.get(CONF_WATERING_WINDOW, DEFAULT_WATERING_WINDOW)
+            ): bool,
+            vol.Optional(
+                CONF_WINDOW_START,
+                default=current_data.get(CONF_WINDOW_START, DEFAULT_WINDOW_START)
+            ): selector.TimeSelector(),
+            vol.Optional(
+                CONF_WINDOW_END,
+                default=current_data.get(CONF_WINDOW_END, DEFAULT_WINDOW_END)
+            ): selector.TimeSelector(),
+            vol.Optional(
+                CONF_FINISH_BY_SUNRISE,
+                default=current_data.get(CONF_FINISH_BY_SUNRISE, DEFAULT_FINISH_BY_SUNRISE)
+            ): bool,
+            vol.Optional(
+                CONF_METRICS,
+                default=current_data.get(CONF_METRICS, DEFAULT_METRICS)
+            ): bool,
+        })
+
+        # Общие порог и длительность не действуют на зоны с собственными
+        # значениями, форма перечисляет такие зоны
+        return self.async_show_form(
+            step_id="init",
+            data_schema=data_schema,
+            description_placeholders={
+                "overridden_zones": describe_overrides(current_data.get(CONF_ZONE_SETTINGS, {})),
+            },
+        )
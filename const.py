@@ -1,28 +1,129 @@
-“”“Константы для интеграции полива газона.”””
+"""Константы для интеграции полива газона."""
 from homeassistant.const import Platform
 
-DOMAIN = “lawn_irrigation”
+DOMAIN = "lawn_irrigation"
 PLATFORMS = [Platform.SWITCH, Platform.SENSOR, Platform.BINARY_SENSOR]
 
+# Общие данные интеграции в hass.data[DOMAIN]
+
+DATA_HUB = "hub"
+
 # Настройки по умолчанию
 
 DEFAULT_WATERING_DURATION = 30  # минут
 DEFAULT_MOISTURE_THRESHOLD = 30  # %
 DEFAULT_RAIN_THRESHOLD = 5  # мм
+DEFAULT_MAX_CONCURRENT_ZONES = 2
+DEFAULT_FLOW_CAPACITY = 0  # л/мин, 0 — без ограничения
+DEFAULT_SUPPLY_CAPACITY = 0  # л/мин, общий водовод всех записей, 0 — без ограничения
+DEFAULT_CYCLE_SOAK = False
+DEFAULT_WEATHER_ENTITY = "weather.home"
+DEFAULT_FORECAST_WINDOW = 6  # часов
+DEFAULT_METRICS = False
+
+# Окно полива: ночью и до рассвета меньше испарение и ниже тарифы
+
+DEFAULT_WATERING_WINDOW = False  # главный переключатель сразу запускает полив
+DEFAULT_WINDOW_START = "22:00:00"
+DEFAULT_WINDOW_END = "06:00:00"
+DEFAULT_FINISH_BY_SUNRISE = True
+SUN_ENTITY = "sun.sun"
+
+# Служебные ключи подписки сущностей: расписание полива и имя зоны
+
+SCHEDULE_KEY = f"{DOMAIN}.schedule"
+ZONE_NAME_KEY = f"{DOMAIN}.zone_name.{{}}"
+
+# Параметры водного баланса
+
+DEFAULT_ET0 = 4  # мм/сут, если нет данных о погоде
+DEFAULT_APPLICATION_RATE = 0.6  # мм/мин
+DEFAULT_TARGET_MARGIN = 10  # % выше порога влажности
 
 # Типы зон
 
 ZONE_TYPES = {
-“lawn”: “Газон”,
-“garden”: “Сад”,
-“flower_bed”: “Клумба”,
-“vegetable_garden”: “Огород”,
+    "lawn": "Газон",
+    "garden": "Сад",
+    "flower_bed": "Клумба",
+    "vegetable_garden": "Огород",
+}
+
+DEFAULT_ZONE_TYPE = "lawn"
+
+# Профили типов зон: значения по умолчанию для зон без собственных настроек
+
+ZONE_PROFILES = {
+    "lawn": {
+        "moisture_threshold": 30,
+        "watering_duration": 30,
+        "flow_rate": 10,
+        "crop_coefficient": 0.8,
+        "root_depth": 150,
+    },
+    "garden": {
+        "moisture_threshold": 25,
+        "watering_duration": 45,
+        "flow_rate": 8,
+        "crop_coefficient": 0.7,
+        "root_depth": 400,
+    },
+    "flower_bed": {
+        "moisture_threshold": 35,
+        "watering_duration": 20,
+        "flow_rate": 6,
+        "crop_coefficient": 0.9,
+        "root_depth": 200,
+    },
+    "vegetable_garden": {
+        "moisture_threshold": 40,
+        "watering_duration": 30,
+        "flow_rate": 8,
+        "crop_coefficient": 1.0,
+        "root_depth": 300,
+    },
+}
+
+# Типы почвы
+
+SOIL_TYPES = {
+    "sand": "Песок",
+    "loam": "Суглинок",
+    "clay": "Глина",
+}
+
+DEFAULT_SOIL_TYPE = "loam"
+
+# Режим цикл-пропитка: максимальный импульс до начала стока и пауза пропитки, минут
+
+SOIL_PROFILES = {
+    "sand": {"cycle": 30, "soak": 15},
+    "loam": {"cycle": 15, "soak": 30},
+    "clay": {"cycle": 8, "soak": 45},
 }
 
 # Конфигурационные ключи
 
-CONF_ZONES = “zones”
-CONF_MOISTURE_SENSORS = “moisture_sensors”
-CONF_WATERING_DURATION = “watering_duration”
-CONF_MOISTURE_THRESHOLD = “moisture_threshold”
-CONF_RAIN_THRESHOLD = “rain_threshold”
\ No newline at end of file
+CONF_ZONES = "zones"
+CONF_MOISTURE_SENSORS = "moisture_sensors"
+CONF_ZONE_SENSORS = "zone_sensors"
+CONF_WATERING_DURATION = "watering_duration"
+CONF_MOISTURE_THRESHOLD = "moisture_threshold"
+CONF_RAIN_THRESHOLD = "rain_threshold"
+CONF_MAX_CONCURRENT_ZONES = "max_concurrent_zones"
+CONF_FLOW_CAPACITY = "flow_capacity"
+CONF_SUPPLY_CAPACITY = "supply_capacity"
+CONF_CYCLE_SOAK = "cycle_soak"
+CONF_WEATHER_ENTITY = "weather_entity"
+CONF_FORECAST_WINDOW = "forecast_window"
+CONF_ZONE_SETTINGS = "zone_settings"
+CONF_ZONE_TYPE = "zone_type"
+CONF_FLOW_RATE = "flow_rate"
+CONF_SOIL_TYPE = "soil_type"
+CONF_CONFIGURE_MORE = "configure_more"
+CONF_ZONE_IMPORT = "zone_import"
+CONF_METRICS = "metrics"
+CONF_WATERING_WINDOW = "watering_window"
+CONF_WINDOW_START = "window_start"
+CONF_WINDOW_END = "window_end"
+CONF_FINISH_BY_SUNRISE = "finish_by_sunrise"
@@ -0,0 +1,53 @@
+"""Диагностика интеграции полива газона."""
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Диагностика записи: настройки, состояние планировщика и метрики."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    scheduler = coordinator.scheduler
+
+    return {
+        "entry": {
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "zones": len(coordinator.zones),
+            "moisture_sensors": len(coordinator.moisture_sensors),
+            "unmatched_zones": coordinator.unmatched_zones,
+            "key_listeners": len(coordinator._key_listeners),
+            "last_update_success": coordinator.last_update_success,
+            "forecast_rain": coordinator.forecast_rain,
+        },
+        "scheduler": {
+            "active_zones": scheduler.active_zones,
+            "pending_zones": scheduler.pending_zones,
+            "soaking_zones": scheduler.soaking_zones,
+            "flow_in_use": scheduler.flow_in_use,
+            "max_concurrent": scheduler.max_concurrent,
+            "flow_capacity": scheduler.flow_capacity,
+            "valves_in_flight": dict(coordinator.valves.in_flight),
+        },
+        "hub": {
+            "tracked_entities": len(coordinator.hub.tracked_entities),
+            "moisture_histories": len(coordinator.hub.moisture_history),
+            "supply_capacity": coordinator.hub.arbiter.capacity,
+            "supply_in_use": coordinator.hub.arbiter.in_use,
+        },
+        "learning": {
+            zone_id: {
+                "rise_rate": coordinator.learner.rise_rate(zone_id),
+                "runs": model["runs"],
+            }
+            for zone_id, model in coordinator.learner.zones.items()
+        },
+        "metrics": coordinator.metrics.as_dict(),
+    }
@@ -0,0 +1,158 @@
+"""Поиск клапанов и датчиков влажности по реестрам Home Assistant."""
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+MOISTURE_DEVICE_CLASSES = frozenset({SensorDeviceClass.MOISTURE, SensorDeviceClass.HUMIDITY})
+
+
+@dataclass(slots=True)
+class DiscoveredEntity:
+    """Найденная сущность и ее расположение."""
+
+    entity_id: str
+    name: str
+    device_id: str | None = None
+    area_id: str | None = None
+
+    @property
+    def option(self) -> dict:
+        """Вариант для SelectSelector."""
+        return {"value": self.entity_id, "label": self.name}
+
+
+@dataclass(slots=True)
+class Discovery:
+    """Результат поиска сущностей для потока конфигурации."""
+
+    switches: list[DiscoveredEntity] = field(default_factory=list)
+    sensors: list[DiscoveredEntity] = field(default_factory=list)
+    sensors_by_device: dict[str, list[str]] = field(default_factory=dict)
+    sensors_by_area: dict[str, list[str]] = field(default_factory=dict)
+
+    def match_zones(self, zones: Iterable[str]) -> dict[str, str]:
+        """Сопоставление зон с датчиками того же устройства или помещения.
+
+        Датчик на том же устройстве, что и клапан, имеет приоритет. По
+        помещению зона получает датчик, только если в помещении остался
+        ровно один свободный датчик, иначе сопоставление неоднозначно.
+        """
+        locations = {entity.entity_id: entity for entity in self.switches}
+        matched = {}
+        used = set()
+        by_area = []
+
+        for zone_id in zones:
+            zone = locations.get(zone_id)
+            if zone is None:
+                continue
+            free = [
+                sensor_id
+                for sensor_id in self.sensors_by_device.get(zone.device_id, ())
+                if sensor_id not in used
+            ]
+            if free:
+                matched[zone_id] = free[0]
+                used.add(free[0])
+            elif zone.area_id is not None:
+                by_area.append(zone)
+
+        # Помещения разбираем после устройств, чтобы не занять чужой датчик
+        for zone in by_area:
+            free = [
+                sensor_id
+                for sensor_id in self.sensors_by_area.get(zone.area_id, ())
+                if sensor_id not in used
+            ]
+            if len(free) == 1:
+                matched[zone.entity_id] = free[0]
+                used.add(free[0])
+
+        return matched
+
+
+@callback
+def async_discover(hass: HomeAssistant) -> Discovery:
+    """Поиск переключателей и датчиков влажности.
+
+    Перебираются только сущности нужных доменов из индекса состояний,
+    класс устройства и помещение берутся из реестров.
+    """
+    entity_registry = er.async_get(hass)
+    device_registry = dr.async_get(hass)
+    discovery = Discovery()
+
+    for entity_id in hass.states.async_entity_ids("switch"):
+        discovery.switches.append(
+            _discovered(hass, entity_registry, device_registry, entity_id)
+        )
+
+    for entity_id in hass.states.async_entity_ids("sensor"):
+        entry = entity_registry.async_get(entity_id)
+        if entry is not None:
+            device_class = entry.device_class or entry.original_device_class
+        else:
+            # Сущности без уникального идентификатора есть только в состояниях
+            device_class = hass.states.get(entity_id).attributes.get("device_class")
+        if device_class not in MOISTURE_DEVICE_CLASSES:
+            continue
+
+        sensor = _discovered(hass, entity_registry, device_registry, entity_id)
+        discovery.sensors.append(sensor)
+        if sensor.device_id is not None:
+            discovery.sensors_by_device.setdefault(sensor.device_id, []).append(entity_id)
+        if sensor.area_id is not None:
+            discovery.sensors_by_area.setdefault(sensor.area_id, []).append(entity_id)
+
+    discovery.switches.sort(key=lambda entity: entity.name.lower())
+    discovery.sensors.sort(key=lambda entity: entity.name.lower())
+    return discovery
+
+
+def _discovered(
+    hass: HomeAssistant,
+    entity_registry: er.EntityRegistry,
+    device_registry: dr.DeviceRegistry,
+    entity_id: str,
+) -> DiscoveredEntity:
+    """Сущность с именем, устройством и помещением."""
+    state = hass.states.get(entity_id)
+    name = state.attributes.get("friendly_name", entity_id) if state else entity_id
+
+    entry = entity_registry.async_get(entity_id)
+    if entry is None:
+        return DiscoveredEntity(entity_id, name)
+
+    area_id = entry.area_id
+    if area_id is None and entry.device_id is not None:
+        device = device_registry.async_get(entry.device_id)
+        area_id = device.area_id if device else None
+
+    return DiscoveredEntity(entity_id, name, entry.device_id, area_id)
+
+
+def suggest_zone_sensors(
+    discovery: Discovery,
+    zones: Iterable[str],
+    sensor_ids: Iterable[str],
+    explicit: Mapping[str, str] | None = None,
+) -> dict[str, str]:
+    """Датчики зон: явно указанные, затем по устройству и помещению.
+
+    Зоны, для которых датчик однозначно не найден, в результат не
+    попадают — имя сущности для подбора не используется.
+    """
+    mapping = dict(explicit or {})
+    sensor_ids = set(sensor_ids)
+    used = set(mapping.values())
+
+    located = discovery.match_zones(zone_id for zone_id in zones if zone_id not in mapping)
+    for zone_id, sensor_id in located.items():
+        if sensor_id in sensor_ids and sensor_id not in used:
+            mapping[zone_id] = sensor_id
+            used.add(sensor_id)
+
+    return mapping
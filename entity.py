@@ -0,0 +1,49 @@
+"""Базовая сущность интеграции полива газона."""
+from collections.abc import Iterable
+
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import ZONE_NAME_KEY
+
+
+class LawnIrrigationEntity(CoordinatorEntity):
+    """Сущность, обновляемая только при изменении своих зависимостей."""
+
+    # Шаблон имени сущности зоны, {} заменяется читаемым именем зоны
+    _zone_name_format: str | None = None
+
+    @property
+    def name(self) -> str | None:
+        """Имя сущности.
+
+        Имя сущности зоны вычисляется при каждой записи состояния: при
+        загрузке HA переключатель зоны может появиться позже интеграции,
+        и читаемое имя подставится, как только зона станет известна.
+        """
+        if self._zone_name_format is None:
+            return super().name
+        return self._zone_name_format.format(self.coordinator.zone_name(self.zone_id))
+
+    def _dependency_keys(self) -> Iterable[str]:
+        """Идентификаторы зон, датчиков и погоды, от которых зависит сущность.
+
+        По умолчанию сущность зависит от всех отслеживаемых сущностей.
+        """
+        coordinator = self.coordinator
+        return (*coordinator.zones, *coordinator.moisture_sensors, coordinator.weather_entity)
+
+    def _listener_keys(self) -> Iterable[str]:
+        """Зависимости сущности и, для сущности зоны, имя зоны."""
+        keys = self._dependency_keys()
+        if self._zone_name_format is None:
+            return keys
+        return (*keys, ZONE_NAME_KEY.format(self.zone_id))
+
+    async def async_added_to_hass(self) -> None:
+        """Подписка на точечные обновления координатора."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_key_listener(
+                self._handle_coordinator_update, self._listener_keys
+            )
+        )
@@ -0,0 +1,145 @@
+"""Модель эвапотранспирации и водного баланса зон полива.
+
+Модуль не зависит от Home Assistant: расчет выполняется одним проходом
+по массивам всех зон, с NumPy, если он установлен.
+"""
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy необязателен
+    np = None
+
+SOLAR_CONSTANT = 0.0820  # МДж/м²/мин
+MIN_DEPLETION_RATE = 0.01  # %/ч, ниже считаем, что почва не сохнет
+
+
+def extraterrestrial_radiation(latitude: float, day_of_year: int) -> float:
+    """Внеземная радиация Ra, МДж/м²/сут (FAO-56, формула 21)."""
+    phi = math.radians(latitude)
+    dr = 1 + 0.033 * math.cos(2 * math.pi * day_of_year / 365)
+    delta = 0.409 * math.sin(2 * math.pi * day_of_year / 365 - 1.39)
+    ws = math.acos(max(-1.0, min(1.0, -math.tan(phi) * math.tan(delta))))
+
+    return (24 * 60 / math.pi) * SOLAR_CONSTANT * dr * (
+        ws * math.sin(phi) * math.sin(delta)
+        + math.cos(phi) * math.cos(delta) * math.sin(ws)
+    )
+
+
+def estimate_temperature_range(humidity: float | None) -> float:
+    """Оценка суточного перепада температуры по влажности воздуха, °C.
+
+    Сухой воздух дает большой перепад, влажный — малый. Используется,
+    когда нет прогноза минимальной и максимальной температуры.
+    """
+    if humidity is None:
+        return 10.0
+    return max(4.0, min(16.0, 18.0 - 0.14 * humidity))
+
+
+def hargreaves_et0(
+    temperature: float,
+    temperature_range: float,
+    latitude: float,
+    day_of_year: int,
+) -> float:
+    """Эталонная эвапотранспирация ET0 по Харгривсу, мм/сут."""
+    ra = extraterrestrial_radiation(latitude, day_of_year)
+    et0 = 0.0023 * 0.408 * ra * (temperature + 17.8) * math.sqrt(max(temperature_range, 0))
+    return max(et0, 0.0)
+
+
+@dataclass(slots=True)
+class ZoneForecast:
+    """Прогноз водного баланса зоны."""
+
+    hours_to_threshold: float | None
+    run_minutes: float | None
+
+
+def forecast_zones(
+    moisture: Sequence[float | None],
+    threshold: Sequence[float],
+    slope: Sequence[float | None],
+    crop_coefficient: Sequence[float],
+    root_depth: Sequence[float],
+    application_rate: Sequence[float],
+    et0: float,
+    rain: float,
+    target_margin: float,
+    max_duration: Sequence[float],
+) -> list[ZoneForecast]:
+    """Прогноз для всех зон за один проход.
+
+    moisture — текущая влажность, %; slope — наблюдаемый тренд, %/ч;
+    root_depth — глубина корнеобитаемого слоя, мм; application_rate —
+    интенсивность полива, мм/мин; et0 и rain — мм/сут и ожидаемые осадки, мм.
+    Возвращает время до пересечения порога и минимальное время полива до
+    целевой влажности (порог + target_margin), ограниченное max_duration.
+    """
+    if np is not None:
+        return _forecast_numpy(
+            moisture, threshold, slope, crop_coefficient, root_depth,
+            application_rate, et0, rain, target_margin, max_duration,
+        )
+
+    result = []
+    for index, level in enumerate(moisture):
+        if level is None:
+            result.append(ZoneForecast(None, None))
+            continue
+
+        depth = root_depth[index]
+        # Скорость высыхания по модели, %/ч, уточненная наблюдаемым трендом
+        rate = et0 * crop_coefficient[index] / depth * 100 / 24
+        observed = slope[index]
+        if observed is not None and observed < 0:
+            rate = (rate - observed) / 2
+        rate = max(rate, MIN_DEPLETION_RATE)
+
+        # Ожидаемые осадки повышают влажность слоя
+        level = level + rain / depth * 100
+        hours = max((level - threshold[index]) / rate, 0.0)
+
+        start_level = min(level, threshold[index])
+        deficit_mm = (threshold[index] + target_margin - start_level) / 100 * depth
+        minutes = min(max(deficit_mm / application_rate[index], 1.0), max_duration[index])
+
+        result.append(ZoneForecast(round(hours, 2), round(minutes, 1)))
+
+    return result
+
+
+def _forecast_numpy(
+    moisture, threshold, slope, crop_coefficient, root_depth,
+    application_rate, et0, rain, target_margin, max_duration,
+) -> list[ZoneForecast]:
+    """Векторизованный вариант forecast_zones на NumPy."""
+    level = np.array([np.nan if value is None else value for value in moisture], dtype=float)
+    observed = np.array([np.nan if value is None else value for value in slope], dtype=float)
+    threshold = np.asarray(threshold, dtype=float)
+    depth = np.asarray(root_depth, dtype=float)
+
+    rate = et0 * np.asarray(crop_coefficient, dtype=float) / depth * 100 / 24
+    drying = observed < 0
+    rate = np.where(drying, (rate - np.where(drying, observed, 0)) / 2, rate)
+    rate = np.maximum(rate, MIN_DEPLETION_RATE)
+
+    level = level + rain / depth * 100
+    hours = np.maximum((level - threshold) / rate, 0.0)
+
+    deficit_mm = (threshold + target_margin - np.minimum(level, threshold)) / 100 * depth
+    minutes = np.minimum(
+        np.maximum(deficit_mm / np.asarray(application_rate, dtype=float), 1.0),
+        np.asarray(max_duration, dtype=float),
+    )
+
+    missing = np.isnan(level)
+    return [
+        ZoneForecast(None, None) if missing[index]
+        else ZoneForecast(round(float(hours[index]), 2), round(float(minutes[index]), 1))
+        for index in range(len(level))
+    ]
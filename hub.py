@@ -0,0 +1,234 @@
+"""Общие данные всех записей интеграции."""
+from collections.abc import Awaitable, Callable, Iterable
+
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import DOMAIN, DATA_HUB
+from .moisture_history import MoistureBuffer
+from .weather import WeatherForecastCache
+
+
+def moisture_level(state: State | None) -> float | None:
+    """Показание датчика влажности, None — нет данных."""
+    if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+        return None
+    try:
+        return float(state.state)
+    except (ValueError, TypeError):
+        return None
+
+
+class FlowArbiter:
+    """Общий лимит расхода воды для контроллеров с одним источником.
+
+    Каждая запись может задать пропускную способность общего водовода,
+    действует наименьшая из заданных. Открытые зоны всех записей
+    занимают расход, освобождение расхода будит планировщики остальных
+    записей.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Инициализация арбитра."""
+        self.hass = hass
+        self.capacity = 0.0  # л/мин, 0 — без ограничения
+        self._limits: dict[str, float] = {}
+        self._claims: dict[tuple[str, str], float] = {}
+        self._waiters: dict[str, Callable[[], Awaitable[None]]] = {}
+
+    @property
+    def in_use(self) -> float:
+        """Суммарный расход открытых зон всех записей, л/мин."""
+        return sum(self._claims.values())
+
+    def fits(self, flow_rate: float, pending: float = 0.0) -> bool:
+        """Помещается ли зона в общий лимит с учетом уже выбранных зон.
+
+        Зона с расходом больше лимита запускается, только когда общий
+        водовод свободен, иначе она не запустится никогда.
+        """
+        if not self.capacity:
+            return True
+        in_use = self.in_use + pending
+        return not in_use or in_use + flow_rate <= self.capacity
+
+    @callback
+    def async_register(
+        self, owner: str, wake: Callable[[], Awaitable[None]], capacity: float
+    ) -> CALLBACK_TYPE:
+        """Подключение планировщика записи."""
+        self._waiters[owner] = wake
+        self.async_set_capacity(owner, capacity)
+
+        @callback
+        def unregister() -> None:
+            self._waiters.pop(owner, None)
+            self._limits.pop(owner, None)
+            self.async_release(owner)
+            # Снятый меньший лимит освобождает расход для остальных записей
+            if self._update_capacity():
+                self._async_wake()
+
+        return unregister
+
+    @callback
+    def async_set_capacity(self, owner: str, capacity: float) -> None:
+        """Пропускная способность общего водовода по настройкам записи."""
+        if capacity:
+            self._limits[owner] = capacity
+        else:
+            self._limits.pop(owner, None)
+        if self._update_capacity():
+            self._async_wake()
+
+    @callback
+    def async_claim(self, owner: str, zone_id: str, flow_rate: float) -> None:
+        """Учет открытой зоны."""
+        self._claims[(owner, zone_id)] = flow_rate
+
+    @callback
+    def async_release(self, owner: str, zone_ids: Iterable[str] | None = None) -> None:
+        """Освобождение расхода закрытых зон, без zone_ids — всех зон записи."""
+        if zone_ids is None:
+            keys = [key for key in self._claims if key[0] == owner]
+        else:
+            keys = [(owner, zone_id) for zone_id in zone_ids]
+
+        released = False
+        for key in keys:
+            released |= self._claims.pop(key, None) is not None
+
+        if released and self.capacity:
+            self._async_wake(exclude=owner)
+
+    def _update_capacity(self) -> bool:
+        """Пересчет общего лимита, True — если лимит вырос или снят."""
+        capacity = min(self._limits.values(), default=0.0)
+        grew = not capacity or (self.capacity and capacity > self.capacity)
+        self.capacity = capacity
+        return bool(grew)
+
+    @callback
+    def _async_wake(self, exclude: str | None = None) -> None:
+        """Запуск ожидающих зон других записей."""
+        for owner, wake in self._waiters.items():
+            if owner != exclude:
+                self.hass.async_create_task(wake())
+
+
+class IrrigationHub:
+    """Общие подписки, история датчиков, прогноз и лимит расхода.
+
+    Записи, отслеживающие одни и те же датчики и погоду, получают
+    события от одной подписки и используют общую историю показаний.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Инициализация общих данных."""
+        self.hass = hass
+        self.weather = WeatherForecastCache(hass)
+        self.arbiter = FlowArbiter(hass)
+        self.moisture_history: dict[str, MoistureBuffer] = {}
+        self._handlers: dict[str, dict[object, Callable[[Event], None]]] = {}
+        self._tracked = frozenset()
+        self._unsub_track = None
+
+    @property
+    def tracked_entities(self) -> frozenset[str]:
+        """Сущности, на которые оформлена общая подписка."""
+        return self._tracked
+
+    def moisture_buffer(self, sensor_id: str) -> MoistureBuffer:
+        """Общая история показаний датчика."""
+        history = self.moisture_history.get(sensor_id)
+        if history is None:
+            history = self.moisture_history[sensor_id] = MoistureBuffer()
+        return history
+
+    @callback
+    def async_record_moisture(self, sensor_id: str, state: State | None) -> None:
+        """Запись показания в общую историю датчика.
+
+        Повтор уже записанного состояния буфер отбрасывает по времени,
+        так что опрос нескольких записей не добавляет его снова.
+        """
+        history = self.moisture_history.get(sensor_id)
+        level = moisture_level(state)
+        if history is not None and level is not None:
+            history.add(level, state.last_updated.timestamp())
+
+    @callback
+    def async_subscribe(
+        self, entity_ids: Iterable[str], handler: Callable[[Event], None]
+    ) -> CALLBACK_TYPE:
+        """Подписка записи на изменения состояний сущностей.
+
+        Новая подписка записи может быть оформлена до отмены прежней, так
+        что общая история датчиков при смене настроек не теряется.
+        """
+        entity_ids = list(dict.fromkeys(entity_ids))
+        token = object()
+        for entity_id in entity_ids:
+            self._handlers.setdefault(entity_id, {})[token] = handler
+        self._async_track()
+
+        @callback
+        def unsubscribe() -> None:
+            for entity_id in entity_ids:
+                handlers = self._handlers.get(entity_id)
+                if handlers is None:
+                    continue
+                handlers.pop(token, None)
+                if not handlers:
+                    # История нужна только отслеживаемым датчикам
+                    del self._handlers[entity_id]
+                    self.moisture_history.pop(entity_id, None)
+            self._async_track()
+
+        return unsubscribe
+
+    @callback
+    def _async_track(self) -> None:
+        """Одна подписка на объединение сущностей всех записей."""
+        tracked = frozenset(self._handlers)
+        if tracked == self._tracked:
+            return
+        self._tracked = tracked
+
+        if self._unsub_track is not None:
+            self._unsub_track()
+            self._unsub_track = None
+        if tracked:
+            self._unsub_track = async_track_state_change_event(
+                self.hass, list(tracked), self._async_dispatch
+            )
+
+    @callback
+    def _async_dispatch(self, event: Event) -> None:
+        """Передача события записям, отслеживающим сущность.
+
+        Показание датчика попадает в общую историю один раз до передачи
+        события, записи только читают историю.
+        """
+        entity_id = event.data["entity_id"]
+        self.async_record_moisture(entity_id, event.data["new_state"])
+        for handler in tuple(self._handlers.get(entity_id, {}).values()):
+            handler(event)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Отписка при выгрузке последней записи."""
+        if self._unsub_track is not None:
+            self._unsub_track()
+            self._unsub_track = None
+        self._handlers.clear()
+        self._tracked = frozenset()
+
+
+def get_hub(hass: HomeAssistant) -> IrrigationHub:
+    """Общие данные интеграции в hass.data[DOMAIN]."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_HUB not in domain_data:
+        domain_data[DATA_HUB] = IrrigationHub(hass)
+    return domain_data[DATA_HUB]
@@ -0,0 +1,43 @@
+"""Журнал поливов, переживающий перезапуск Home Assistant."""
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10  # секунд
+
+
+class IrrigationJournal:
+    """Журнал открытых клапанов и очереди полива в хранилище HA.
+
+    Сохранение откладывается и объединяет несколько изменений подряд,
+    при остановке HA отложенная запись выполняется сразу.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        """Инициализация журнала."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.journal")
+        self.active: dict[str, dict] = {}
+        self.pending: list[dict] = []
+
+    async def async_load(self) -> None:
+        """Загрузка журнала из хранилища."""
+        data = await self._store.async_load() or {}
+        self.active = data.get("active", {})
+        self.pending = data.get("pending", [])
+
+    @callback
+    def async_update(self, active: dict[str, dict], pending: list[dict]) -> None:
+        """Обновление журнала с отложенным сохранением."""
+        self.active = active
+        self.pending = pending
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _data_to_save(self) -> dict:
+        """Данные для записи в хранилище."""
+        return {"active": self.active, "pending": self.pending}
+
+    async def async_remove(self) -> None:
+        """Удаление журнала вместе с записью конфигурации."""
+        await self._store.async_remove()
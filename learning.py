@@ -0,0 +1,141 @@
+"""Обучение времени полива зон по отклику датчиков влажности."""
+import math
+from collections.abc import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10  # секунд
+
+SETTLE_DELAY = 45  # минут после полива до замера прироста влажности
+FORGETTING_FACTOR = 0.9  # вес прошлых поливов, сезонные изменения почвы учитываются
+MIN_RUNS = 2  # поливов до использования обученной интенсивности
+RATE_LIMIT = 5  # обученная интенсивность не дальше чем в 5 раз от профиля
+MIN_MINUTES = 1.0  # более короткие поливы не дают надежного отклика
+
+
+class RunTimeLearner:
+    """Прирост влажности на минуту полива по каждой зоне.
+
+    Для каждой зоны хранятся суммы взвешенного метода наименьших
+    квадратов для модели прирост = k * минуты: память постоянна, каждое
+    наблюдение обновляет суммы за O(1), старые поливы постепенно
+    забываются. Наблюдение — разница сглаженной влажности до полива и
+    через SETTLE_DELAY минут после его окончания.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        get_moisture: Callable[[str], float | None],
+        on_update: Callable[[], None] | None = None,
+    ):
+        """Инициализация обучения."""
+        self.hass = hass
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.learning")
+        self._get_moisture = get_moisture
+        self._on_update = on_update
+        self.zones: dict[str, dict] = {}  # зона → {"sxx", "sxy", "runs"}
+        self._baseline: dict[str, float] = {}
+        self._timers = {}
+
+    async def async_load(self) -> None:
+        """Загрузка коэффициентов из хранилища."""
+        data = await self._store.async_load() or {}
+        self.zones = data.get("zones", {})
+
+    def rise_rate(self, zone_id: str) -> float | None:
+        """Обученный прирост влажности зоны, %/мин."""
+        model = self.zones.get(zone_id)
+        if model is None or model["runs"] < MIN_RUNS or model["sxx"] <= 0:
+            return None
+        # Отдельные поливы без прироста не делают прирост отрицательным
+        return max(model["sxy"] / model["sxx"], 0.0)
+
+    def application_rate(self, zone_id: str, root_depth: float, default: float) -> float:
+        """Интенсивность полива зоны для расчета времени полива, мм/мин.
+
+        Прирост влажности слоя пересчитывается в миллиметры воды; до
+        накопления поливов используется интенсивность по умолчанию.
+        """
+        rate = self.rise_rate(zone_id)
+        if rate is None:
+            return default
+        return min(max(rate * root_depth / 100, default / RATE_LIMIT), default * RATE_LIMIT)
+
+    @callback
+    def async_run_started(self, zone_id: str) -> None:
+        """Запоминание влажности перед поливом зоны."""
+        # Новый полив до замера прошлого делает тот замер недостоверным
+        self._cancel_timer(zone_id)
+        moisture = self._get_moisture(zone_id)
+        if moisture is None:
+            self._baseline.pop(zone_id, None)
+        else:
+            self._baseline[zone_id] = moisture
+
+    @callback
+    def async_run_finished(self, zone_id: str, minutes: float) -> None:
+        """Замер прироста влажности после впитывания воды."""
+        baseline = self._baseline.pop(zone_id, None)
+        if baseline is None or minutes < MIN_MINUTES:
+            return
+
+        self._timers[zone_id] = self.hass.loop.call_later(
+            SETTLE_DELAY * 60, self._observe, zone_id, baseline, minutes
+        )
+
+    @callback
+    def async_run_cancelled(self, zone_id: str | None = None) -> None:
+        """Отказ от замера прерванного полива, без zone_id — всех зон."""
+        if zone_id is None:
+            self._baseline.clear()
+        else:
+            self._baseline.pop(zone_id, None)
+
+    @callback
+    def _observe(self, zone_id: str, baseline: float, minutes: float) -> None:
+        """Обновление модели зоны по одному поливу."""
+        self._timers.pop(zone_id, None)
+        moisture = self._get_moisture(zone_id)
+        if moisture is None:
+            return
+
+        # Поливы без прироста тоже входят в оценку, иначе она завышена;
+        # итоговая интенсивность ограничивается в application_rate
+        rise = moisture - baseline
+        if not math.isfinite(rise):
+            return
+
+        model = self.zones.setdefault(zone_id, {"sxx": 0.0, "sxy": 0.0, "runs": 0})
+        model["sxx"] = FORGETTING_FACTOR * model["sxx"] + minutes * minutes
+        model["sxy"] = FORGETTING_FACTOR * model["sxy"] + minutes * rise
+        model["runs"] += 1
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        if self._on_update is not None:
+            self._on_update()
+
+    def _cancel_timer(self, zone_id: str) -> None:
+        """Отмена ожидающего замера зоны."""
+        if (handle := self._timers.pop(zone_id, None)) is not None:
+            handle.cancel()
+
+    @callback
+    def async_cancel(self) -> None:
+        """Отмена ожидающих замеров при выгрузке записи."""
+        for handle in self._timers.values():
+            handle.cancel()
+        self._timers.clear()
+        self._baseline.clear()
+
+    def _data_to_save(self) -> dict:
+        """Данные для записи в хранилище."""
+        return {"zones": self.zones}
+
+    async def async_remove(self) -> None:
+        """Удаление коэффициентов вместе с записью конфигурации."""
+        await self._store.async_remove()
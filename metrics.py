@@ -0,0 +1,123 @@
+"""Метрики работы интеграции: длительность этапов и число записей."""
+import bisect
+import time
+
+# Границы корзин гистограмм: миллисекунды для длительностей, штуки для счетчиков
+HISTOGRAM_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+STAGE_REFRESH = "refresh"
+STAGE_SNAPSHOT = "snapshot"
+STAGE_DECIDE = "decide"
+STAGE_DISPATCH = "dispatch"
+STAGE_SERVICE_CALL = "service_call"
+STAGE_VALVE_CONFIRM = "valve_confirm"
+STAGES = (
+    STAGE_REFRESH,
+    STAGE_SNAPSHOT,
+    STAGE_DECIDE,
+    STAGE_DISPATCH,
+    STAGE_SERVICE_CALL,
+    STAGE_VALVE_CONFIRM,
+)
+
+ENTITY_WRITES = "entity_writes"
+VALVE_RETRIES = "valve_retries"
+VALVE_FAILURES = "valve_failures"
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами и накопленной статистикой."""
+
+    __slots__ = ("counts", "count", "total", "maximum", "last")
+
+    def __init__(self):
+        """Инициализация пустой гистограммы."""
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.last = None
+
+    def record(self, value: float) -> None:
+        """Учет одного значения."""
+        self.counts[bisect.bisect_left(HISTOGRAM_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.last = value
+        if value > self.maximum:
+            self.maximum = value
+
+    @property
+    def mean(self) -> float | None:
+        """Среднее значение."""
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict:
+        """Представление для диагностики."""
+        labels = [f"<={bound}" for bound in HISTOGRAM_BOUNDS] + [f">{HISTOGRAM_BOUNDS[-1]}"]
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 3) if self.count else None,
+            "max": round(self.maximum, 3),
+            "last": round(self.last, 3) if self.last is not None else None,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class RuntimeMetrics:
+    """Сбор метрик, включаемый настройкой.
+
+    В выключенном состоянии start() возвращает None без обращения к
+    таймеру, а stop() и record() сразу выходят, так что вызовы в коде
+    координатора и планировщика почти ничего не стоят.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """Инициализация метрик."""
+        self.enabled = enabled
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.writes = Histogram()
+        self.valve_queue = Histogram()
+        self.counters = {ENTITY_WRITES: 0, VALVE_RETRIES: 0, VALVE_FAILURES: 0}
+
+    def start(self) -> float | None:
+        """Начало замера этапа."""
+        return time.perf_counter() if self.enabled else None
+
+    def stop(self, stage: str, started: float | None) -> None:
+        """Окончание замера этапа, длительность в миллисекундах."""
+        if started is None:
+            return
+        self.stages[stage].record((time.perf_counter() - started) * 1000)
+
+    def record_writes(self, count: int) -> None:
+        """Учет числа записей состояний сущностей за одно обновление."""
+        if not self.enabled or not count:
+            return
+        self.writes.record(count)
+        self.counters[ENTITY_WRITES] += count
+
+    def record_valve_queue(self, depth: int) -> None:
+        """Учет числа клапанов, ожидающих подтверждения команды."""
+        if self.enabled:
+            self.valve_queue.record(depth)
+
+    def record_valve_retries(self, count: int) -> None:
+        """Учет повторных команд клапанам."""
+        if self.enabled:
+            self.counters[VALVE_RETRIES] += count
+
+    def record_valve_failures(self, count: int) -> None:
+        """Учет клапанов, не выполнивших команду после всех попыток."""
+        if self.enabled and count:
+            self.counters[VALVE_FAILURES] += count
+
+    def as_dict(self) -> dict:
+        """Представление для диагностики."""
+        return {
+            "enabled": self.enabled,
+            "stages_ms": {stage: histogram.as_dict() for stage, histogram in self.stages.items()},
+            "entity_writes_per_update": self.writes.as_dict(),
+            "valve_queue_depth": self.valve_queue.as_dict(),
+            "counters": dict(self.counters),
+        }
@@ -0,0 +1,264 @@
+"""История показаний датчиков влажности с O(1) статистикой."""
+import math
+from array import array
+from collections import deque
+from collections.abc import Iterable
+
+HISTORY_SIZE = 432  # 3 суток при записи раз в 10 минут
+HISTORY_INTERVAL = 600  # секунд между точками истории
+SMOOTHING_ALPHA = 0.3
+OUTLIER_SIGMA = 4
+OUTLIER_MIN_JUMP = 15  # %
+
+
+class MoistureBuffer:
+    """Кольцевой буфер показаний одного датчика влажности.
+
+    Память фиксирована: значения хранятся в массивах array заданной
+    емкости. Среднее, минимум и наклон по окну обновляются за O(1)
+    при каждой записи, без прохода по истории.
+    """
+
+    __slots__ = (
+        "capacity",
+        "interval",
+        "smoothed",
+        "last_time",
+        "last_seen",
+        "_times",
+        "_values",
+        "_start",
+        "_count",
+        "_seq",
+        "_origin",
+        "_sum_t",
+        "_sum_v",
+        "_sum_tt",
+        "_sum_tv",
+        "_sum_vv",
+        "_min",
+        "_suspect",
+        "_writes",
+    )
+
+    def __init__(self, capacity: int = HISTORY_SIZE, interval: float = HISTORY_INTERVAL):
+        """Инициализация буфера."""
+        self.capacity = capacity
+        self.interval = interval
+        self._reset()
+
+    def _reset(self) -> None:
+        """Очистка истории и накопленных сумм при той же емкости."""
+        self.smoothed: float | None = None
+        self.last_time: float | None = None  # последняя точка истории
+        self.last_seen: float | None = None  # последнее рассмотренное показание
+        self._times = array("d", [0.0]) * self.capacity  # часы от _origin
+        self._values = array("f", [0.0]) * self.capacity
+        self._start = 0
+        self._count = 0
+        self._seq = 0
+        self._origin: float | None = None
+        self._sum_t = self._sum_v = self._sum_tt = self._sum_tv = self._sum_vv = 0.0
+        self._min: deque[tuple[int, float]] = deque()
+        self._suspect: float | None = None
+        self._writes = 0
+
+    def __len__(self) -> int:
+        """Количество точек в истории."""
+        return self._count
+
+    def add(self, value: float, timestamp: float) -> bool:
+        """Добавление показания, timestamp — секунды эпохи.
+
+        Показание не новее уже рассмотренного отбрасывается, так что
+        повторное чтение того же состояния не сдвигает сглаженное значение
+        и не подтверждает выброс. Одиночный выброс отбрасывается; если
+        следующее показание его подтверждает, оба принимаются (например,
+        резкий рост после полива). Возвращает False для отброшенного показания.
+        """
+        if not math.isfinite(value):
+            return False
+        if self.last_seen is not None and timestamp <= self.last_seen:
+            return False
+        self.last_seen = timestamp
+
+        if self._is_outlier(value):
+            if self._suspect is None or abs(value - self._suspect) > self._outlier_limit():
+                self._suspect = value
+                return False
+            self.smoothed = self._suspect
+        self._suspect = None
+
+        if self.smoothed is None:
+            self.smoothed = value
+        else:
+            self.smoothed += SMOOTHING_ALPHA * (value - self.smoothed)
+
+        # В историю попадает не больше одной точки за интервал
+        if self.last_time is None or timestamp - self.last_time >= self.interval:
+            self._push(value, timestamp)
+            self.last_time = timestamp
+
+        return True
+
+    def backfill(self, samples: Iterable[tuple[float, float]]) -> int:
+        """Заполнение истории более ранними показаниями (timestamp, value).
+
+        Показания не новее первой накопленной точки вставляются перед
+        ней, накопленные точки записываются поверх заново, так что суммы
+        и минимум остаются согласованными. Сглаженное значение по живым
+        показаниям сохраняется. Возвращает число принятых показаний.
+        """
+        points = [
+            (self._origin + self._times[index] * 3600, self._values[index])
+            for index in (
+                (self._start + offset) % self.capacity for offset in range(self._count)
+            )
+        ]
+        first = points[0][0] if points else self.last_time
+        smoothed, last_time, last_seen = self.smoothed, self.last_time, self.last_seen
+
+        self._reset()
+        accepted = 0
+        for timestamp, value in samples:
+            if first is not None and timestamp >= first:
+                break
+            accepted += self.add(value, timestamp)
+
+        for timestamp, value in points:
+            if self.last_time is None or timestamp - self.last_time >= self.interval:
+                self._push(value, timestamp)
+                self.last_time = timestamp
+
+        if smoothed is not None:
+            self.smoothed = smoothed
+            self.last_time = max(self.last_time or last_time, last_time)
+        if last_seen is not None:
+            self.last_seen = max(self.last_seen or last_seen, last_seen)
+        return accepted
+
+    def _outlier_limit(self) -> float:
+        """Допустимое отклонение показания от сглаженного значения."""
+        std = self.std
+        return max(OUTLIER_MIN_JUMP, OUTLIER_SIGMA * std if std is not None else 0)
+
+    def _is_outlier(self, value: float) -> bool:
+        """Проверка показания на выброс."""
+        if self.smoothed is None or self._count < 3:
+            return False
+        return abs(value - self.smoothed) > self._outlier_limit()
+
+    def _push(self, value: float, timestamp: float) -> None:
+        """Запись точки в кольцевой буфер с обновлением сумм."""
+        if self._origin is None:
+            self._origin = timestamp
+
+        if self._count == self.capacity:
+            self._evict()
+
+        t = (timestamp - self._origin) / 3600
+        index = (self._start + self._count) % self.capacity
+        self._times[index] = t
+        self._values[index] = value
+        value = self._values[index]  # точность хранения float32
+        self._count += 1
+
+        self._sum_t += t
+        self._sum_v += value
+        self._sum_tt += t * t
+        self._sum_tv += t * value
+        self._sum_vv += value * value
+
+        seq = self._seq
+        self._seq += 1
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((seq, value))
+
+        # Периодический пересчет сумм убирает накопленную погрешность
+        self._writes += 1
+        if self._writes >= self.capacity:
+            self._recompute()
+
+    def _evict(self) -> None:
+        """Удаление самой старой точки из буфера."""
+        t = self._times[self._start]
+        value = self._values[self._start]
+
+        self._sum_t -= t
+        self._sum_v -= value
+        self._sum_tt -= t * t
+        self._sum_tv -= t * value
+        self._sum_vv -= value * value
+
+        oldest_seq = self._seq - self._count
+        if self._min and self._min[0][0] == oldest_seq:
+            self._min.popleft()
+
+        self._start = (self._start + 1) % self.capacity
+        self._count -= 1
+
+    def _recompute(self) -> None:
+        """Пересчет сумм с переносом начала отсчета времени."""
+        self._writes = 0
+        if not self._count:
+            return
+
+        shift = self._times[self._start]
+        self._origin += shift * 3600
+        self._sum_t = self._sum_v = self._sum_tt = self._sum_tv = self._sum_vv = 0.0
+
+        for offset in range(self._count):
+            index = (self._start + offset) % self.capacity
+            t = self._times[index] - shift
+            value = self._values[index]
+            self._times[index] = t
+            self._sum_t += t
+            self._sum_v += value
+            self._sum_tt += t * t
+            self._sum_tv += t * value
+            self._sum_vv += value * value
+
+    @property
+    def first_time(self) -> float | None:
+        """Время самой старой точки истории, секунды эпохи."""
+        if not self._count:
+            return None
+        return self._origin + self._times[self._start] * 3600
+
+    @property
+    def mean(self) -> float | None:
+        """Среднее значение по окну истории."""
+        if not self._count:
+            return None
+        return self._sum_v / self._count
+
+    @property
+    def std(self) -> float | None:
+        """Стандартное отклонение по окну истории."""
+        if self._count < 2:
+            return None
+        mean = self._sum_v / self._count
+        return math.sqrt(max(self._sum_vv / self._count - mean * mean, 0))
+
+    @property
+    def minimum(self) -> float | None:
+        """Минимальное значение по окну истории."""
+        return self._min[0][1] if self._min else None
+
+    @property
+    def slope(self) -> float | None:
+        """Наклон линейного тренда по окну истории, %/ч."""
+        if self._count < 2:
+            return None
+        denominator = self._count * self._sum_tt - self._sum_t * self._sum_t
+        if denominator <= 0:
+            return None
+        return (self._count * self._sum_tv - self._sum_t * self._sum_v) / denominator
+
+    def values(self) -> list[float]:
+        """Значения истории от старых к новым."""
+        return [
+            self._values[(self._start + offset) % self.capacity]
+            for offset in range(self._count)
+        ]
@@ -0,0 +1,159 @@
+"""Движок принятия решений о поливе.
+
+Модуль не выполняет ввода-вывода и не зависит от Home Assistant: на вход
+подается снимок всех зон и погоды, на выходе — полный план полива.
+Выполнение плана (вызовы служб) — отдельный этап в планировщике.
+"""
+from dataclasses import dataclass, field
+
+from .evapotranspiration import ZoneForecast, forecast_zones
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy необязателен
+    np = None
+
+SKIP_RAIN = "rain"
+
+
+@dataclass(slots=True)
+class SiteSnapshot:
+    """Снимок состояния всех зон в виде столбцов одинаковой длины."""
+
+    zone_ids: list[str] = field(default_factory=list)
+    moisture: list[float | None] = field(default_factory=list)  # %, сглаженная
+    slope: list[float | None] = field(default_factory=list)  # %/ч
+    threshold: list[float] = field(default_factory=list)  # %
+    max_duration: list[float] = field(default_factory=list)  # минут
+    flow_rate: list[float] = field(default_factory=list)  # л/мин
+    crop_coefficient: list[float] = field(default_factory=list)
+    root_depth: list[float] = field(default_factory=list)  # мм
+    application_rate: list[float] = field(default_factory=list)  # мм/мин
+    et0: float = 0.0  # мм/сут
+    precipitation: float = 0.0  # мм, текущие осадки
+    forecast_rain: float = 0.0  # мм, ожидаемые осадки в окне прогноза
+    rain_threshold: float = 0.0  # мм
+    target_margin: float = 0.0  # %
+
+    def add_zone(
+        self,
+        zone_id: str,
+        moisture: float | None,
+        slope: float | None,
+        threshold: float,
+        max_duration: float,
+        flow_rate: float,
+        crop_coefficient: float,
+        root_depth: float,
+        application_rate: float,
+    ) -> None:
+        """Добавление зоны в снимок."""
+        self.zone_ids.append(zone_id)
+        self.moisture.append(moisture)
+        self.slope.append(slope)
+        self.threshold.append(threshold)
+        self.max_duration.append(max_duration)
+        self.flow_rate.append(flow_rate)
+        self.crop_coefficient.append(crop_coefficient)
+        self.root_depth.append(root_depth)
+        self.application_rate.append(application_rate)
+
+
+@dataclass(slots=True)
+class PlannedRun:
+    """Полив одной зоны в плане."""
+
+    zone_id: str
+    duration: float  # минут
+    deficit: float  # % ниже порога
+    flow_rate: float  # л/мин
+
+
+@dataclass(slots=True)
+class WateringPlan:
+    """Результат оценки всех зон."""
+
+    runs: list[PlannedRun] = field(default_factory=list)
+    forecasts: dict[str, ZoneForecast] = field(default_factory=dict)
+    skipped: str | None = None
+
+    @property
+    def zone_ids(self) -> list[str]:
+        """Зоны плана в порядке приоритета."""
+        return [run.zone_id for run in self.runs]
+
+
+def forecast_site(snapshot: SiteSnapshot) -> dict[str, ZoneForecast]:
+    """Прогноз водного баланса для всех зон снимка."""
+    forecasts = forecast_zones(
+        snapshot.moisture,
+        snapshot.threshold,
+        snapshot.slope,
+        snapshot.crop_coefficient,
+        snapshot.root_depth,
+        snapshot.application_rate,
+        snapshot.et0,
+        snapshot.precipitation + snapshot.forecast_rain,
+        snapshot.target_margin,
+        snapshot.max_duration,
+    )
+    return dict(zip(snapshot.zone_ids, forecasts))
+
+
+def build_plan(snapshot: SiteSnapshot) -> WateringPlan:
+    """Построение плана полива за один проход по всем зонам.
+
+    Зона попадает в план, если ее влажность известна и остается ниже
+    порога с учетом ожидаемых осадков; ожидаемый дождь также сокращает
+    время полива. Зоны упорядочены по убыванию дефицита влажности. При
+    текущих или ожидаемых осадках выше порога дождя план пуст и содержит
+    причину пропуска.
+    """
+    if (
+        snapshot.precipitation > snapshot.rain_threshold
+        or snapshot.forecast_rain > snapshot.rain_threshold
+    ):
+        return WateringPlan(skipped=SKIP_RAIN)
+
+    forecasts = forecast_site(snapshot)
+    deficits = _deficits(snapshot)
+
+    runs = [
+        PlannedRun(
+            zone_id=snapshot.zone_ids[index],
+            duration=forecasts[snapshot.zone_ids[index]].run_minutes,
+            deficit=deficit,
+            flow_rate=snapshot.flow_rate[index],
+        )
+        for index, deficit in deficits
+    ]
+    runs.sort(key=lambda run: run.deficit, reverse=True)
+
+    return WateringPlan(runs=runs, forecasts=forecasts)
+
+
+def _deficits(snapshot: SiteSnapshot) -> list[tuple[int, float]]:
+    """Индексы зон ниже порога и их дефицит влажности.
+
+    Осадки пересчитываются в прибавку влажности корнеобитаемого слоя.
+    """
+    rain = snapshot.precipitation + snapshot.forecast_rain
+
+    if np is not None:
+        moisture = np.array(
+            [np.nan if value is None else value for value in snapshot.moisture], dtype=float
+        )
+        moisture += rain / np.asarray(snapshot.root_depth, dtype=float) * 100
+        deficit = np.asarray(snapshot.threshold, dtype=float) - moisture
+        indexes = np.flatnonzero(deficit > 0)  # NaN дает False
+        return [(int(index), float(deficit[index])) for index in indexes]
+
+    deficits = []
+    for index, moisture in enumerate(snapshot.moisture):
+        if moisture is None:
+            continue
+        deficit = snapshot.threshold[index] - moisture - rain / snapshot.root_depth[index] * 100
+        if deficit > 0:
+            deficits.append((index, deficit))
+
+    return deficits
@@ -0,0 +1,520 @@
+"""Планировщик полива зон с учетом пропускной способности насоса."""
+import asyncio
+import heapq
+import itertools
+import logging
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from homeassistant.const import STATE_ON
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .hub import FlowArbiter
+from .journal import IrrigationJournal
+from .learning import RunTimeLearner
+from .metrics import STAGE_DISPATCH, RuntimeMetrics
+from .valves import ValveCommander
+
+_LOGGER = logging.getLogger(__name__)
+
+MIN_PULSE = 0.5  # минут, меньший остаток полива не запускается
+
+
+@dataclass(order=True)
+class ZoneRun:
+    """Заявка на полив зоны в очереди планировщика.
+
+    Очередь упорядочена по priority: чем меньше значение, тем раньше
+    зона получит воду (для дефицита влажности передается -дефицит).
+    При cycle > 0 полив разбивается на импульсы не длиннее cycle минут
+    с паузами пропитки soak минут между ними.
+    """
+
+    priority: float
+    order: int = field(default=0)
+    zone_id: str = field(default="", compare=False)
+    duration: float = field(default=0, compare=False)  # минут
+    flow_rate: float = field(default=0, compare=False)  # л/мин
+    cycle: float = field(default=0, compare=False)  # минут на импульс, 0 — без разбиения
+    soak: float = field(default=0, compare=False)  # минут пропитки между импульсами
+    watered: float = field(default=0, compare=False)  # минут уже полито
+    started_at: datetime | None = field(default=None, compare=False)
+    ends_at: datetime | None = field(default=None, compare=False)
+    ready_at: datetime | None = field(default=None, compare=False)
+
+    @property
+    def remaining(self) -> float:
+        """Оставшееся время полива, минут."""
+        return max(self.duration - self.watered, 0)
+
+    def next_pulse(self) -> float:
+        """Длительность следующего импульса, минут."""
+        if self.cycle:
+            return min(self.remaining, self.cycle)
+        return self.remaining
+
+    def complete_pulse(self) -> None:
+        """Учет завершенного импульса."""
+        if self.started_at is not None and self.ends_at is not None:
+            self.watered += (self.ends_at - self.started_at).total_seconds() / 60
+        self.started_at = None
+        self.ends_at = None
+
+    def as_dict(self) -> dict:
+        """Представление заявки для журнала."""
+        data = {
+            "zone_id": self.zone_id,
+            "priority": self.priority,
+            "duration": self.duration,
+            "flow_rate": self.flow_rate,
+            "cycle": self.cycle,
+            "soak": self.soak,
+            "watered": self.watered,
+        }
+        if self.started_at is not None:
+            data["started_at"] = self.started_at.isoformat()
+            data["ends_at"] = self.ends_at.isoformat()
+        if self.ready_at is not None:
+            data["ready_at"] = self.ready_at.isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ZoneRun":
+        """Восстановление заявки из журнала."""
+        run = cls(
+            priority=data["priority"],
+            zone_id=data["zone_id"],
+            duration=data["duration"],
+            flow_rate=data.get("flow_rate", 0),
+            cycle=data.get("cycle", 0),
+            soak=data.get("soak", 0),
+            watered=data.get("watered", 0),
+        )
+        if "started_at" in data:
+            run.started_at = dt_util.parse_datetime(data["started_at"])
+            run.ends_at = dt_util.parse_datetime(data["ends_at"])
+        if "ready_at" in data:
+            run.ready_at = dt_util.parse_datetime(data["ready_at"])
+        return run
+
+
+class IrrigationScheduler:
+    """Очередь полива с ограничением одновременно открытых клапанов.
+
+    Зоны запускаются пачками одним вызовом службы, при освобождении
+    слота автоматически запускается следующая зона из очереди. Зона в
+    режиме цикл-пропитка на время пропитки освобождает слот, и в паузе
+    поливаются импульсы других зон. Общий с другими записями водовод
+    учитывается арбитром расхода. Команды клапанам подтверждаются их
+    состоянием; не закрывшийся клапан останавливает весь полив записи.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_concurrent: int,
+        flow_capacity: float,
+        journal: IrrigationJournal,
+        metrics: RuntimeMetrics,
+        arbiter: FlowArbiter,
+        owner: str,
+        valves: ValveCommander,
+        learner: RunTimeLearner,
+    ):
+        """Инициализация планировщика."""
+        self.hass = hass
+        self.journal = journal
+        self.metrics = metrics
+        self.arbiter = arbiter
+        self.owner = owner
+        self.valves = valves
+        self.learner = learner
+        self.max_concurrent = max_concurrent
+        self.flow_capacity = flow_capacity  # л/мин, 0 — без ограничения
+        self._queue: list[ZoneRun] = []
+        self._counter = itertools.count()
+        self._active: dict[str, ZoneRun] = {}
+        self._starting: dict[str, ZoneRun] = {}  # клапан еще не подтвердил открытие
+        self._soaking: dict[str, ZoneRun] = {}
+        self._timers = {}
+        self._soak_timers = {}
+        self._finished: set[str] = set()
+        self._flush_handle = None
+        self._dispatch_tasks: set[asyncio.Task] = set()
+
+    @property
+    def active_zones(self) -> list[str]:
+        """Зоны, которые сейчас поливаются."""
+        return list(self._active)
+
+    @property
+    def pending_zones(self) -> list[str]:
+        """Зоны, ожидающие полива, в порядке приоритета."""
+        return [run.zone_id for run in sorted(self._queue)]
+
+    @property
+    def soaking_zones(self) -> list[str]:
+        """Зоны в паузе пропитки между импульсами."""
+        return list(self._soaking)
+
+    def scheduled_end(self, zone_id: str) -> datetime | None:
+        """Плановое время закрытия клапана поливаемой зоны."""
+        run = self._active.get(zone_id)
+        return run.ends_at if run is not None else None
+
+    @property
+    def flow_in_use(self) -> float:
+        """Суммарный расход открытых и открываемых зон, л/мин."""
+        return sum(run.flow_rate for run in (*self._active.values(), *self._starting.values()))
+
+    async def async_schedule(self, runs: Iterable[ZoneRun]) -> None:
+        """Постановка зон в очередь и запуск тех, что помещаются в лимиты.
+
+        Запуск идет в фоне: ожидание подтверждения клапанов с повторами
+        может занять минуты и не должно задерживать вызывающего.
+        """
+        started = self.metrics.start()
+        queued = {run.zone_id for run in self._queue}
+
+        for run in runs:
+            if (
+                run.zone_id in self._active
+                or run.zone_id in self._starting
+                or run.zone_id in self._soaking
+                or run.zone_id in queued
+            ):
+                continue
+            run.order = next(self._counter)
+            heapq.heappush(self._queue, run)
+            queued.add(run.zone_id)
+
+        self._async_persist()
+        self.metrics.stop(STAGE_DISPATCH, started)
+        self._async_start_dispatch()
+
+    async def async_restore(self) -> None:
+        """Восстановление полива из журнала после перезапуска.
+
+        Просроченные клапаны закрываются сразу, для остальных заново
+        взводятся таймеры на оставшееся время, очередь продолжается.
+        """
+        now = dt_util.utcnow()
+        overdue = []
+
+        for data in self.journal.active.values():
+            run = ZoneRun.from_dict(data)
+            if run.ends_at is None or run.ends_at <= now:
+                overdue.append(run.zone_id)
+                run.complete_pulse()
+                # Остаток импульсного полива продолжается в очереди
+                if run.remaining >= MIN_PULSE:
+                    self._enqueue(run)
+                continue
+            self._arm(run, (run.ends_at - now).total_seconds())
+            _LOGGER.info("Восстановлен полив зоны %s до %s", run.zone_id, run.ends_at)
+
+        for data in self.journal.pending:
+            run = ZoneRun.from_dict(data)
+            if run.zone_id in self._active or run.zone_id in self._starting:
+                continue
+            if run.ready_at is not None and run.ready_at > now:
+                self._start_soak(run, (run.ready_at - now).total_seconds())
+            else:
+                self._enqueue(run)
+
+        self._async_persist()
+
+        if overdue:
+            _LOGGER.warning("Закрытие клапанов, время полива которых истекло: %s", overdue)
+            if failed := await self._async_call("turn_off", overdue):
+                self.valves.async_escalate("turn_off", failed)
+
+        self._async_start_dispatch()
+
+    @callback
+    def _async_persist(self) -> None:
+        """Запись текущего состояния в журнал.
+
+        Открываемые зоны записываются как ожидающие: после перезапуска
+        они снова встанут в очередь.
+        """
+        self.journal.async_update(
+            {zone_id: run.as_dict() for zone_id, run in self._active.items()},
+            [
+                run.as_dict()
+                for run in (*self._starting.values(), *self._queue, *self._soaking.values())
+            ],
+        )
+
+    def _enqueue(self, run: ZoneRun) -> None:
+        """Постановка заявки в очередь с сохранением порядка поступления."""
+        run.ready_at = None
+        run.order = next(self._counter)
+        heapq.heappush(self._queue, run)
+
+    def _start_soak(self, run: ZoneRun, delay: float) -> None:
+        """Пауза пропитки между импульсами без занятия слота."""
+        run.ready_at = dt_util.utcnow() + timedelta(seconds=delay)
+        self._soaking[run.zone_id] = run
+        self._soak_timers[run.zone_id] = self.hass.loop.call_later(
+            delay, self._soak_finished, run.zone_id
+        )
+
+    @callback
+    def _soak_finished(self, zone_id: str) -> None:
+        """Окончание пропитки: зона возвращается в очередь."""
+        self._soak_timers.pop(zone_id, None)
+        run = self._soaking.pop(zone_id, None)
+        if run is None:
+            return
+
+        self._enqueue(run)
+        self._async_persist()
+        self._async_start_dispatch()
+
+    def _arm(self, run: ZoneRun, delay: float) -> None:
+        """Регистрация открытой зоны и таймера ее выключения."""
+        self._active[run.zone_id] = run
+        self.arbiter.async_claim(self.owner, run.zone_id, run.flow_rate)
+        self._timers[run.zone_id] = self.hass.loop.call_later(
+            delay, self._zone_finished, run.zone_id
+        )
+
+    def _fits(self, run: ZoneRun, flow_in_use: float, active_count: int) -> bool:
+        """Проверка, хватает ли слотов и расхода для запуска зоны."""
+        if active_count >= self.max_concurrent:
+            return False
+
+        # Зона с расходом больше лимита запускается одна, иначе она не запустится никогда
+        if self.flow_capacity and active_count and flow_in_use + run.flow_rate > self.flow_capacity:
+            return False
+
+        return True
+
+    @callback
+    def _async_start_dispatch(self) -> None:
+        """Запуск зон из очереди фоновой задачей."""
+        task = self.hass.async_create_background_task(
+            self._async_dispatch(), f"lawn_irrigation dispatch {self.owner}"
+        )
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _async_dispatch(self) -> None:
+        """Запуск зон из очереди в пределах лимитов одним вызовом службы."""
+        flow_in_use = self.flow_in_use
+        active_count = len(self._active) + len(self._starting)
+        pending_flow = 0.0
+        started = []
+        deferred = []
+
+        while self._queue and active_count < self.max_concurrent:
+            run = heapq.heappop(self._queue)
+            if self._fits(run, flow_in_use, active_count) and self.arbiter.fits(
+                run.flow_rate, pending_flow
+            ):
+                started.append(run)
+                flow_in_use += run.flow_rate
+                pending_flow += run.flow_rate
+                active_count += 1
+            else:
+                deferred.append(run)
+
+        for run in deferred:
+            heapq.heappush(self._queue, run)
+
+        if not started:
+            return
+
+        for run in started:
+            if not run.watered:
+                # Влажность до полива для обучения времени полива зоны
+                self.learner.async_run_started(run.zone_id)
+            # Слот и расход заняты на время ожидания подтверждения
+            self._starting[run.zone_id] = run
+            self.arbiter.async_claim(self.owner, run.zone_id, run.flow_rate)
+
+        self._async_persist()
+
+        failed = await self._async_call(
+            "turn_on", [run.zone_id for run in started], self._zone_opened
+        )
+        # Зоны, снятые остановкой полива за время ожидания, не обрабатываются
+        failed = [zone_id for zone_id in failed if self._starting.pop(zone_id, None) is not None]
+        if failed:
+            await self._async_open_failed(failed)
+
+    @callback
+    def _zone_opened(self, zone_id: str) -> None:
+        """Отсчет времени полива зоны с момента подтверждения открытия.
+
+        Повторы и паузы между ними не сокращают время полива, а журнал и
+        атрибуты показывают фактическое время окончания.
+        """
+        run = self._starting.pop(zone_id, None)
+        if run is None:
+            return
+
+        pulse = run.next_pulse()
+        run.started_at = dt_util.utcnow()
+        run.ends_at = run.started_at + timedelta(minutes=pulse)
+        self._arm(run, pulse * 60)
+        self._async_persist()
+        _LOGGER.info("Запущен полив зоны %s на %s минут", zone_id, round(pulse, 1))
+
+    async def _async_call(
+        self,
+        service: str,
+        zone_ids: list[str],
+        on_confirm: Callable[[str], None] | None = None,
+    ) -> list[str]:
+        """Команда группе зон с подтверждением, возвращает не выполнившие ее зоны."""
+        return await self.valves.async_command(service, zone_ids, on_confirm)
+
+    async def _async_open_failed(self, zone_ids: list[str]) -> None:
+        """Снятие с полива зон, клапаны которых не подтвердили открытие.
+
+        Заявка не возвращается в очередь, чтобы неисправный клапан не
+        занимал слоты; на случай позднего открытия клапан закрывается.
+        Недоступный клапан обычно не выполняет и закрытие: аварийная
+        остановка записи нужна, только если клапан все же открыт, иначе
+        зона лишь снимается с полива с сообщением о сбое.
+        """
+        _LOGGER.warning("Клапаны не открылись, полив зон отменен: %s", zone_ids)
+        for zone_id in zone_ids:
+            self.learner.async_run_cancelled(zone_id)
+        self.arbiter.async_release(self.owner, zone_ids)
+        self._async_persist()
+        self.valves.async_escalate("turn_on", zone_ids)
+
+        if failed := await self._async_call("turn_off", zone_ids):
+            if stuck_open := [
+                zone_id for zone_id in failed
+                if (state := self.hass.states.get(zone_id)) is not None and state.state == STATE_ON
+            ]:
+                await self._async_shutoff(stuck_open)
+                return
+            _LOGGER.warning("Клапаны не ответили на закрытие и не открыты: %s", failed)
+
+        await self._async_dispatch()
+
+    async def _async_shutoff(self, failed: list[str]) -> None:
+        """Аварийная остановка записи, если клапан не закрылся.
+
+        Очередь и пропитка отменяются, остальные открытые зоны
+        закрываются, чтобы при неисправном клапане не перегружать
+        насос и водовод. О сбое сообщают событие и уведомление.
+        """
+        self.valves.async_escalate("turn_off", failed)
+        others = [zone_id for zone_id in self._active if zone_id not in failed]
+
+        self.async_cancel()
+        self._async_persist()
+
+        if others and (still_open := await self._async_call("turn_off", others)):
+            self.valves.async_escalate("turn_off", still_open)
+
+    @callback
+    def _zone_finished(self, zone_id: str) -> None:
+        """Окончание полива зоны по таймеру.
+
+        Зоны, завершившиеся в одной итерации цикла событий, выключаются
+        одним вызовом службы.
+        """
+        self._timers.pop(zone_id, None)
+        self._finished.add(zone_id)
+
+        if self._flush_handle is None:
+            self._flush_handle = self.hass.loop.call_soon(self._flush_finished)
+
+    @callback
+    def _flush_finished(self) -> None:
+        """Выключение завершившихся зон и запуск следующих."""
+        self._flush_handle = None
+        finished = []
+
+        for zone_id in self._finished:
+            run = self._active.pop(zone_id, None)
+            if run is None:
+                continue
+            finished.append(zone_id)
+            run.complete_pulse()
+            if run.remaining >= MIN_PULSE:
+                self._start_soak(run, run.soak * 60)
+            else:
+                self.learner.async_run_finished(zone_id, run.watered)
+        self._finished.clear()
+
+        if finished:
+            self._async_persist()
+            self.hass.async_create_task(self._async_finish(finished))
+
+    async def _async_finish(self, zone_ids: list[str]) -> None:
+        """Выключение зон и освобождение слотов."""
+        if failed := await self._async_call("turn_off", zone_ids):
+            await self._async_shutoff(failed)
+            return
+
+        self.arbiter.async_release(self.owner, zone_ids)
+        for zone_id in zone_ids:
+            if zone_id in self._soaking:
+                _LOGGER.info("Импульс полива зоны %s завершен, пропитка", zone_id)
+            else:
+                _LOGGER.info("Полив зоны %s завершен", zone_id)
+
+        await self._async_dispatch()
+
+    async def async_stop_all(self, zone_ids: Iterable[str]) -> None:
+        """Остановка всего полива одним вызовом службы с подтверждением."""
+        self.async_cancel()
+        self._async_persist()
+
+        zone_ids = list(zone_ids)
+        if zone_ids and (failed := await self._async_call("turn_off", zone_ids)):
+            self.valves.async_escalate("turn_off", failed)
+
+    async def async_resume(self) -> None:
+        """Запуск ожидающих зон после освобождения общего расхода."""
+        await self._async_dispatch()
+
+    async def async_update_limits(self, max_concurrent: int, flow_capacity: float) -> None:
+        """Смена лимитов на ходу без прерывания открытых зон.
+
+        Уменьшенный лимит применяется к следующим запускам, увеличенный
+        сразу запускает ожидающие зоны.
+        """
+        self.max_concurrent = max_concurrent
+        self.flow_capacity = flow_capacity
+        self._async_start_dispatch()
+
+    @callback
+    def async_cancel(self) -> None:
+        """Отмена таймеров и очистка очереди без выключения клапанов.
+
+        Журнал не изменяется, поэтому после перезагрузки записи полив
+        будет восстановлен.
+        """
+        for handle in (*self._timers.values(), *self._soak_timers.values()):
+            handle.cancel()
+        self._timers.clear()
+        self._soak_timers.clear()
+
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        # Текущая задача сама вызывает отмену при аварийной остановке
+        current = asyncio.current_task()
+        for task in self._dispatch_tasks:
+            if task is not current:
+                task.cancel()
+
+        self._queue.clear()
+        self._active.clear()
+        self._starting.clear()
+        self.learner.async_run_cancelled()
+        self.arbiter.async_release(self.owner)
+        self._soaking.clear()
+        self._finished.clear()
@@ -1,125 +1,465 @@
-“”“Датчики для мониторинга полива.”””
+"""Датчики для мониторинга полива."""
 import logging
 from datetime import datetime, timedelta
-from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
+from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.const import PERCENTAGE, UnitOfTime
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfTime, UnitOfVolume
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, CONF_ZONES, CONF_MOISTURE_THRESHOLD
+from .const import DOMAIN, CONF_ZONES, ZONE_TYPES, SCHEDULE_KEY
+from .entity import LawnIrrigationEntity
+from .metrics import STAGES, ENTITY_WRITES
+
+_LOGGER = logging.getLogger(__name__)
+
+METRICS_INTERVAL = timedelta(seconds=30)  # период записи диагностических датчиков
+ETA_RESOLUTION = timedelta(minutes=15)  # шаг времени следующего полива по прогнозу
 
-_LOGGER = logging.getLogger(**name**)
 
 async def async_setup_entry(
-hass: HomeAssistant,
-config_entry: ConfigEntry,
-async_add_entities: AddEntitiesCallback,
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
 ) -> None:
-“”“Настройка датчиков.”””
-coordinator = hass.data[DOMAIN][config_entry.entry_id]
-
-```
-entities = []
-
-# Датчик общего статуса системы
-entities.append(IrrigationSystemStatusSensor(coordinator, config_entry))
-
-# Датчики влажности для каждой зоны
-for zone_id in coordinator.zones:
-    entities.append(ZoneMoistureSensor(coordinator, config_entry, zone_id))
-
-# Датчик следующего полива
-entities.append(NextWateringTimeSensor(coordinator, config_entry))
-
-# Датчик общей влажности
-entities.append(AverageMoistureSensor(coordinator, config_entry))
-
-async_add_entities(entities)
-```
-
-class IrrigationSystemStatusSensor(CoordinatorEntity, SensorEntity):
-“”“Датчик общего статуса системы полива.”””
-
-```
-def __init__(self, coordinator, config_entry):
-    """Инициализация датчика."""
-    super().__init__(coordinator)
-    self.config_entry = config_entry
-    self._attr_name = "Статус системы полива"
-    self._attr_unique_id = f"{config_entry.entry_id}_system_status"
-    self._attr_icon = "mdi:information"
-    
-@property
-def native_value(self) -> str:
-    """Возвращает текущий статус системы."""
-    zones_data = self.coordinator.data.get("zones", {})
-    active_zones = [zone_id for zone_id, zone_data in zones_data.items() 
-                   if zone_data.get("state") == "on"]
-    
-    if active_zones:
-        return f"Активно (зон: {len(active_zones)})"
-    else:
-        return "Готов к работе"
-
-@property
-def extra_state_attributes(self):
-    """Дополнительные атрибуты."""
-    zones_data = self.coordinator.data.get("zones", {})
-    weather_data = self.coordinator.data.get("weather_conditions", {})
-    moisture_data = self.coordinator.data.get("moisture_levels", {})
-    
-    active_zones = [zone_id for zone_id, zone_data in zones_data.items() 
-                   if zone_data.get("state") == "on"]
-    
-    # Подсчет зон, нуждающихся в поливе
-    moisture_threshold = self.config_entry.data.get(CONF_MOISTURE_THRESHOLD, 30)
-    zones_need_watering = []
-    
-    for zone_id in self.coordinator.zones:
-        moisture_level = self._get_zone_moisture_level(zone_id)
-        if moisture_level is not None and moisture_level < moisture_threshold:
-            zones_need_watering.append(zone_id)
-    
-    return {
-        "total_zones": len(self.coordinator.zones),
-        "active_zones": len(active_zones),
-        "active_zone_list": active_zones,
-        "zones_need_watering": len(zones_need_watering),
-        "zones_need_watering_list": zones_need_watering,
-        "weather_condition": weather_data.get("condition", "unknown"),
-        "temperature": weather_data.get("temperature"),
-        "humidity": weather_data.get("humidity"),
-        "precipitation": weather_data.get("precipitation", 0),
-        "last_update": datetime.now().isoformat(),
-    }
-
-def _get_zone_moisture_level(self, zone_id: str) -> float | None:
-    """Получение уровня влажности для зоны."""
-    moisture_data = self.coordinator.data.get("moisture_levels", {})
-    
-    # Поиск датчика влажности для конкретной зоны
-    for sensor_id, sensor_data in moisture_data.items():
-        if zone_id in sensor_id or any(keyword in sensor_id.lower() for keyword in 
-                                     zone_id.lower().split("_")):
-            return sensor_data.get("level", 0)
-    
-    # Если не найден специфический датчик, используем первый доступный
-    if moisture_data:
-        return next(iter(moisture_data.values())).get("level", 0)
-    
-    return None
-```
-
-class ZoneMoistureSensor(CoordinatorEntity, SensorEntity):
-“”“Датчик влажности почвы для зоны.”””
-
-```
-def __init__(self, coordinator, config_entry, zone_id):
-    """Инициализация датчика влажности."""
-    super().__init__(coordinator)
-    self.config_entry = config_entry
-    self.zone_id = zone_id
-    self._attr_name = f"Влажность {self._get_zone_name(zone
-```
\ No newline at end of file
+    """Настройка датчиков."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    entities = []
+
+    # Датчик общего статуса системы
+    entities.append(IrrigationSystemStatusSensor(coordinator, config_entry))
+
+    # Датчики влажности, расхода воды и времени полива для каждой зоны
+    for zone_id in coordinator.zones:
+        entities.append(ZoneMoistureSensor(coordinator, config_entry, zone_id))
+        entities.append(ZoneWaterVolumeSensor(coordinator, config_entry, zone_id))
+        entities.append(ZoneRunTimeSensor(coordinator, config_entry, zone_id))
+
+    # Датчик следующего полива
+    entities.append(NextWateringTimeSensor(coordinator, config_entry))
+
+    # Датчик общей влажности
+    entities.append(AverageMoistureSensor(coordinator, config_entry))
+
+    # Общие счетчики воды и времени полива
+    entities.append(TotalWaterVolumeSensor(coordinator, config_entry))
+    entities.append(TotalRunTimeSensor(coordinator, config_entry))
+
+    # Диагностические датчики метрик недоступны, пока сбор выключен
+    for stage in STAGES:
+        entities.append(StageDurationSensor(coordinator, config_entry, stage))
+    entities.append(EntityWritesSensor(coordinator, config_entry))
+
+    async_add_entities(entities)
+
+
+class IrrigationSystemStatusSensor(LawnIrrigationEntity, SensorEntity):
+    """Датчик общего статуса системы полива."""
+
+    def __init__(self, coordinator, config_entry):
+        """Инициализация датчика."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        self._attr_name = "Статус системы полива"
+        self._attr_unique_id = f"{config_entry.entry_id}_system_status"
+        self._attr_icon = "mdi:information"
+
+    @property
+    def native_value(self) -> str:
+        """Возвращает текущий статус системы."""
+        active_zones = self.coordinator.active_zones
+
+        if active_zones:
+            return f"Активно (зон: {len(active_zones)})"
+        else:
+            return "Готов к работе"
+
+    @property
+    def extra_state_attributes(self):
+        """Дополнительные атрибуты."""
+        weather_data = self.coordinator.data.get("weather_conditions", {})
+
+        # Производные данные вычисляются координатором один раз на обновление
+        active_zones = self.coordinator.active_zones
+        zones_need_watering = self.coordinator.zones_need_watering
+
+        return {
+            "total_zones": len(self.coordinator.zones),
+            "active_zones": len(active_zones),
+            "active_zone_list": active_zones,
+            "zones_need_watering": len(zones_need_watering),
+            "zones_need_watering_list": zones_need_watering,
+            "unmatched_zones": self.coordinator.unmatched_zones,
+            "weather_condition": weather_data.get("condition", "unknown"),
+            "temperature": weather_data.get("temperature"),
+            "humidity": weather_data.get("humidity"),
+            "precipitation": weather_data.get("precipitation", 0),
+            "forecast_rain": self.coordinator.forecast_rain,
+        }
+
+
+class ZoneMoistureSensor(LawnIrrigationEntity, SensorEntity):
+    """Датчик влажности почвы для зоны."""
+
+    _zone_name_format = "Влажность {}"
+
+    def __init__(self, coordinator, config_entry, zone_id):
+        """Инициализация датчика влажности."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        self.zone_id = zone_id
+        self._attr_unique_id = f"{config_entry.entry_id}_moisture_{zone_id.replace('.', '_')}"
+        self._attr_icon = "mdi:water-percent"
+        self._attr_device_class = SensorDeviceClass.MOISTURE
+        self._attr_native_unit_of_measurement = PERCENTAGE
+
+    def _dependency_keys(self):
+        """Датчик зоны зависит только от своего датчика влажности."""
+        sensor_id = self.coordinator.zone_sensors.get(self.zone_id)
+        return (sensor_id,) if sensor_id else ()
+
+    @property
+    def native_value(self) -> float | None:
+        """Возвращает уровень влажности зоны."""
+        sensor_data = self.coordinator.get_zone_moisture(self.zone_id)
+        if sensor_data is None:
+            return None
+        return sensor_data.get("level")
+
+    @property
+    def extra_state_attributes(self):
+        """Дополнительные атрибуты."""
+        sensor_data = self.coordinator.get_zone_moisture(self.zone_id) or {}
+
+        config = self.coordinator.zone_configs[self.zone_id]
+
+        return {
+            "zone_id": self.zone_id,
+            "zone_type": ZONE_TYPES.get(config.zone_type, config.zone_type),
+            "moisture_threshold": config.moisture_threshold,
+            "moisture_sensor": self.coordinator.zone_sensors.get(self.zone_id),
+            "smoothed": sensor_data.get("smoothed"),
+            "mean": sensor_data.get("mean"),
+            "min": sensor_data.get("min"),
+            "trend": sensor_data.get("slope"),
+        }
+
+
+class NextWateringTimeSensor(LawnIrrigationEntity, SensorEntity):
+    """Датчик времени следующего полива."""
+
+    def __init__(self, coordinator, config_entry):
+        """Инициализация датчика."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        self._attr_name = "Следующий полив"
+        self._attr_unique_id = f"{config_entry.entry_id}_next_watering"
+        self._attr_icon = "mdi:clock-outline"
+        self._attr_device_class = SensorDeviceClass.TIMESTAMP
+        self._next = (None, None)
+        self._eta: datetime | None = None
+
+    def _dependency_keys(self):
+        """Датчик зависит от всех сущностей и от расписания окна полива."""
+        return (*super()._dependency_keys(), SCHEDULE_KEY)
+
+    async def async_added_to_hass(self) -> None:
+        """Начальный прогноз без ожидания изменений."""
+        await super().async_added_to_hass()
+        self._update_forecast()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Прогноз пересчитывается один раз на обновление данных."""
+        self._update_forecast()
+        super()._handle_coordinator_update()
+
+    @property
+    def native_value(self) -> datetime | None:
+        """Возвращает время следующего полива.
+
+        При поливе по окну — начало полива по расписанию, иначе время,
+        когда первая зона опустится ниже порога влажности.
+        """
+        schedule = self.coordinator.watering_schedule
+        if schedule.start is not None:
+            return schedule.start
+        return self._eta
+
+    @property
+    def extra_state_attributes(self):
+        """Дополнительные атрибуты."""
+        zone_id, forecast = self._next
+        schedule = self.coordinator.watering_schedule
+
+        return {
+            "zone_id": zone_id,
+            "watering_duration": forecast.run_minutes if forecast else None,
+            "et0": round(self.coordinator.reference_et0(), 2),
+            **schedule.as_dict(),
+            "schedule": [
+                {
+                    "zone_id": run.zone_id,
+                    "start": run.start.isoformat(),
+                    "end": run.end.isoformat(),
+                }
+                for run in schedule.runs
+            ],
+        }
+
+    def _next_zone(self):
+        """Зона, которая раньше всех опустится ниже порога влажности."""
+        next_zone = (None, None)
+
+        for zone_id, forecast in self.coordinator.watering_forecast().items():
+            if forecast.hours_to_threshold is None:
+                continue
+            if next_zone[1] is None or forecast.hours_to_threshold < next_zone[1].hours_to_threshold:
+                next_zone = (zone_id, forecast)
+
+        return next_zone
+
+    def _update_forecast(self) -> None:
+        """Ближайшая зона и время пересечения ею порога.
+
+        Время округляется до ETA_RESOLUTION и сохраняется, пока новый
+        прогноз отличается от него меньше чем на этот шаг: ход времени и
+        шум датчика не меняют состояние на каждом событии.
+        """
+        self._next = zone_id, forecast = self._next_zone()
+        if zone_id is None:
+            self._eta = None
+            return
+
+        eta = dt_util.utcnow() + timedelta(hours=forecast.hours_to_threshold)
+        if self._eta is not None and abs(eta - self._eta) < ETA_RESOLUTION:
+            return
+        step = ETA_RESOLUTION.total_seconds()
+        self._eta = dt_util.utc_from_timestamp(round(eta.timestamp() / step) * step)
+
+
+class AverageMoistureSensor(LawnIrrigationEntity, SensorEntity):
+    """Датчик средней влажности почвы по всем зонам."""
+
+    def __init__(self, coordinator, config_entry):
+        """Инициализация датчика."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        self._attr_name = "Средняя влажность почвы"
+        self._attr_unique_id = f"{config_entry.entry_id}_average_moisture"
+        self._attr_icon = "mdi:water-percent"
+        self._attr_device_class = SensorDeviceClass.MOISTURE
+        self._attr_native_unit_of_measurement = PERCENTAGE
+
+    def _dependency_keys(self):
+        """Средняя влажность зависит от всех датчиков влажности."""
+        return self.coordinator.moisture_sensors
+
+    @property
+    def native_value(self) -> float | None:
+        """Возвращает среднюю влажность почвы по сглаженным значениям."""
+        return self.coordinator.average_moisture
+
+
+class ZoneWaterVolumeSensor(LawnIrrigationEntity, SensorEntity):
+    """Счетчик расхода воды зоны.
+
+    Значение растет только при закрытии клапана, поэтому статистика
+    строится регистратором как для total_increasing счетчика.
+    """
+
+    _zone_name_format = "Расход воды {}"
+
+    def __init__(self, coordinator, config_entry, zone_id):
+        """Инициализация счетчика."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        self.zone_id = zone_id
+        self._attr_unique_id = f"{config_entry.entry_id}_water_{zone_id.replace('.', '_')}"
+        self._attr_icon = "mdi:water"
+        self._attr_device_class = SensorDeviceClass.WATER
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        self._attr_native_unit_of_measurement = UnitOfVolume.LITERS
+
+    def _dependency_keys(self):
+        """Счетчик зависит только от состояния своей зоны."""
+        return (self.zone_id,)
+
+    @property
+    def native_value(self) -> float:
+        """Возвращает расход воды зоны, л."""
+        return self.coordinator.water_usage.zones.get(self.zone_id, {}).get("volume", 0.0)
+
+
+class ZoneRunTimeSensor(LawnIrrigationEntity, SensorEntity):
+    """Счетчик времени полива зоны."""
+
+    _zone_name_format = "Время полива {}"
+
+    def __init__(self, coordinator, config_entry, zone_id):
+        """Инициализация счетчика."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        self.zone_id = zone_id
+        self._attr_unique_id = f"{config_entry.entry_id}_run_time_{zone_id.replace('.', '_')}"
+        self._attr_icon = "mdi:timer-outline"
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        self._attr_native_unit_of_measurement = UnitOfTime.MINUTES
+
+    def _dependency_keys(self):
+        """Счетчик зависит только от состояния своей зоны."""
+        return (self.zone_id,)
+
+    @property
+    def native_value(self) -> float:
+        """Возвращает время полива зоны, минут."""
+        return self.coordinator.water_usage.zones.get(self.zone_id, {}).get("run_time", 0.0)
+
+    @property
+    def extra_state_attributes(self):
+        """Дополнительные атрибуты."""
+        usage = self.coordinator.water_usage.zones.get(self.zone_id, {})
+
+        return {
+            "last_watered": usage.get("last_watered"),
+            "last_duration": usage.get("last_duration"),
+        }
+
+
+class TotalWaterVolumeSensor(LawnIrrigationEntity, SensorEntity):
+    """Счетчик общего расхода воды."""
+
+    def __init__(self, coordinator, config_entry):
+        """Инициализация счетчика."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        self._attr_name = "Расход воды на полив"
+        self._attr_unique_id = f"{config_entry.entry_id}_total_water"
+        self._attr_icon = "mdi:water"
+        self._attr_device_class = SensorDeviceClass.WATER
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        self._attr_native_unit_of_measurement = UnitOfVolume.LITERS
+
+    def _dependency_keys(self):
+        """Общий счетчик зависит от состояния всех зон."""
+        return self.coordinator.zones
+
+    @property
+    def native_value(self) -> float:
+        """Возвращает общий расход воды, л."""
+        return self.coordinator.water_usage.total_volume
+
+
+class TotalRunTimeSensor(LawnIrrigationEntity, SensorEntity):
+    """Счетчик общего времени полива."""
+
+    def __init__(self, coordinator, config_entry):
+        """Инициализация счетчика."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        self._attr_name = "Время полива всех зон"
+        self._attr_unique_id = f"{config_entry.entry_id}_total_run_time"
+        self._attr_icon = "mdi:timer-outline"
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        self._attr_native_unit_of_measurement = UnitOfTime.MINUTES
+
+    def _dependency_keys(self):
+        """Общий счетчик зависит от состояния всех зон."""
+        return self.coordinator.zones
+
+    @property
+    def native_value(self) -> float:
+        """Возвращает общее время полива, минут."""
+        return self.coordinator.water_usage.total_run_time
+
+
+class MetricsSensor(LawnIrrigationEntity, SensorEntity):
+    """Диагностический датчик метрик.
+
+    Метрики меняются при каждом обновлении, поэтому датчик не подписан
+    на изменения зон, а записывает значение по таймеру раз в
+    METRICS_INTERVAL. Опрос платформы координаторным сущностям отключен.
+    Датчики создаются всегда и доступны, только пока сбор метрик включен:
+    смена настройки на ходу не требует перезагрузки платформы.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def _dependency_keys(self):
+        """Датчик не зависит от отслеживаемых сущностей."""
+        return ()
+
+    @property
+    def available(self) -> bool:
+        """Датчик доступен, пока включен сбор метрик."""
+        return super().available and self.coordinator.metrics.enabled
+
+    async def async_added_to_hass(self) -> None:
+        """Запуск таймера записи значения."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_interval(self.hass, self._async_write_metrics, METRICS_INTERVAL)
+        )
+
+    @callback
+    def _async_write_metrics(self, _now: datetime) -> None:
+        """Запись текущего значения метрик.
+
+        При выключенном сборе недоступность записана при смене настроек.
+        """
+        if self.coordinator.metrics.enabled:
+            self.async_write_ha_state()
+
+
+class StageDurationSensor(MetricsSensor):
+    """Средняя длительность этапа работы интеграции."""
+
+    def __init__(self, coordinator, config_entry, stage):
+        """Инициализация датчика."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        self.stage = stage
+        self._attr_name = f"Длительность этапа {stage}"
+        self._attr_unique_id = f"{config_entry.entry_id}_metrics_{stage}"
+        self._attr_icon = "mdi:timer-sand"
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+
+    @property
+    def native_value(self) -> float | None:
+        """Возвращает среднюю длительность этапа, мс."""
+        mean = self.coordinator.metrics.stages[self.stage].mean
+        return round(mean, 2) if mean is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        """Гистограмма длительностей."""
+        return self.coordinator.metrics.stages[self.stage].as_dict()
+
+
+class EntityWritesSensor(MetricsSensor):
+    """Число записей состояний сущностей интеграции."""
+
+    def __init__(self, coordinator, config_entry):
+        """Инициализация датчика."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        self._attr_name = "Записи состояний сущностей"
+        self._attr_unique_id = f"{config_entry.entry_id}_metrics_{ENTITY_WRITES}"
+        self._attr_icon = "mdi:counter"
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def native_value(self) -> int:
+        """Возвращает общее число записей состояний."""
+        return self.coordinator.metrics.counters[ENTITY_WRITES]
+
+    @property
+    def extra_state_attributes(self):
+        """Распределение числа записей за одно обновление."""
+        return self.coordinator.metrics.writes.as_dict()
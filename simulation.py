@@ -0,0 +1,426 @@
+"""Офлайн-симуляция интеграции для замеров производительности и качества полива.
+
+Запуск из каталога с custom_components:
+
+    python -m custom_components.lawn_irrigation.simulation --zones 300 --days 3
+
+Нужен установленный пакет homeassistant. Координатор, главный
+переключатель и датчики интеграции работают на отдельном экземпляре
+HomeAssistant без сети и без настоящих устройств: клапаны, датчики
+влажности и погода синтетические, время ускорено. Отчет содержит время
+обновлений, число записей состояний, вызовы служб и расход воды, чтобы
+сравнивать прогоны между версиями.
+"""
+import argparse
+import asyncio
+import importlib
+import inspect
+import json
+import logging
+import math
+import random
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from homeassistant.const import EVENT_STATE_CHANGED, STATE_OFF, STATE_ON
+from homeassistant.core import CoreState, Event, HomeAssistant, ServiceCall, SupportsResponse, callback
+from homeassistant.helpers.entity_platform import EntityPlatform
+from homeassistant.util import dt as dt_util
+
+from . import LawnIrrigationDataUpdateCoordinator
+from .const import (
+    DOMAIN,
+    CONF_ZONES,
+    CONF_MOISTURE_SENSORS,
+    CONF_ZONE_SENSORS,
+    CONF_MAX_CONCURRENT_ZONES,
+    CONF_FLOW_CAPACITY,
+    CONF_CYCLE_SOAK,
+    CONF_WEATHER_ENTITY,
+    CONF_METRICS,
+    DEFAULT_MOISTURE_THRESHOLD,
+)
+from .metrics import STAGE_REFRESH
+from .sensor import (
+    AverageMoistureSensor,
+    IrrigationSystemStatusSensor,
+    NextWateringTimeSensor,
+    ZoneMoistureSensor,
+)
+from .switch import LawnIrrigationMasterSwitch
+
+_LOGGER = logging.getLogger(__name__)
+
+WEATHER_ENTITY = "weather.simulation"
+ROOT_DEPTH = 150  # мм, как в профиле газона
+REGISTRIES = (
+    "label_registry",
+    "floor_registry",
+    "area_registry",
+    "device_registry",
+    "entity_registry",
+    "restore_state",  # главный переключатель восстанавливает состояние
+)
+
+
+@dataclass(slots=True)
+class SimulationConfig:
+    """Параметры прогона."""
+
+    zones: int = 200
+    days: float = 3.0
+    seed: int = 1
+    tick: int = 1  # минут модельного времени за шаг
+    probe_interval: int = 10  # минут между показаниями датчиков
+    watering_hour: int = 5  # час ежедневного запуска главного переключателя
+    max_concurrent: int = 4
+    flow_capacity: float = 0.0  # л/мин, 0 — без ограничения
+    cycle_soak: bool = False
+    start_moisture: tuple[float, float] = (22.0, 45.0)  # %
+    drying_rate: float = 0.25  # %/ч при 20 °C
+    rise_rate: float = 0.4  # %/мин при открытом клапане
+    probe_noise: float = 0.2  # %
+    rain: dict[int, float] = field(default_factory=lambda: {40: 6.0, 41: 4.0})  # час → мм
+
+
+@dataclass(slots=True)
+class SimulationReport:
+    """Итоги прогона."""
+
+    zones: int
+    simulated_hours: float
+    wall_time: float  # с
+    refreshes: int
+    refresh_ms_mean: float | None
+    refresh_ms_max: float
+    state_writes: int
+    service_calls: int
+    valve_operations: int
+    water_used: float  # л
+    run_time: float  # минут
+    dry_zone_hours: float  # зоно-часов ниже порога влажности
+    metrics: dict = field(default_factory=dict)
+
+
+class VirtualClock:
+    """Ускоренное время для цикла событий и dt_util.utcnow.
+
+    Часы цикла событий сдвигаются на модельное время, поэтому таймеры
+    планировщика и координатора срабатывают без реального ожидания.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, start: datetime):
+        """Инициализация часов."""
+        self._loop = loop
+        self._start = start
+        self._loop_time = loop.time
+        self._utcnow = dt_util.utcnow
+        self._base = loop.time()
+        self.offset = 0.0
+
+    def install(self) -> None:
+        """Подмена часов цикла событий и dt_util."""
+        self._loop.time = lambda: self._loop_time() + self.offset
+        dt_util.utcnow = lambda: self._start + timedelta(seconds=self._loop.time() - self._base)
+
+    def uninstall(self) -> None:
+        """Возврат настоящих часов."""
+        del self._loop.time
+        dt_util.utcnow = self._utcnow
+
+    def advance(self, seconds: float) -> None:
+        """Сдвиг модельного времени."""
+        self.offset += seconds
+
+
+class SimulatedGarden:
+    """Синтетические клапаны, датчики влажности и погода."""
+
+    def __init__(self, hass: HomeAssistant, config: SimulationConfig, start: datetime):
+        """Инициализация сада."""
+        self.hass = hass
+        self.config = config
+        self.start = start
+        self._rng = random.Random(config.seed)
+        self.zones = [f"switch.sim_zone_{index:03d}" for index in range(config.zones)]
+        self.sensors = [f"sensor.sim_moisture_{index:03d}" for index in range(config.zones)]
+        self.moisture = [self._rng.uniform(*config.start_moisture) for _ in self.zones]
+        self.entity_ids = frozenset((*self.zones, *self.sensors, WEATHER_ENTITY))
+        self._zone_index = {zone_id: index for index, zone_id in enumerate(self.zones)}
+        self._open: set[int] = set()
+        self._timestamp = "timestamp" in inspect.signature(hass.states.async_set).parameters
+        self.service_calls = 0
+        self.valve_operations = 0
+        self.dry_zone_minutes = 0.0
+
+    async def async_setup(self) -> None:
+        """Службы клапанов и прогноза и начальные состояния."""
+        self.hass.services.async_register("switch", "turn_on", self._async_switch)
+        self.hass.services.async_register("switch", "turn_off", self._async_switch)
+        self.hass.services.async_register(
+            "weather",
+            "get_forecasts",
+            self._async_forecast,
+            supports_response=SupportsResponse.ONLY,
+        )
+
+        for zone_id in self.zones:
+            self._set(zone_id, STATE_OFF)
+        self._publish_probes()
+        self._publish_weather(0)
+
+    def step(self, minute: int) -> None:
+        """Изменение влажности за один шаг модельного времени."""
+        config = self.config
+        hour = minute // 60
+        weather = self._weather(hour)
+        drying = config.drying_rate * max(weather["temperature"] + 5, 0) / 25 / 60 * config.tick
+        rain = config.rain.get(hour, 0.0) / 60 * config.tick / ROOT_DEPTH * 100
+
+        for index, level in enumerate(self.moisture):
+            level += rain - drying
+            if index in self._open:
+                level += config.rise_rate * config.tick
+            self.moisture[index] = min(max(level, 0.0), 60.0)
+            if level < DEFAULT_MOISTURE_THRESHOLD:
+                self.dry_zone_minutes += config.tick
+
+        if minute % config.probe_interval == 0:
+            self._publish_probes()
+        if minute % 60 == 0:
+            self._publish_weather(hour)
+
+    async def _async_switch(self, call: ServiceCall) -> None:
+        """Открытие и закрытие синтетических клапанов."""
+        self.service_calls += 1
+        entity_ids = call.data["entity_id"]
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+
+        is_on = call.service == "turn_on"
+        for entity_id in entity_ids:
+            index = self._zone_index.get(entity_id)
+            if index is None:
+                continue
+            self.valve_operations += 1
+            if is_on:
+                self._open.add(index)
+            else:
+                self._open.discard(index)
+            self._set(entity_id, STATE_ON if is_on else STATE_OFF)
+
+    async def _async_forecast(self, call: ServiceCall) -> dict:
+        """Почасовой прогноз по погодному сценарию."""
+        now = dt_util.utcnow()
+        hour = int((now - self.start).total_seconds() // 3600)
+        forecast = [
+            {
+                "datetime": (now + timedelta(hours=offset)).isoformat(),
+                "precipitation": self.config.rain.get(hour + offset, 0.0),
+                "temperature": self._weather(hour + offset)["temperature"],
+            }
+            for offset in range(24)
+        ]
+        return {WEATHER_ENTITY: {"forecast": forecast}}
+
+    def _weather(self, hour: int) -> dict:
+        """Суточный ход температуры и влажности воздуха."""
+        phase = math.sin((hour % 24 - 9) / 24 * 2 * math.pi)
+        return {
+            "temperature": round(19 + 7 * phase, 1),
+            "humidity": round(65 - 15 * phase),
+            "precipitation": self.config.rain.get(hour, 0.0),
+        }
+
+    def _publish_probes(self) -> None:
+        """Показания датчиков влажности с шумом."""
+        noise = self.config.probe_noise
+        for sensor_id, level in zip(self.sensors, self.moisture):
+            value = level + self._rng.uniform(-noise, noise)
+            self._set(sensor_id, f"{value:.1f}", {"unit_of_measurement": "%"})
+
+    def _publish_weather(self, hour: int) -> None:
+        """Текущая погода."""
+        weather = self._weather(hour)
+        self._set(
+            WEATHER_ENTITY,
+            "rainy" if weather["precipitation"] else "sunny",
+            {**weather, "temperature_unit": "°C"},
+        )
+
+    def _set(self, entity_id: str, state: str, attributes: dict | None = None) -> None:
+        """Запись состояния с модельным временем, если HA это поддерживает."""
+        if self._timestamp:
+            self.hass.states.async_set(
+                entity_id, state, attributes, timestamp=dt_util.utcnow().timestamp()
+            )
+        else:
+            self.hass.states.async_set(entity_id, state, attributes)
+
+
+async def _async_add_entities(hass: HomeAssistant, domain: str, entities: list) -> None:
+    """Добавление сущностей через платформу без загрузки записи конфигурации."""
+    platform = EntityPlatform(
+        hass=hass,
+        logger=_LOGGER,
+        domain=domain,
+        platform_name=DOMAIN,
+        platform=None,
+        scan_interval=timedelta(seconds=30),
+        entity_namespace=None,
+    )
+    await platform.async_add_entities(entities)
+
+
+async def async_run_simulation(config: SimulationConfig) -> SimulationReport:
+    """Прогон симуляции и сбор отчета."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        for name in REGISTRIES:
+            try:
+                module = importlib.import_module(f"homeassistant.helpers.{name}")
+            except ImportError:
+                continue
+            await module.async_load(hass)
+        hass.set_state(CoreState.running)
+
+        start = dt_util.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        clock = VirtualClock(hass.loop, start)
+        clock.install()
+
+        try:
+            return await _async_run(hass, config, clock, start)
+        finally:
+            clock.uninstall()
+            await hass.async_stop(force=True)
+
+
+async def _async_run(
+    hass: HomeAssistant,
+    config: SimulationConfig,
+    clock: VirtualClock,
+    start: datetime,
+) -> SimulationReport:
+    """Основной цикл симуляции."""
+    garden = SimulatedGarden(hass, config, start)
+    await garden.async_setup()
+
+    entry = SimpleNamespace(
+        entry_id="simulation",
+        data={
+            CONF_ZONES: garden.zones,
+            CONF_MOISTURE_SENSORS: garden.sensors,
+            CONF_ZONE_SENSORS: dict(zip(garden.zones, garden.sensors)),
+            CONF_MAX_CONCURRENT_ZONES: config.max_concurrent,
+            CONF_FLOW_CAPACITY: config.flow_capacity,
+            CONF_CYCLE_SOAK: config.cycle_soak,
+            CONF_WEATHER_ENTITY: WEATHER_ENTITY,
+        },
+        options={CONF_METRICS: True},
+    )
+
+    coordinator = LawnIrrigationDataUpdateCoordinator(hass, entry)
+    await coordinator.water_usage.async_load()
+    await coordinator.async_refresh()
+    coordinator.async_start_push()
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+
+    master = LawnIrrigationMasterSwitch(coordinator, entry)
+    sensors = [
+        IrrigationSystemStatusSensor(coordinator, entry),
+        NextWateringTimeSensor(coordinator, entry),
+        AverageMoistureSensor(coordinator, entry),
+        *(ZoneMoistureSensor(coordinator, entry, zone_id) for zone_id in garden.zones),
+    ]
+    await _async_add_entities(hass, "switch", [master])
+    await _async_add_entities(hass, "sensor", sensors)
+
+    state_writes = 0
+
+    @callback
+    def count_write(event: Event) -> None:
+        nonlocal state_writes
+        if event.data["entity_id"] not in garden.entity_ids:
+            state_writes += 1
+
+    unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, count_write)
+    await hass.async_block_till_done()
+
+    wall_start = time.perf_counter()
+    total_minutes = int(config.days * 24 * 60)
+
+    for minute in range(0, total_minutes, config.tick):
+        if minute % (24 * 60) == config.watering_hour * 60:
+            await master.async_turn_on()
+        garden.step(minute)
+        # Таймеры, наступившие за шаг, срабатывают в следующей итерации цикла
+        clock.advance(config.tick * 60)
+        await hass.async_block_till_done()
+
+    await master.async_turn_off()
+    await hass.async_block_till_done()
+    wall_time = time.perf_counter() - wall_start
+
+    unsub()
+    coordinator.async_stop_push()
+    coordinator.scheduler.async_cancel()
+
+    refresh = coordinator.metrics.stages[STAGE_REFRESH]
+    return SimulationReport(
+        zones=config.zones,
+        simulated_hours=round(total_minutes / 60, 1),
+        wall_time=round(wall_time, 3),
+        refreshes=refresh.count,
+        refresh_ms_mean=round(refresh.mean, 3) if refresh.count else None,
+        refresh_ms_max=round(refresh.maximum, 3),
+        state_writes=state_writes,
+        service_calls=garden.service_calls,
+        valve_operations=garden.valve_operations,
+        water_used=coordinator.water_usage.total_volume,
+        run_time=coordinator.water_usage.total_run_time,
+        dry_zone_hours=round(garden.dry_zone_minutes / 60, 1),
+        metrics=coordinator.metrics.as_dict(),
+    )
+
+
+def main() -> None:
+    """Запуск симуляции из командной строки."""
+    defaults = SimulationConfig()
+    parser = argparse.ArgumentParser(description="Офлайн-симуляция полива газона")
+    parser.add_argument("--zones", type=int, default=defaults.zones)
+    parser.add_argument("--days", type=float, default=defaults.days)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--max-concurrent", type=int, default=defaults.max_concurrent)
+    parser.add_argument("--flow-capacity", type=float, default=defaults.flow_capacity)
+    parser.add_argument("--cycle-soak", action="store_true")
+    parser.add_argument("--json", action="store_true", help="отчет в формате JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(
+        async_run_simulation(
+            SimulationConfig(
+                zones=args.zones,
+                days=args.days,
+                seed=args.seed,
+                max_concurrent=args.max_concurrent,
+                flow_capacity=args.flow_capacity,
+                cycle_soak=args.cycle_soak,
+            )
+        )
+    )
+
+    if args.json:
+        print(json.dumps(asdict(report), ensure_ascii=False, indent=2))
+        return
+
+    for key, value in asdict(report).items():
+        if key != "metrics":
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
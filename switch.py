@@ -1,247 +1,412 @@
-“”“Переключатели для управления поливом.”””
+"""Переключатели для управления поливом."""
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_ON
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.start import async_at_started
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, CONF_ZONES, CONF_WATERING_DURATION, CONF_MOISTURE_THRESHOLD, CONF_RAIN_THRESHOLD
+from .const import (
+    DOMAIN,
+    CONF_ZONES,
+    CONF_WATERING_DURATION,
+    CONF_MOISTURE_THRESHOLD,
+    CONF_CYCLE_SOAK,
+    CONF_WATERING_WINDOW,
+    CONF_WINDOW_START,
+    CONF_WINDOW_END,
+    CONF_FINISH_BY_SUNRISE,
+    DEFAULT_WATERING_DURATION,
+    DEFAULT_MOISTURE_THRESHOLD,
+    DEFAULT_CYCLE_SOAK,
+    DEFAULT_WATERING_WINDOW,
+    DEFAULT_WINDOW_START,
+    DEFAULT_WINDOW_END,
+    DEFAULT_FINISH_BY_SUNRISE,
+    DEFAULT_SOIL_TYPE,
+    SOIL_PROFILES,
+    SUN_ENTITY,
+)
+from .entity import LawnIrrigationEntity
+from .metrics import STAGE_DECIDE
+from .planner import SKIP_RAIN, PlannedRun, build_plan
+from .scheduler import ZoneRun
+from .windows import WateringSchedule, next_window, pack_runs
+
+_LOGGER = logging.getLogger(__name__)
 
-_LOGGER = logging.getLogger(**name**)
 
 async def async_setup_entry(
-hass: HomeAssistant,
-config_entry: ConfigEntry,
-async_add_entities: AddEntitiesCallback,
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
 ) -> None:
-“”“Настройка переключателей.”””
-coordinator = hass.data[DOMAIN][config_entry.entry_id]
-
-```
-entities = []
-
-# Создание главного переключателя системы
-entities.append(LawnIrrigationMasterSwitch(coordinator, config_entry))
-
-# Создание переключателей для каждой зоны
-for zone_id in coordinator.zones:
-    entities.append(LawnIrrigationZoneSwitch(coordinator, config_entry, zone_id))
-
-async_add_entities(entities)
-```
-
-class LawnIrrigationMasterSwitch(CoordinatorEntity, SwitchEntity):
-“”“Главный переключатель системы полива.”””
-
-```
-def __init__(self, coordinator, config_entry):
-    """Инициализация переключателя."""
-    super().__init__(coordinator)
-    self.config_entry = config_entry
-    self._attr_name = "Система полива газона"
-    self._attr_unique_id = f"{config_entry.entry_id}_master"
-    self._attr_icon = "mdi:sprinkler"
-    self._is_on = False
-    self._watering_tasks = {}
-    
-@property
-def is_on(self) -> bool:
-    """Возвращает состояние переключателя."""
-    return self._is_on
-
-@property
-def extra_state_attributes(self) -> dict[str, Any]:
-    """Дополнительные атрибуты состояния."""
-    zones_data = self.coordinator.data.get("zones", {})
-    active_zones = [zone_id for zone_id, zone_data in zones_data.items() 
-                   if zone_data.get("state") == "on"]
-    
-    return {
-        "total_zones": len(self.coordinator.zones),
-        "active_zones": len(active_zones),
-        "active_zone_list": active_zones,
-        "last_update": datetime.now().isoformat(),
-        "watering_duration": self.config_entry.data.get(CONF_WATERING_DURATION, 30),
-        "moisture_threshold": self.config_entry.data.get(CONF_MOISTURE_THRESHOLD, 30),
-    }
-
-async def async_turn_on(self, **kwargs: Any) -> None:
-    """Включение системы полива."""
-    self._is_on = True
-    await self._start_automatic_irrigation()
-    self.async_write_ha_state()
-
-async def async_turn_off(self, **kwargs: Any) -> None:
-    """Выключение системы полива."""
-    self._is_on = False
-    await self._stop_all_irrigation()
-    self.async_write_ha_state()
-
-async def _start_automatic_irrigation(self):
-    """Запуск автоматического полива."""
-    _LOGGER.info("Запуск автоматической системы полива")
-    
-    # Проверка погодных условий
-    weather_data = self.coordinator.data.get("weather_conditions", {})
-    rain_threshold = self.config_entry.data.get(CONF_RAIN_THRESHOLD, 5)
-    
-    if weather_data.get("precipitation", 0) > rain_threshold:
-        _LOGGER.info("Полив отменен из-за дождя (осадки: %s мм)", weather_data.get("precipitation", 0))
-        return
-    
-    # Проверка влажности почвы и запуск полива по зонам
-    moisture_threshold = self.config_entry.data.get(CONF_MOISTURE_THRESHOLD, 30)
-    
-    for zone_id in self.coordinator.zones:
-        # Поиск соответствующего датчика влажности
-        moisture_level = await self._get_zone_moisture_level(zone_id)
-        
-        if moisture_level is not None and moisture_level < moisture_threshold:
-            _LOGGER.info("Зона %s нуждается в поливе (влажность: %s%%)", zone_id, moisture_level)
-            await self._water_zone(zone_id)
+    """Настройка переключателей."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    entities = []
+
+    # Создание главного переключателя системы
+    entities.append(LawnIrrigationMasterSwitch(coordinator, config_entry))
+
+    # Создание переключателей для каждой зоны
+    for zone_id in coordinator.zones:
+        entities.append(LawnIrrigationZoneSwitch(coordinator, config_entry, zone_id))
+
+    async_add_entities(entities)
+
+
+class LawnIrrigationMasterSwitch(LawnIrrigationEntity, SwitchEntity, RestoreEntity):
+    """Главный переключатель системы полива.
+
+    Без окна полива включение сразу запускает полив нуждающихся зон.
+    С окном полива включение переводит систему в режим по расписанию:
+    каждую ночь зоны поливаются так, чтобы закончить к рассвету или к
+    концу окна, а расписание показывает датчик следующего полива.
+    Состояние переключателя и таймер окна переживают перезапуск HA.
+    """
+
+    def __init__(self, coordinator, config_entry):
+        """Инициализация переключателя."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        self._attr_name = "Система полива газона"
+        self._attr_unique_id = f"{config_entry.entry_id}_master"
+        self._attr_icon = "mdi:sprinkler"
+        self._is_on = False
+        self._window_settings = self._get_window_settings()
+        self._unsub_window = None
+
+    def _dependency_keys(self):
+        """Главный переключатель зависит только от состояния зон."""
+        return self.coordinator.zones
+
+    @property
+    def is_on(self) -> bool:
+        """Возвращает состояние переключателя."""
+        return self._is_on
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Дополнительные атрибуты состояния."""
+        active_zones = self.coordinator.active_zones
+
+        return {
+            "total_zones": len(self.coordinator.zones),
+            "active_zones": len(active_zones),
+            "active_zone_list": active_zones,
+            "queued_zones": len(self.coordinator.scheduler.pending_zones),
+            "soaking_zones": len(self.coordinator.scheduler.soaking_zones),
+            "watering_duration": self.coordinator.settings.get(
+                CONF_WATERING_DURATION, DEFAULT_WATERING_DURATION
+            ),
+            "moisture_threshold": self.coordinator.settings.get(
+                CONF_MOISTURE_THRESHOLD, DEFAULT_MOISTURE_THRESHOLD
+            ),
+            "watering_window": self._window_settings[0],
+        }
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Включение системы полива."""
+        self._is_on = True
+        if self._window_settings[0]:
+            await self._async_plan_window()
         else:
-            _LOGGER.debug("Зона %s не нуждается в поливе (влажность: %s%%)", zone_id, moisture_level)
-
-async def _get_zone_moisture_level(self, zone_id: str) -> float | None:
-    """Получение уровня влажности для зоны."""
-    moisture_data = self.coordinator.data.get("moisture_levels", {})
-    
-    # Поиск датчика влажности для конкретной зоны
-    for sensor_id, sensor_data in moisture_data.items():
-        if zone_id in sensor_id or any(keyword in sensor_id.lower() for keyword in 
-                                     zone_id.lower().split("_")):
-            return sensor_data.get("level", 0)
-    
-    # Если не найден специфический датчик, используем первый доступный
-    if moisture_data:
-        return next(iter(moisture_data.values())).get("level", 0)
-    
-    return None
-
-async def _water_zone(self, zone_id: str):
-    """Полив отдельной зоны."""
-    duration = self.config_entry.data.get(CONF_WATERING_DURATION, 30)
-    
-    # Включение переключателя зоны
-    await self.hass.services.async_call(
-        "switch", "turn_on", {"entity_id": zone_id}
-    )
-    
-    _LOGGER.info("Запущен полив зоны %s на %d минут", zone_id, duration)
-    
-    # Запланированное выключение
-    def turn_off_zone():
-        """Выключение зоны по таймеру."""
-        self.hass.async_create_task(
-            self.hass.services.async_call(
-                "switch", "turn_off", {"entity_id": zone_id}
+            await self._start_automatic_irrigation()
+        self.async_write_ha_state()
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        """Выключение системы полива."""
+        self._is_on = False
+        self._cancel_window()
+        await self._stop_all_irrigation()
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        """Восстановление состояния переключателя после перезапуска."""
+        await super().async_added_to_hass()
+        last_state = await self.async_get_last_state()
+        if last_state is None or last_state.state != STATE_ON:
+            return
+
+        # Без окна полива включение запускает полив однократно, повторять его не нужно
+        self._is_on = True
+        if self._window_settings[0]:
+            # Прогноз погоды и история датчиков доступны после запуска HA
+            self.async_on_remove(async_at_started(self.hass, self._async_restore_window))
+
+    async def _async_restore_window(self, _hass: HomeAssistant) -> None:
+        """Взвод таймера окна полива, если его не взвели за время запуска."""
+        if self._is_on and self._window_settings[0] and self._unsub_window is None:
+            await self._async_plan_window()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Отмена таймера окна полива при удалении сущности."""
+        await super().async_will_remove_from_hass()
+        self._cancel_window()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Пересчет расписания, если изменились настройки окна полива."""
+        window_settings = self._get_window_settings()
+        if window_settings != self._window_settings:
+            self._window_settings = window_settings
+            if self._is_on:
+                self._cancel_window()
+                if window_settings[0]:
+                    self.hass.async_create_task(self._async_plan_window())
+        super()._handle_coordinator_update()
+
+    def _get_window_settings(self) -> tuple:
+        """Настройки окна полива из настроек записи."""
+        settings = self.coordinator.settings
+        return (
+            settings.get(CONF_WATERING_WINDOW, DEFAULT_WATERING_WINDOW),
+            settings.get(CONF_WINDOW_START, DEFAULT_WINDOW_START),
+            settings.get(CONF_WINDOW_END, DEFAULT_WINDOW_END),
+            settings.get(CONF_FINISH_BY_SUNRISE, DEFAULT_FINISH_BY_SUNRISE),
+        )
+
+    async def _plan_zone_runs(self) -> list[ZoneRun] | None:
+        """Заявки на полив зон в порядке приоритета, None — полив отменен дождем."""
+        # Прогноз осадков берется из общего кэша, служба вызывается не чаще TTL
+        await self.coordinator.async_update_forecast()
+
+        # Оценка всех зон одним проходом, без вызовов служб
+        snapshot = self.coordinator.snapshot()
+        started = self.coordinator.metrics.start()
+        plan = build_plan(snapshot)
+        self.coordinator.metrics.stop(STAGE_DECIDE, started)
+
+        if plan.skipped == SKIP_RAIN:
+            _LOGGER.info(
+                "Полив отменен из-за дождя (осадки: %s мм, ожидается: %s мм)",
+                snapshot.precipitation,
+                snapshot.forecast_rain,
+            )
+            return None
+
+        for run in plan.runs:
+            _LOGGER.info("Зона %s нуждается в поливе (дефицит влажности: %.1f%%)", run.zone_id, run.deficit)
+
+        cycle_soak = self.coordinator.settings.get(CONF_CYCLE_SOAK, DEFAULT_CYCLE_SOAK)
+        return sorted(self._zone_run(run, cycle_soak) for run in plan.runs)
+
+    async def _start_automatic_irrigation(self):
+        """Запуск автоматического полива."""
+        _LOGGER.info("Запуск автоматической системы полива")
+
+        runs = await self._plan_zone_runs()
+        if runs:
+            # Выполнение плана планировщиком
+            await self.coordinator.scheduler.async_schedule(runs)
+
+    async def _async_plan_window(self, now: datetime | None = None) -> None:
+        """Расписание ближайшего окна полива и таймер его начала.
+
+        Полив начинается как можно позже, чтобы закончиться к крайнему
+        сроку. Если поливать нечего, расписание пересчитывается в начале
+        окна, а в окне — после его окончания.
+        """
+        self._cancel_window()
+        now = now or dt_util.utcnow()
+
+        runs = await self._plan_zone_runs() or []
+        schedule = self._pack_window(runs, now)
+        self.coordinator.async_set_schedule(schedule)
+
+        if schedule.start is not None:
+            when, action = schedule.start, self._async_window_start
+            _LOGGER.info(
+                "Полив %s зон запланирован на %s (крайний срок %s)",
+                len(schedule.runs),
+                dt_util.as_local(schedule.start),
+                dt_util.as_local(schedule.deadline),
             )
+        else:
+            window_start, deadline = self._next_window(now)
+            when = window_start if window_start > now else deadline
+            action = self._async_plan_window
+
+        if schedule.deferred:
+            _LOGGER.warning("Зоны не помещаются в окно полива: %s", ", ".join(schedule.deferred))
+
+        self._unsub_window = async_track_point_in_utc_time(self.hass, action, when)
+
+    async def _async_window_start(self, now: datetime) -> None:
+        """Начало полива в окне по свежим данным."""
+        self._unsub_window = None
+
+        # За время ожидания влажность и прогноз могли измениться
+        runs = await self._plan_zone_runs() or []
+        schedule = self._pack_window(runs, now)
+        self.coordinator.async_set_schedule(schedule)
+
+        if schedule.start is not None and schedule.start > now:
+            # Полива стало меньше, начало сдвигается ближе к крайнему сроку
+            self._unsub_window = async_track_point_in_utc_time(
+                self.hass, self._async_window_start, schedule.start
+            )
+            return
+
+        fitted = {run.zone_id for run in schedule.runs}
+        if fitted:
+            await self.coordinator.scheduler.async_schedule(
+                run for run in runs if run.zone_id in fitted
+            )
+
+        # Следующее окно рассчитывается после окончания текущего
+        self._unsub_window = async_track_point_in_utc_time(
+            self.hass, self._async_plan_window, schedule.deadline
+        )
+
+    def _next_window(self, now: datetime) -> tuple[datetime, datetime]:
+        """Начало и крайний срок ближайшего окна полива."""
+        _, start, end, finish_by_sunrise = self._window_settings
+
+        sunrise = None
+        if finish_by_sunrise and (sun := self.hass.states.get(SUN_ENTITY)) is not None:
+            if (next_rising := sun.attributes.get("next_rising")) is not None:
+                # Атрибут солнца хранится в UTC, окно задается местным временем
+                if (sunrise := dt_util.parse_datetime(str(next_rising))) is not None:
+                    sunrise = dt_util.as_local(sunrise)
+
+        return next_window(
+            dt_util.as_local(now),
+            dt_util.parse_time(start),
+            dt_util.parse_time(end),
+            sunrise,
         )
-        self._watering_tasks.pop(zone_id, None)
-        _LOGGER.info("Полив зоны %s завершен", zone_id)
-    
-    # Отмена предыдущего таймера если он есть
-    if zone_id in self._watering_tasks:
-        self._watering_tasks[zone_id].cancel()
-    
-    # Запуск нового таймера
-    self._watering_tasks[zone_id] = self.hass.loop.call_later(
-        duration * 60, turn_off_zone
-    )
-
-async def _stop_all_irrigation(self):
-    """Остановка всего полива."""
-    _LOGGER.info("Остановка всего полива")
-    
-    # Отмена всех таймеров
-    for task in self._watering_tasks.values():
-        task.cancel()
-    self._watering_tasks.clear()
-    
-    # Выключение всех зон
-    for zone_id in self.coordinator.zones:
-        await self.hass.services.async_call(
-            "switch", "turn_off", {"entity_id": zone_id}
+
+    def _pack_window(self, runs: list[ZoneRun], now: datetime) -> WateringSchedule:
+        """Размещение заявок в ближайшем окне полива."""
+        window_start, deadline = self._next_window(now)
+        scheduler = self.coordinator.scheduler
+        return pack_runs(
+            runs,
+            scheduler.max_concurrent,
+            scheduler.flow_capacity,
+            window_start,
+            deadline,
+            now,
         )
-```
-
-class LawnIrrigationZoneSwitch(CoordinatorEntity, SwitchEntity):
-“”“Переключатель для отдельной зоны полива.”””
-
-```
-def __init__(self, coordinator, config_entry, zone_id):
-    """Инициализация переключателя зоны."""
-    super().__init__(coordinator)
-    self.config_entry = config_entry
-    self.zone_id = zone_id
-    self._attr_name = f"Полив {self._get_zone_name(zone_id)}"
-    self._attr_unique_id = f"{config_entry.entry_id}_zone_{zone_id.replace('.', '_')}"
-    self._attr_icon = "mdi:sprinkler-variant"
-    self._last_watered = None
-    
-def _get_zone_name(self, zone_id: str) -> str:
-    """Получение читаемого имени зоны."""
-    # Получение friendly_name из состояния сущности
-    entity_state = self.hass.states.get(zone_id)
-    if entity_state:
-        friendly_name = entity_state.attributes.get("friendly_name")
-        if friendly_name:
-            return friendly_name
-    
-    # Если нет friendly_name, используем ID
-    return zone_id.replace("switch.", "").replace("_", " ").title()
-
-@property
-def is_on(self) -> bool:
-    """Возвращает состояние переключателя."""
-    zone_data = self.coordinator.data.get("zones", {}).get(self.zone_id, {})
-    return zone_data.get("state") == "on"
-
-@property
-def extra_state_attributes(self) -> dict[str, Any]:
-    """Дополнительные атрибуты состояния."""
-    zone_data = self.coordinator.data.get("zones", {}).get(self.zone_id, {})
-    
-    # Поиск соответствующего датчика влажности
-    moisture_level = None
-    moisture_unit = "%"
-    moisture_data = self.coordinator.data.get("moisture_levels", {})
-    
-    for sensor_id, sensor_data in moisture_data.items():
-        if self.zone_id in sensor_id or any(keyword in sensor_id.lower() for keyword in 
-                                          self.zone_id.lower().split("_")):
-            moisture_level = sensor_data.get("level", 0)
+
+    @callback
+    def _cancel_window(self) -> None:
+        """Отмена таймера окна полива и сброс расписания."""
+        if self._unsub_window is not None:
+            self._unsub_window()
+            self._unsub_window = None
+            self.coordinator.async_set_schedule(WateringSchedule())
+
+    def _zone_run(self, run: PlannedRun, cycle_soak: bool) -> ZoneRun:
+        """Заявка планировщику для зоны из плана.
+
+        В режиме цикл-пропитка полив разбивается на импульсы по профилю
+        почвы зоны, чтобы вода успевала впитаться без стока.
+        """
+        zone_run = ZoneRun(
+            priority=-run.deficit,
+            zone_id=run.zone_id,
+            duration=run.duration,
+            flow_rate=run.flow_rate,
+        )
+
+        if cycle_soak:
+            soil = SOIL_PROFILES.get(
+                self.coordinator.zone_configs[run.zone_id].soil_type,
+                SOIL_PROFILES[DEFAULT_SOIL_TYPE],
+            )
+            zone_run.cycle = soil["cycle"]
+            zone_run.soak = soil["soak"]
+
+        return zone_run
+
+    async def _stop_all_irrigation(self):
+        """Остановка всего полива."""
+        _LOGGER.info("Остановка всего полива")
+        await self.coordinator.scheduler.async_stop_all(self.coordinator.zones)
+
+
+class LawnIrrigationZoneSwitch(LawnIrrigationEntity, SwitchEntity):
+    """Переключатель для отдельной зоны полива."""
+
+    _zone_name_format = "Полив {}"
+
+    def __init__(self, coordinator, config_entry, zone_id):
+        """Инициализация переключателя зоны."""
+        super().__init__(coordinator)
+        self.config_entry = config_entry
+        self.zone_id = zone_id
+        self._attr_unique_id = f"{config_entry.entry_id}_zone_{zone_id.replace('.', '_')}"
+        self._attr_icon = "mdi:sprinkler-variant"
+
+    def _get_zone_name(self, zone_id: str) -> str:
+        """Получение читаемого имени зоны."""
+        return self.coordinator.zone_name(zone_id)
+
+    def _dependency_keys(self):
+        """Переключатель зоны зависит от зоны и ее датчика влажности."""
+        sensor_id = self.coordinator.zone_sensors.get(self.zone_id)
+        return (self.zone_id, sensor_id) if sensor_id else (self.zone_id,)
+
+    @property
+    def is_on(self) -> bool:
+        """Возвращает состояние переключателя."""
+        zone_data = self.coordinator.data.get("zones", {}).get(self.zone_id, {})
+        return zone_data.get("state") == "on"
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Дополнительные атрибуты состояния."""
+        zone_data = self.coordinator.data.get("zones", {}).get(self.zone_id, {})
+        config = self.coordinator.zone_configs[self.zone_id]
+
+        # Датчик влажности зоны из индекса координатора
+        moisture_level = None
+        moisture_unit = "%"
+        sensor_data = self.coordinator.get_zone_moisture(self.zone_id)
+
+        if sensor_data is not None:
+            moisture_level = sensor_data.get("level")
             moisture_unit = sensor_data.get("unit", "%")
-            break
-    
-    return {
-        "zone_id": self.zone_id,
-        "zone_name": self._get_zone_name(self.zone_id),
-        "last_watered": zone_data.get("last_watered"),
-        "duration": zone_data.get("duration", 0),
-        "moisture_level": moisture_level,
-        "moisture_unit": moisture_unit,
-        "watering_duration": self.config_entry.data.get(CONF_WATERING_DURATION, 30),
-    }
-
-async def async_turn_on(self, **kwargs: Any) -> None:
-    """Включение полива зоны."""
-    await self.hass.services.async_call(
-        "switch", "turn_on", {"entity_id": self.zone_id}
-    )
-    self._last_watered = datetime.now()
-    self.async_write_ha_state()
-    _LOGGER.info("Ручное включение полива зоны %s", self.zone_id)
-
-async def async_turn_off(self, **kwargs: Any) -> None:
-    """Выключение полива зоны."""
-    await self.hass.services.async_call(
-        "switch", "turn_off", {"entity_id": self.zone_id}
-    )
-    self.async_write_ha_state()
-    _LOGGER.info("Ручное выключение полива зоны %s", self.zone_id)
-```
\ No newline at end of file
+
+        return {
+            "zone_id": self.zone_id,
+            "zone_name": self._get_zone_name(self.zone_id),
+            "last_watered": zone_data.get("last_watered"),
+            "duration": zone_data.get("duration", 0),
+            "moisture_level": moisture_level,
+            "moisture_unit": moisture_unit,
+            "zone_type": config.zone_type,
+            "soil_type": config.soil_type,
+            "moisture_threshold": config.moisture_threshold,
+            "watering_duration": config.watering_duration,
+            "flow_rate": config.flow_rate,
+            "learned_rise_rate": self.coordinator.learner.rise_rate(self.zone_id),
+        }
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Включение полива зоны.
+
+        Состояние записывается по подтвержденному состоянию клапана из
+        координатора, а не сразу после команды.
+        """
+        _LOGGER.info("Ручное включение полива зоны %s", self.zone_id)
+        if await self.coordinator.valves.async_command("turn_on", [self.zone_id]):
+            raise HomeAssistantError(f"Клапан {self.zone_id} не подтвердил открытие")
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        """Выключение полива зоны."""
+        _LOGGER.info("Ручное выключение полива зоны %s", self.zone_id)
+        if failed := await self.coordinator.valves.async_command("turn_off", [self.zone_id]):
+            self.coordinator.valves.async_escalate("turn_off", failed)
+            raise HomeAssistantError(f"Клапан {self.zone_id} не подтвердил закрытие")
@@ -0,0 +1,20 @@
+"""Общие настройки тестов.
+
+Каталог репозитория — сам пакет интеграции. Модули импортируются как
+lawn_irrigation.<модуль> без выполнения __init__.py с координатором.
+Чистые модули (окна, история влажности, планировщик, эвапотранспирация)
+тестируются без Home Assistant; планировщик полива, клапаны, общие
+данные и датчики — на заменителе из fake_hass, если Home Assistant
+установлен.
+"""
+import sys
+import types
+from pathlib import Path
+
+PACKAGE = "lawn_irrigation"
+ROOT = Path(__file__).resolve().parent.parent
+
+if PACKAGE not in sys.modules:
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [str(ROOT)]
+    sys.modules[PACKAGE] = package
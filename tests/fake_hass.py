@@ -0,0 +1,104 @@
+"""Минимальная замена Home Assistant для тестов планировщика и клапанов.
+
+Таймеры и задачи идут в настоящем цикле событий, состояния хранятся в
+словаре, служба switch переключает все клапаны, кроме неисправных и
+пропускающих первую команду.
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+SERVICE_STATES = {"turn_on": "on", "turn_off": "off"}
+
+
+class FakeStates:
+    """Состояния сущностей по идентификатору."""
+
+    def __init__(self):
+        """Инициализация пустого хранилища."""
+        self._states = {}
+
+    def get(self, entity_id: str):
+        """Состояние сущности, None — сущности нет."""
+        return self._states.get(entity_id)
+
+    def set(self, entity_id: str, state: str) -> None:
+        """Запись состояния без уведомления подписчиков."""
+        self._states[entity_id] = SimpleNamespace(entity_id=entity_id, state=state)
+
+
+class FakeServices:
+    """Служба switch с журналом вызовов."""
+
+    def __init__(self, hass: "FakeHass"):
+        """Инициализация службы."""
+        self.hass = hass
+        self.calls: list[tuple[str, list[str]]] = []
+
+    async def async_call(self, domain, service, data, blocking=False):
+        """Переключение клапанов, неисправные клапаны не отвечают."""
+        zone_ids = list(data["entity_id"])
+        self.calls.append((service, zone_ids))
+        for zone_id in zone_ids:
+            if zone_id in self.hass.flaky:
+                self.hass.flaky.discard(zone_id)
+            elif zone_id not in self.hass.stuck:
+                self.hass.set_state(zone_id, SERVICE_STATES[service])
+
+
+class FakeHass:
+    """Цикл событий, состояния, службы и шина событий."""
+
+    def __init__(self):
+        """Создается внутри работающего цикла событий."""
+        self.loop = asyncio.get_running_loop()
+        self.states = FakeStates()
+        self.services = FakeServices(self)
+        self.bus = MagicMock()
+        self.data = {}
+        self.stuck: set[str] = set()  # клапаны, не выполняющие команды
+        self.flaky: set[str] = set()  # клапаны, пропускающие одну команду
+        self._listeners: dict[str, list] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def async_create_task(self, coro, name=None, eager_start=True):
+        """Задача в цикле событий с учетом для async_block_till_done."""
+        task = self.loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def async_create_background_task(self, coro, name=None, eager_start=True):
+        """Фоновая задача, для тестов не отличается от обычной."""
+        return self.async_create_task(coro, name)
+
+    async def async_block_till_done(self) -> None:
+        """Ожидание всех задач, в том числе созданных по ходу."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def set_state(self, entity_id: str, state: str) -> None:
+        """Смена состояния с событием для подписчиков."""
+        self.states.set(entity_id, state)
+        event = SimpleNamespace(
+            data={"entity_id": entity_id, "new_state": self.states.get(entity_id)}
+        )
+        for action in tuple(self._listeners.get(entity_id, ())):
+            action(event)
+
+    def track_state_change(self, entity_ids, action):
+        """Подписка на изменения состояний, возвращает отписку."""
+        entity_ids = list(entity_ids)
+        for entity_id in entity_ids:
+            self._listeners.setdefault(entity_id, []).append(action)
+
+        def unsubscribe() -> None:
+            for entity_id in entity_ids:
+                self._listeners[entity_id].remove(action)
+
+        return unsubscribe
+
+
+def track_state_change_event(hass: FakeHass, entity_ids, action):
+    """Замена async_track_state_change_event для FakeHass."""
+    return hass.track_state_change(entity_ids, action)
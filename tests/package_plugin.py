@@ -0,0 +1,19 @@
+"""Плагин pytest: корень репозитория собирается как обычный каталог.
+
+Каталог репозитория — сам пакет интеграции. pytest импортирует
+__init__.py каждого пакета на пути к тестам, а ему нужен Home
+Assistant; без этого плагина запуск из корня падает при сборке тестов.
+"""
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collect_directory(path: Path, parent: pytest.Collector):
+    """Корень собирается без импорта __init__.py пакета."""
+    if path == ROOT:
+        return pytest.Dir.from_parent(parent, path=path)
+    return None
@@ -0,0 +1,161 @@
+"""Тесты датчиков неисправностей на заменителе координатора."""
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.util import dt as dt_util  # noqa: E402
+
+from fake_hass import FakeHass  # noqa: E402
+from lawn_irrigation import binary_sensor  # noqa: E402
+from lawn_irrigation.binary_sensor import (  # noqa: E402
+    LawnIrrigationBinarySensor,
+    NoMoistureResponseBinarySensor,
+    ValveStuckOpenBinarySensor,
+)
+
+ZONE = "switch.a"
+SENSOR = "sensor.a"
+TIMEOUT = 0.05  # секунд вместо минут ожидания
+
+
+class FakeCoordinator:
+    """Состояние зоны и влажность ее датчика."""
+
+    def __init__(self):
+        """Закрытая зона с датчиком без показаний."""
+        self.zone_sensors = {ZONE: SENSOR}
+        self.data = {"zones": {ZONE: {"state": "off"}}}
+        self.level = None
+        self.scheduler = MagicMock()
+        self.water_usage = SimpleNamespace(running={})
+
+    def get_zone_moisture(self, zone_id):
+        """Показание датчика зоны."""
+        return {"level": self.level}
+
+    def set(self, state: str, level: float | None = None) -> None:
+        """Новое состояние зоны и, если задано, показание датчика."""
+        self.data["zones"][ZONE]["state"] = state
+        if level is not None:
+            self.level = level
+
+
+@pytest.fixture(autouse=True)
+def short_timeouts(monkeypatch):
+    """Ожидание отклика и запас на закрытие клапана в доли секунды."""
+    monkeypatch.setattr(
+        binary_sensor, "MOISTURE_RESPONSE_TIMEOUT", timedelta(seconds=TIMEOUT)
+    )
+    monkeypatch.setattr(binary_sensor, "VALVE_GRACE", timedelta(seconds=TIMEOUT))
+
+
+def make_sensor(cls, hass, coordinator):
+    """Датчик зоны без записи состояния в HA."""
+    sensor = cls(coordinator, SimpleNamespace(entry_id="entry"), ZONE)
+    sensor.hass = hass
+    sensor.async_write_ha_state = MagicMock()
+    sensor._attr_is_on = sensor._evaluate()
+    return sensor
+
+
+def run(scenario):
+    """Выполнение сценария в новом цикле событий."""
+    async def main():
+        coordinator = FakeCoordinator()
+        await scenario(FakeHass(), coordinator)
+
+    asyncio.run(main())
+
+
+def update(sensor, coordinator, state: str, level: float | None = None) -> None:
+    """Событие зоны или датчика для сущности."""
+    coordinator.set(state, level)
+    sensor._handle_coordinator_update()
+
+
+def test_base_sensor_is_abstract():
+    """Базовый датчик без _evaluate не создается."""
+    with pytest.raises(TypeError):
+        LawnIrrigationBinarySensor(FakeCoordinator(), SimpleNamespace(entry_id="entry"))
+
+
+def test_rise_during_watering_counts_as_response():
+    """Рост влажности при открытом клапане засчитывается, уровень не сдвигается."""
+    async def scenario(hass, coordinator):
+        sensor = make_sensor(NoMoistureResponseBinarySensor, hass, coordinator)
+
+        update(sensor, coordinator, "on", 20)
+        update(sensor, coordinator, "on", 25)
+        update(sensor, coordinator, "on", 25.5)
+        update(sensor, coordinator, "off")
+        await asyncio.sleep(TIMEOUT * 3)
+
+        assert sensor._attr_is_on is False
+        assert sensor._baseline is None
+        sensor.async_write_ha_state.assert_not_called()
+
+    run(scenario)
+
+
+def test_no_rise_reports_fault_until_next_response():
+    """Без роста влажности неисправность держится до отклика на следующий полив."""
+    async def scenario(hass, coordinator):
+        sensor = make_sensor(NoMoistureResponseBinarySensor, hass, coordinator)
+
+        update(sensor, coordinator, "on", 20)
+        update(sensor, coordinator, "off", 20.5)
+        assert sensor._attr_is_on is False
+
+        await asyncio.sleep(TIMEOUT * 3)
+        assert sensor._attr_is_on is True
+
+        update(sensor, coordinator, "on", 20)
+        assert sensor._attr_is_on is True
+        update(sensor, coordinator, "on", 22)
+        assert sensor._attr_is_on is False
+        assert sensor.async_write_ha_state.call_count == 2
+
+    run(scenario)
+
+
+def test_evaluate_has_no_side_effects():
+    """Повторная оценка не меняет уровень до полива и не взводит таймеры."""
+    async def scenario(hass, coordinator):
+        sensor = make_sensor(NoMoistureResponseBinarySensor, hass, coordinator)
+        update(sensor, coordinator, "on", 20)
+        update(sensor, coordinator, "off")
+        recheck = sensor._recheck
+
+        coordinator.set("on", 30)
+        for _ in range(3):
+            assert sensor._evaluate() is False
+        assert sensor._baseline == 20
+        assert sensor._recheck is recheck
+        sensor._cancel_recheck()
+
+    run(scenario)
+
+
+def test_valve_open_past_scheduled_end():
+    """Клапан, не закрытый к плановому времени с запасом, — неисправность."""
+    async def scenario(hass, coordinator):
+        coordinator.scheduler.scheduled_end.return_value = dt_util.utcnow()
+        sensor = make_sensor(ValveStuckOpenBinarySensor, hass, coordinator)
+
+        update(sensor, coordinator, "on")
+        assert sensor._attr_is_on is False
+        assert sensor._recheck is not None
+
+        await asyncio.sleep(TIMEOUT * 3)
+        assert sensor._attr_is_on is True
+
+        update(sensor, coordinator, "off")
+        assert sensor._attr_is_on is False
+        assert sensor._recheck is None
+
+    run(scenario)
@@ -0,0 +1,77 @@
+"""Тесты модели эвапотранспирации."""
+import pytest
+
+from lawn_irrigation import evapotranspiration
+from lawn_irrigation.evapotranspiration import (
+    ZoneForecast,
+    estimate_temperature_range,
+    extraterrestrial_radiation,
+    forecast_zones,
+    hargreaves_et0,
+)
+
+
+@pytest.mark.parametrize(
+    ("latitude", "day", "expected"),
+    [
+        (-20, 246, 32.2),  # пример 8 FAO-56
+        (55, 172, 41.6),
+        (55, 355, 4.6),
+    ],
+)
+def test_extraterrestrial_radiation(latitude, day, expected):
+    """Внеземная радиация по FAO-56."""
+    assert extraterrestrial_radiation(latitude, day) == pytest.approx(expected, abs=0.1)
+
+
+@pytest.mark.parametrize(
+    ("humidity", "expected"),
+    [(None, 10.0), (0, 16.0), (50, 11.0), (100, 4.0)],
+)
+def test_estimate_temperature_range(humidity, expected):
+    """Перепад температуры ограничен разумными пределами."""
+    assert estimate_temperature_range(humidity) == pytest.approx(expected)
+
+
+def test_hargreaves_et0():
+    """ET0 летом в средних широтах — несколько миллиметров в сутки."""
+    assert 3 < hargreaves_et0(22, 10, 55, 172) < 6
+    assert hargreaves_et0(-30, 10, 55, 172) == 0
+
+
+CASES = [
+    # (влажность, порог, наклон, дождь, ожидаемый прогноз)
+    (40, 30, None, 0, ZoneForecast(100.0, 7.5)),
+    (40, 30, -0.5, 0, ZoneForecast(33.33, 7.5)),  # наблюдаемое высыхание быстрее модели
+    (25, 30, None, 0, ZoneForecast(0.0, 15.0)),
+    (25, 30, None, 3, ZoneForecast(0.0, 12.0)),  # 3 мм дождя — +2 % влажности
+    (10, 30, None, 0, ZoneForecast(0.0, 30.0)),  # ограничено max_duration
+    (None, 30, None, 0, ZoneForecast(None, None)),
+]
+
+
+@pytest.mark.parametrize(("moisture", "threshold", "slope", "rain", "expected"), CASES)
+def test_forecast_zones(moisture, threshold, slope, rain, expected):
+    """Время до порога и время полива до целевой влажности."""
+    result = forecast_zones(
+        [moisture], [threshold], [slope], [1.0], [150.0], [1.0],
+        et0=3.6, rain=rain, target_margin=5, max_duration=[30.0],
+    )
+
+    assert result == [expected]
+
+
+def test_forecast_zones_numpy_matches_python(monkeypatch):
+    """Векторизованный расчет совпадает с построчным."""
+    pytest.importorskip("numpy")
+    columns = list(zip(*[case[:4] for case in CASES]))
+    args = dict(
+        moisture=list(columns[0]), threshold=list(columns[1]), slope=list(columns[2]),
+        crop_coefficient=[1.0] * len(CASES), root_depth=[150.0] * len(CASES),
+        application_rate=[1.0] * len(CASES), et0=3.6, rain=0, target_margin=5,
+        max_duration=[30.0] * len(CASES),
+    )
+
+    vectorized = forecast_zones(**args)
+    monkeypatch.setattr(evapotranspiration, "np", None)
+    assert vectorized == forecast_zones(**args)
@@ -0,0 +1,136 @@
+"""Тесты общих данных записей: арбитра расхода, подписок и кэша прогнозов."""
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from fake_hass import FakeHass  # noqa: E402
+from lawn_irrigation import hub as hub_module  # noqa: E402
+from lawn_irrigation.hub import FlowArbiter, IrrigationHub, moisture_level  # noqa: E402
+from lawn_irrigation.weather import WeatherForecastCache  # noqa: E402
+
+
+def state(value: str, timestamp: float = 0.0):
+    """Состояние датчика с временем обновления."""
+    return SimpleNamespace(
+        state=value, last_updated=datetime.fromtimestamp(timestamp, timezone.utc)
+    )
+
+
+def event(entity_id: str, new_state):
+    """Событие изменения состояния."""
+    return SimpleNamespace(data={"entity_id": entity_id, "new_state": new_state})
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("42.5", 42.5), ("unavailable", None), ("unknown", None), ("сухо", None)],
+)
+def test_moisture_level(value, expected):
+    """Нечисловые и недоступные показания дают None."""
+    assert moisture_level(state(value)) == expected
+
+
+def test_moisture_level_without_state():
+    """Отсутствующий датчик."""
+    assert moisture_level(None) is None
+
+
+def test_arbiter_uses_smallest_capacity_and_wakes_others():
+    """Действует наименьший лимит, освобождение расхода будит другие записи."""
+    async def scenario():
+        hass = FakeHass()
+        arbiter = FlowArbiter(hass)
+        woken = []
+
+        def waker(owner):
+            async def wake():
+                woken.append(owner)
+            return wake
+
+        arbiter.async_register("a", waker("a"), 20)
+        unregister_b = arbiter.async_register("b", waker("b"), 15)
+        assert arbiter.capacity == 15
+
+        arbiter.async_claim("a", "switch.a", 10)
+        assert arbiter.fits(5)
+        assert not arbiter.fits(6)
+        assert not arbiter.fits(4, pending=2)
+
+        arbiter.async_release("a", ["switch.a"])
+        await hass.async_block_till_done()
+        assert woken == ["b"]
+        assert arbiter.in_use == 0
+
+        # Снятие меньшего лимита повышает общий и будит всех
+        unregister_b()
+        await hass.async_block_till_done()
+        assert arbiter.capacity == 20
+        assert woken == ["b", "a"]
+
+    asyncio.run(scenario())
+
+
+def test_arbiter_lets_oversized_zone_run_alone():
+    """Зона с расходом больше лимита помещается только в свободный водовод."""
+    arbiter = FlowArbiter(MagicMock())
+    arbiter.async_set_capacity("a", 10)
+
+    assert arbiter.fits(15)
+    arbiter.async_claim("a", "switch.a", 1)
+    assert not arbiter.fits(15)
+
+
+def test_hub_shares_one_subscription_and_history(monkeypatch):
+    """Записи с общими датчиками получают события одной подписки."""
+    track = MagicMock()
+    monkeypatch.setattr(hub_module, "async_track_state_change_event", track)
+    hub = IrrigationHub(MagicMock())
+    first, second = MagicMock(), MagicMock()
+
+    unsub_first = hub.async_subscribe(["sensor.a", "sensor.b"], first)
+    hub.moisture_buffer("sensor.a")
+    unsub_second = hub.async_subscribe(["sensor.a", "weather.home"], second)
+
+    assert hub.tracked_entities == {"sensor.a", "sensor.b", "weather.home"}
+    assert sorted(track.call_args.args[1]) == ["sensor.a", "sensor.b", "weather.home"]
+    # Новая подписка заменяет прежнюю, а не добавляется к ней
+    track.return_value.assert_called_once()
+
+    hub._async_dispatch(event("sensor.a", state("30", 3600)))
+    first.assert_called_once()
+    second.assert_called_once()
+    assert len(hub.moisture_history["sensor.a"]) == 1
+
+    unsub_first()
+    assert hub.tracked_entities == {"sensor.a", "weather.home"}
+    assert "sensor.a" in hub.moisture_history
+    unsub_second()
+    assert hub.tracked_entities == frozenset()
+    assert not hub.moisture_history
+
+
+def test_forecast_cache_deduplicates_concurrent_requests():
+    """Одновременные запросы прогноза ждут один вызов службы."""
+    async def scenario():
+        forecast = [{"datetime": "2024-06-01T00:00:00+00:00", "precipitation": 3}]
+        hass = SimpleNamespace(
+            services=SimpleNamespace(
+                async_call=AsyncMock(return_value={"weather.home": {"forecast": forecast}})
+            )
+        )
+        cache = WeatherForecastCache(hass)
+
+        results = await asyncio.gather(
+            cache.async_get_forecast("weather.home"),
+            cache.async_get_forecast("weather.home"),
+        )
+        assert results == [forecast, forecast]
+        assert await cache.async_get_forecast("weather.home") == forecast
+        hass.services.async_call.assert_awaited_once()
+
+    asyncio.run(scenario())
@@ -0,0 +1,138 @@
+"""Тесты обучения времени полива по отклику датчиков влажности."""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from fake_hass import FakeHass  # noqa: E402
+from lawn_irrigation import learning  # noqa: E402
+from lawn_irrigation.learning import MIN_RUNS, RATE_LIMIT, RunTimeLearner  # noqa: E402
+
+ZONE = "switch.a"
+SETTLE = 0.01  # секунд ожидания замера вместо минут
+DEFAULT_RATE = 0.6  # мм/мин
+ROOT_DEPTH = 100  # мм
+
+
+@pytest.fixture(autouse=True)
+def fast_settle(monkeypatch):
+    """Хранилище-заглушка и короткое ожидание замера."""
+    monkeypatch.setattr(learning, "Store", MagicMock())
+    monkeypatch.setattr(learning, "SETTLE_DELAY", SETTLE / 60)
+
+
+class Garden:
+    """Влажность зон, которую меняют тесты."""
+
+    def __init__(self):
+        """Начальная влажность зоны."""
+        self.moisture = {ZONE: 20.0}
+
+    def get(self, zone_id):
+        """Сглаженная влажность зоны."""
+        return self.moisture.get(zone_id)
+
+
+def run(scenario):
+    """Выполнение сценария с обучением одной записи."""
+    async def main():
+        garden = Garden()
+        on_update = MagicMock()
+        learner = RunTimeLearner(FakeHass(), "entry", garden.get, on_update)
+        await scenario(learner, garden, on_update)
+        learner.async_cancel()
+
+    asyncio.run(main())
+
+
+async def water(learner, garden, minutes: float, rise: float) -> None:
+    """Полив зоны с приростом влажности и ожиданием замера."""
+    learner.async_run_started(ZONE)
+    garden.moisture[ZONE] += rise
+    learner.async_run_finished(ZONE, minutes)
+    await asyncio.sleep(SETTLE * 5)
+
+
+def test_rate_is_learned_after_enough_runs():
+    """Прирост на минуту полива используется после MIN_RUNS поливов."""
+    async def scenario(learner, garden, on_update):
+        await water(learner, garden, 10, 5)
+        assert learner.zones[ZONE]["runs"] == 1
+        assert learner.rise_rate(ZONE) is None
+        assert learner.application_rate(ZONE, ROOT_DEPTH, DEFAULT_RATE) == DEFAULT_RATE
+
+        for _ in range(MIN_RUNS - 1):
+            await water(learner, garden, 10, 5)
+
+        assert learner.rise_rate(ZONE) == pytest.approx(0.5)
+        assert learner.application_rate(ZONE, ROOT_DEPTH, DEFAULT_RATE) == pytest.approx(0.5)
+        assert on_update.call_count == MIN_RUNS
+        learner._store.async_delay_save.assert_called()
+
+    run(scenario)
+
+
+def test_application_rate_is_limited():
+    """Обученная интенсивность не дальше RATE_LIMIT раз от профиля."""
+    async def scenario(learner, garden, on_update):
+        for _ in range(MIN_RUNS):
+            await water(learner, garden, 10, 50)
+
+        assert learner.application_rate(ZONE, ROOT_DEPTH, DEFAULT_RATE) == pytest.approx(
+            DEFAULT_RATE * RATE_LIMIT
+        )
+
+    run(scenario)
+
+
+def test_runs_without_rise_lower_the_rate():
+    """Поливы без прироста входят в оценку, прирост не бывает отрицательным."""
+    async def scenario(learner, garden, on_update):
+        await water(learner, garden, 10, 5)
+        await water(learner, garden, 10, -10)
+
+        assert learner.zones[ZONE]["sxy"] < 0
+        assert learner.rise_rate(ZONE) == 0
+        assert learner.application_rate(ZONE, ROOT_DEPTH, DEFAULT_RATE) == pytest.approx(
+            DEFAULT_RATE / RATE_LIMIT
+        )
+
+    run(scenario)
+
+
+@pytest.mark.parametrize("interrupt", ["new_run", "cancel", "short", "no_sensor"])
+def test_unreliable_runs_are_not_learned(interrupt):
+    """Прерванные, короткие и поливы без датчика не меняют модель."""
+    async def scenario(learner, garden, on_update):
+        if interrupt == "no_sensor":
+            garden.moisture.clear()
+        learner.async_run_started(ZONE)
+        garden.moisture[ZONE] = 30.0
+        if interrupt == "cancel":
+            learner.async_run_cancelled(ZONE)
+        learner.async_run_finished(ZONE, 0.5 if interrupt == "short" else 10)
+        if interrupt == "new_run":
+            # Новый полив до замера прошлого делает тот замер недостоверным
+            learner.async_run_started(ZONE)
+        await asyncio.sleep(SETTLE * 5)
+
+        assert ZONE not in learner.zones
+        on_update.assert_not_called()
+
+    run(scenario)
+
+
+def test_model_is_loaded_from_storage():
+    """Коэффициенты переживают перезапуск."""
+    async def scenario(learner, garden, on_update):
+        learner._store.async_load = AsyncMock(
+            return_value={"zones": {ZONE: {"sxx": 100.0, "sxy": 30.0, "runs": MIN_RUNS}}}
+        )
+
+        await learner.async_load()
+
+        assert learner.rise_rate(ZONE) == pytest.approx(0.3)
+
+    run(scenario)
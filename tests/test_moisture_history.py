@@ -0,0 +1,129 @@
+"""Тесты истории показаний датчиков влажности."""
+import math
+
+import pytest
+
+from lawn_irrigation.moisture_history import MoistureBuffer
+
+T0 = 1_700_000_000.0
+
+
+def filled(values, interval=600, capacity=432) -> MoistureBuffer:
+    """Буфер с показаниями через равные интервалы."""
+    buffer = MoistureBuffer(capacity, interval)
+    for index, value in enumerate(values):
+        buffer.add(value, T0 + index * interval)
+    return buffer
+
+
+def test_statistics():
+    """Среднее, минимум и наклон по окну."""
+    buffer = filled([40, 38, 36, 34])
+
+    assert len(buffer) == 4
+    assert buffer.mean == pytest.approx(37)
+    assert buffer.minimum == pytest.approx(34)
+    # 2 % за 10 минут — 12 %/ч
+    assert buffer.slope == pytest.approx(-12)
+
+
+def test_capacity_evicts_oldest():
+    """Старые точки вытесняются, статистика считается по окну."""
+    buffer = filled([10, 50, 40, 30], capacity=3)
+
+    assert buffer.values() == [50, 40, 30]
+    assert buffer.mean == pytest.approx(40)
+    assert buffer.minimum == pytest.approx(30)
+
+
+def test_one_point_per_interval():
+    """В историю попадает не больше одной точки за интервал."""
+    buffer = MoistureBuffer(interval=600)
+    buffer.add(40, T0)
+    buffer.add(39, T0 + 60)
+    buffer.add(38, T0 + 600)
+
+    assert buffer.values() == [40, 38]
+
+
+@pytest.mark.parametrize(
+    ("value", "timestamp"),
+    [
+        (math.nan, T0 + 600),
+        (35, T0),  # не новее последней точки
+        (35, T0 - 600),
+    ],
+)
+def test_rejected_readings(value, timestamp):
+    """Нечисловые и устаревшие показания отбрасываются."""
+    buffer = MoistureBuffer()
+    buffer.add(40, T0)
+
+    assert not buffer.add(value, timestamp)
+    assert buffer.smoothed == 40
+
+
+def test_outlier_needs_confirmation():
+    """Одиночный выброс отбрасывается, подтвержденный — принимается."""
+    buffer = filled([40, 40, 40, 40])
+    after = T0 + 4 * 600
+
+    assert not buffer.add(90, after)
+    assert buffer.smoothed == pytest.approx(40)
+    assert buffer.add(90, after + 600)
+    assert buffer.smoothed > 80
+
+
+def test_backfill_prepends_older_samples():
+    """Ранние показания вставляются перед накопленными."""
+    buffer = filled([30, 29])
+    smoothed = buffer.smoothed
+
+    accepted = buffer.backfill([(T0 - 1200, 34), (T0 - 600, 32), (T0, 99)])
+
+    assert accepted == 2
+    assert buffer.values() == [34, 32, 30, 29]
+    assert buffer.smoothed == smoothed
+    assert buffer.slope == pytest.approx(-10.2)
+
+
+def test_repeated_reading_ignored():
+    """Повтор того же показания между точками истории не сдвигает сглаживание."""
+    buffer = MoistureBuffer(interval=600)
+    buffer.add(40, T0)
+    assert buffer.add(30, T0 + 60)
+    smoothed = buffer.smoothed
+
+    for _ in range(5):
+        assert not buffer.add(30, T0 + 60)
+    assert buffer.smoothed == smoothed
+
+
+def test_repeated_outlier_not_confirmed():
+    """Повторное чтение выброса не считается его подтверждением."""
+    buffer = filled([40, 40, 40, 40])
+    after = T0 + 4 * 600 + 60
+
+    assert not buffer.add(90, after)
+    assert not buffer.add(90, after)
+    assert buffer.smoothed == pytest.approx(40)
+
+
+def test_backfill_keeps_last_seen():
+    """Заполнение истории не позволяет принять уже рассмотренное показание."""
+    buffer = filled([30])
+    buffer.add(29, T0 + 60)
+
+    buffer.backfill([(T0 - 600, 32)])
+
+    assert buffer.last_seen == T0 + 60
+    assert not buffer.add(29, T0 + 60)
+
+
+def test_first_time():
+    """Время самой старой точки сохраняется после вытеснения и пересчета."""
+    assert MoistureBuffer().first_time is None
+
+    buffer = filled([40, 39, 38, 37, 36], capacity=3)
+
+    assert buffer.first_time == pytest.approx(T0 + 2 * 600)
@@ -0,0 +1,59 @@
+"""Тесты движка принятия решений о поливе."""
+import pytest
+
+from lawn_irrigation.planner import SKIP_RAIN, SiteSnapshot, build_plan, forecast_site
+
+
+def snapshot(*zones, precipitation=0.0, forecast_rain=0.0) -> SiteSnapshot:
+    """Снимок зон (zone_id, влажность, порог)."""
+    site = SiteSnapshot(
+        et0=3.6,
+        precipitation=precipitation,
+        forecast_rain=forecast_rain,
+        rain_threshold=2.0,
+        target_margin=5.0,
+    )
+    for zone_id, moisture, threshold in zones:
+        site.add_zone(zone_id, moisture, None, threshold, 30.0, 10.0, 1.0, 150.0, 1.0)
+    return site
+
+
+def test_plan_orders_by_deficit():
+    """В план попадают зоны ниже порога, по убыванию дефицита."""
+    plan = build_plan(snapshot(("a", 28, 30), ("b", 40, 30), ("c", 20, 30), ("d", None, 30)))
+
+    assert plan.skipped is None
+    assert plan.zone_ids == ["c", "a"]
+    assert [run.deficit for run in plan.runs] == pytest.approx([10, 2])
+    assert set(plan.forecasts) == {"a", "b", "c", "d"}
+
+
+@pytest.mark.parametrize(
+    ("precipitation", "forecast_rain"),
+    [(2.5, 0.0), (0.0, 2.5)],
+)
+def test_plan_skipped_by_rain(precipitation, forecast_rain):
+    """Текущие или ожидаемые осадки выше порога отменяют полив."""
+    plan = build_plan(
+        snapshot(("a", 20, 30), precipitation=precipitation, forecast_rain=forecast_rain)
+    )
+
+    assert plan.skipped == SKIP_RAIN
+    assert plan.runs == []
+
+
+def test_rain_below_threshold_reduces_deficit():
+    """Небольшой дождь уменьшает дефицит и время полива."""
+    dry = build_plan(snapshot(("a", 25, 30)))
+    wet = build_plan(snapshot(("a", 25, 30), forecast_rain=1.5))
+
+    assert wet.runs[0].deficit == pytest.approx(dry.runs[0].deficit - 1)
+    assert wet.runs[0].duration < dry.runs[0].duration
+
+
+def test_forecast_site_maps_zone_ids():
+    """Прогноз возвращается по идентификаторам зон."""
+    forecasts = forecast_site(snapshot(("a", 40, 30), ("b", None, 30)))
+
+    assert forecasts["a"].hours_to_threshold == pytest.approx(100)
+    assert forecasts["b"].hours_to_threshold is None
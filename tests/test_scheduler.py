@@ -0,0 +1,379 @@
+"""Тесты планировщика полива на заменителе Home Assistant."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from fake_hass import FakeHass, track_state_change_event  # noqa: E402
+from lawn_irrigation import scheduler as scheduler_module  # noqa: E402
+from lawn_irrigation import valves  # noqa: E402
+from lawn_irrigation.hub import FlowArbiter  # noqa: E402
+from lawn_irrigation.metrics import RuntimeMetrics  # noqa: E402
+from lawn_irrigation.scheduler import IrrigationScheduler, ZoneRun  # noqa: E402
+
+LONG = 10  # минут, полив не заканчивается за время теста
+SHORT = 0.001  # минут, полив заканчивается почти сразу
+
+
+@pytest.fixture(autouse=True)
+def fast_valves(monkeypatch):
+    """Подписка на состояния через FakeHass и короткие ожидания клапанов."""
+    monkeypatch.setattr(valves, "async_track_state_change_event", track_state_change_event)
+    monkeypatch.setattr(valves, "persistent_notification", MagicMock())
+    monkeypatch.setattr(valves, "CONFIRM_TIMEOUT", 0.05)
+    monkeypatch.setattr(valves, "RETRY_BACKOFF", 0)
+
+
+def make_scheduler(
+    hass: FakeHass, max_concurrent: int = 2, flow_capacity: float = 0.0, journal=None
+) -> IrrigationScheduler:
+    """Планировщик записи с журналом и обучением в виде заглушек."""
+    metrics = RuntimeMetrics()
+    return IrrigationScheduler(
+        hass,
+        max_concurrent,
+        flow_capacity,
+        journal or MagicMock(active={}, pending=[]),
+        metrics,
+        FlowArbiter(hass),
+        "entry",
+        valves.ValveCommander(hass, metrics),
+        MagicMock(),
+    )
+
+
+def run(scenario):
+    """Выполнение сценария в новом цикле событий."""
+    async def main():
+        hass = FakeHass()
+        scheduler = await scenario(hass)
+        if scheduler is not None:
+            scheduler.async_cancel()
+
+    asyncio.run(main())
+
+
+def test_batches_zones_by_priority_within_slots():
+    """Зоны с наибольшим дефицитом открываются одним вызовом службы."""
+    async def scenario(hass):
+        scheduler = make_scheduler(hass, max_concurrent=2)
+        await scheduler.async_schedule([
+            ZoneRun(priority=-10, zone_id="switch.a", duration=LONG),
+            ZoneRun(priority=-30, zone_id="switch.b", duration=LONG),
+            ZoneRun(priority=-20, zone_id="switch.c", duration=LONG),
+        ])
+        await hass.async_block_till_done()
+
+        assert sorted(scheduler.active_zones) == ["switch.b", "switch.c"]
+        assert scheduler.pending_zones == ["switch.a"]
+        assert hass.services.calls == [("turn_on", ["switch.b", "switch.c"])]
+        return scheduler
+
+    run(scenario)
+
+
+def test_flow_capacity_limits_concurrent_zones():
+    """Зоны, не помещающиеся в расход насоса, ждут в очереди."""
+    async def scenario(hass):
+        scheduler = make_scheduler(hass, max_concurrent=4, flow_capacity=10)
+        await scheduler.async_schedule([
+            ZoneRun(priority=-2, zone_id="switch.a", duration=LONG, flow_rate=6),
+            ZoneRun(priority=-1, zone_id="switch.b", duration=LONG, flow_rate=6),
+        ])
+        await hass.async_block_till_done()
+
+        assert scheduler.active_zones == ["switch.a"]
+        assert scheduler.pending_zones == ["switch.b"]
+        assert scheduler.flow_in_use == 6
+        return scheduler
+
+    run(scenario)
+
+
+def test_zone_above_capacity_runs_alone():
+    """Зона с расходом больше лимита запускается, когда насос свободен."""
+    async def scenario(hass):
+        scheduler = make_scheduler(hass, flow_capacity=10)
+        await scheduler.async_schedule([
+            ZoneRun(priority=-1, zone_id="switch.a", duration=LONG, flow_rate=15),
+        ])
+        await hass.async_block_till_done()
+
+        assert scheduler.active_zones == ["switch.a"]
+        return scheduler
+
+    run(scenario)
+
+
+def test_next_zone_starts_when_slot_frees():
+    """Закрытие зоны по таймеру освобождает слот для следующей."""
+    async def scenario(hass):
+        scheduler = make_scheduler(hass, max_concurrent=1)
+        await scheduler.async_schedule([
+            ZoneRun(priority=-2, zone_id="switch.a", duration=SHORT),
+            ZoneRun(priority=-1, zone_id="switch.b", duration=LONG),
+        ])
+        await hass.async_block_till_done()
+        assert scheduler.active_zones == ["switch.a"]
+
+        await asyncio.sleep(0.2)
+        await hass.async_block_till_done()
+
+        assert scheduler.active_zones == ["switch.b"]
+        assert hass.states.get("switch.a").state == "off"
+        assert ("turn_off", ["switch.a"]) in hass.services.calls
+        return scheduler
+
+    run(scenario)
+
+
+def test_scheduled_zone_is_not_queued_twice():
+    """Повторная постановка открытой или ожидающей зоны пропускается."""
+    async def scenario(hass):
+        scheduler = make_scheduler(hass, max_concurrent=1)
+        runs = [
+            ZoneRun(priority=-2, zone_id="switch.a", duration=LONG),
+            ZoneRun(priority=-1, zone_id="switch.b", duration=LONG),
+        ]
+        await scheduler.async_schedule(runs)
+        await hass.async_block_till_done()
+        await scheduler.async_schedule([
+            ZoneRun(priority=-5, zone_id="switch.a", duration=LONG),
+            ZoneRun(priority=-5, zone_id="switch.b", duration=LONG),
+        ])
+        await hass.async_block_till_done()
+
+        assert scheduler.active_zones == ["switch.a"]
+        assert scheduler.pending_zones == ["switch.b"]
+        return scheduler
+
+    run(scenario)
+
+
+def journal_run(zone_id: str, ends_in: timedelta, duration: float = LONG) -> dict:
+    """Запись журнала об открытой зоне с плановым закрытием через ends_in."""
+    ends_at = datetime.now(timezone.utc) + ends_in
+    return ZoneRun(
+        priority=-1,
+        zone_id=zone_id,
+        duration=duration,
+        started_at=ends_at - timedelta(minutes=duration),
+        ends_at=ends_at,
+    ).as_dict()
+
+
+def test_restore_closes_overdue_and_rearms_running_zones():
+    """После перезапуска просроченный клапан закрывается, остальные продолжают."""
+    async def scenario(hass):
+        journal = MagicMock(
+            active={
+                "switch.a": journal_run("switch.a", -timedelta(minutes=1), duration=1),
+                "switch.b": journal_run("switch.b", timedelta(minutes=5)),
+            },
+            pending=[ZoneRun(priority=-1, zone_id="switch.c", duration=LONG).as_dict()],
+        )
+        for zone_id in journal.active:
+            hass.states.set(zone_id, "on")
+        scheduler = make_scheduler(hass, max_concurrent=2, journal=journal)
+
+        await scheduler.async_restore()
+        await hass.async_block_till_done()
+
+        assert hass.services.calls[0] == ("turn_off", ["switch.a"])
+        assert hass.states.get("switch.a").state == "off"
+        assert sorted(scheduler.active_zones) == ["switch.b", "switch.c"]
+        assert scheduler.scheduled_end("switch.b") == datetime.fromisoformat(
+            journal.active["switch.b"]["ends_at"]
+        )
+        assert scheduler.pending_zones == []
+        return scheduler
+
+    run(scenario)
+
+
+def test_journal_records_open_and_pending_zones():
+    """Журнал получает открытые зоны с временем закрытия и очередь."""
+    async def scenario(hass):
+        journal = MagicMock(active={}, pending=[])
+        scheduler = make_scheduler(hass, max_concurrent=1, journal=journal)
+        await scheduler.async_schedule([
+            ZoneRun(priority=-2, zone_id="switch.a", duration=LONG),
+            ZoneRun(priority=-1, zone_id="switch.b", duration=LONG),
+        ])
+        await hass.async_block_till_done()
+
+        active, pending = journal.async_update.call_args.args
+        assert list(active) == ["switch.a"]
+        assert "ends_at" in active["switch.a"]
+        assert [run["zone_id"] for run in pending] == ["switch.b"]
+        return scheduler
+
+    run(scenario)
+
+
+def test_restore_requeues_rest_of_interrupted_run():
+    """Недолитый до перезапуска остаток полива продолжается в очереди."""
+    async def scenario(hass):
+        journal = MagicMock(
+            active={"switch.a": journal_run("switch.a", -timedelta(minutes=1), duration=1)},
+            pending=[],
+        )
+        journal.active["switch.a"]["duration"] = 3
+        hass.states.set("switch.a", "on")
+        scheduler = make_scheduler(hass, journal=journal)
+
+        await scheduler.async_restore()
+        await hass.async_block_till_done()
+
+        assert hass.services.calls == [("turn_off", ["switch.a"]), ("turn_on", ["switch.a"])]
+        assert scheduler.active_zones == ["switch.a"]
+        # Отсчитывается только оставшееся время
+        assert scheduler.scheduled_end("switch.a") - datetime.now(timezone.utc) < timedelta(
+            minutes=2
+        )
+        return scheduler
+
+    run(scenario)
+
+
+def test_cycle_and_soak_splits_run_into_pulses(monkeypatch):
+    """Полив с cycle идет импульсами, пока не будет полито все время."""
+    monkeypatch.setattr(scheduler_module, "MIN_PULSE", SHORT / 2)
+
+    async def scenario(hass):
+        scheduler = make_scheduler(hass)
+        await scheduler.async_schedule([
+            ZoneRun(priority=-1, zone_id="switch.a", duration=4 * SHORT, cycle=2 * SHORT,
+                    soak=SHORT),
+        ])
+        await asyncio.sleep(0.6)
+        await hass.async_block_till_done()
+
+        assert hass.services.calls == [
+            ("turn_on", ["switch.a"]),
+            ("turn_off", ["switch.a"]),
+            ("turn_on", ["switch.a"]),
+            ("turn_off", ["switch.a"]),
+        ]
+        assert not scheduler.active_zones and not scheduler.soaking_zones
+        zone_id, watered = scheduler.learner.async_run_finished.call_args.args
+        assert zone_id == "switch.a"
+        assert watered == pytest.approx(4 * SHORT)
+        return scheduler
+
+    run(scenario)
+
+
+def test_other_zone_waters_during_soak(monkeypatch):
+    """Пропитка освобождает слот для импульса другой зоны."""
+    monkeypatch.setattr(scheduler_module, "MIN_PULSE", SHORT / 2)
+
+    async def scenario(hass):
+        scheduler = make_scheduler(hass, max_concurrent=1)
+        await scheduler.async_schedule([
+            ZoneRun(priority=-2, zone_id="switch.a", duration=4 * SHORT, cycle=2 * SHORT,
+                    soak=LONG),
+            ZoneRun(priority=-1, zone_id="switch.b", duration=LONG),
+        ])
+        await asyncio.sleep(0.3)
+        await hass.async_block_till_done()
+
+        assert scheduler.active_zones == ["switch.b"]
+        assert scheduler.soaking_zones == ["switch.a"]
+        # Зона в пропитке остается в журнале как ожидающая
+        _active, pending = scheduler.journal.async_update.call_args.args
+        assert [run["zone_id"] for run in pending] == ["switch.a"]
+        return scheduler
+
+    run(scenario)
+
+
+def test_schedule_returns_before_valves_confirm():
+    """Постановка в очередь не ждет подтверждения клапанов."""
+    async def scenario(hass):
+        # Клапан отвечает только на повтор команды
+        hass.flaky.add("switch.a")
+        scheduler = make_scheduler(hass)
+        requested = hass.loop.time()
+
+        await scheduler.async_schedule([ZoneRun(priority=-1, zone_id="switch.a", duration=LONG)])
+
+        assert hass.loop.time() - requested < valves.CONFIRM_TIMEOUT
+        assert scheduler.active_zones == []
+
+        await hass.async_block_till_done()
+        assert scheduler.active_zones == ["switch.a"]
+        return scheduler
+
+    run(scenario)
+
+
+def test_watering_clock_starts_at_confirmation():
+    """Повторы команды не сокращают время полива."""
+    async def scenario(hass):
+        hass.flaky.add("switch.a")
+        scheduler = make_scheduler(hass)
+        requested = datetime.now(timezone.utc)
+
+        await scheduler.async_schedule([ZoneRun(priority=-1, zone_id="switch.a", duration=LONG)])
+        await hass.async_block_till_done()
+
+        zone_run = scheduler._active["switch.a"]
+        assert zone_run.started_at - requested >= timedelta(seconds=valves.CONFIRM_TIMEOUT)
+        assert zone_run.ends_at - zone_run.started_at == timedelta(minutes=LONG)
+        return scheduler
+
+    run(scenario)
+
+
+def test_valve_that_never_opens_is_dropped():
+    """Неоткрывшийся клапан снимается с полива, очередь продолжается."""
+    async def scenario(hass):
+        hass.states.set("switch.a", "off")
+        hass.stuck.add("switch.a")
+        scheduler = make_scheduler(hass, max_concurrent=1, flow_capacity=10)
+        await scheduler.async_schedule([
+            ZoneRun(priority=-2, zone_id="switch.a", duration=LONG, flow_rate=8),
+            ZoneRun(priority=-1, zone_id="switch.b", duration=LONG, flow_rate=8),
+        ])
+        await hass.async_block_till_done()
+
+        assert scheduler.active_zones == ["switch.b"]
+        assert scheduler.pending_zones == []
+        assert scheduler.flow_in_use == 8
+        scheduler.learner.async_run_cancelled.assert_any_call("switch.a")
+        hass.bus.async_fire.assert_called_once_with(
+            valves.EVENT_VALVE_FAILURE, {"service": "turn_on", "entity_id": ["switch.a"]}
+        )
+        return scheduler
+
+    run(scenario)
+
+
+def test_valve_that_does_not_close_stops_the_run():
+    """Не закрывшийся клапан отменяет очередь и закрывает остальные зоны."""
+    async def scenario(hass):
+        scheduler = make_scheduler(hass, max_concurrent=2)
+        await scheduler.async_schedule([
+            ZoneRun(priority=-3, zone_id="switch.a", duration=SHORT),
+            ZoneRun(priority=-2, zone_id="switch.b", duration=LONG),
+            ZoneRun(priority=-1, zone_id="switch.c", duration=LONG),
+        ])
+        await hass.async_block_till_done()
+        hass.stuck.add("switch.a")
+
+        await asyncio.sleep(0.5)
+        await hass.async_block_till_done()
+
+        assert scheduler.active_zones == []
+        assert scheduler.pending_zones == []
+        assert hass.states.get("switch.b").state == "off"
+        hass.bus.async_fire.assert_called_once_with(
+            valves.EVENT_VALVE_FAILURE, {"service": "turn_off", "entity_id": ["switch.a"]}
+        )
+        return scheduler
+
+    run(scenario)
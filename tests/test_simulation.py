@@ -0,0 +1,41 @@
+"""Короткий прогон офлайн-симуляции на настоящем HomeAssistant."""
+import asyncio
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+ROOT = Path(__file__).resolve().parent.parent
+# Симуляции нужен пакет целиком, вместе с координатором из __init__.py
+PACKAGE = "lawn_irrigation_simulation"
+
+
+def load_simulation():
+    """Модуль симуляции из полностью загруженного пакета."""
+    if PACKAGE not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            PACKAGE, ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[PACKAGE] = module
+        spec.loader.exec_module(module)
+    return importlib.import_module(f"{PACKAGE}.simulation")
+
+
+def test_simulation_smoke():
+    """Сутки на нескольких зонах: полив запускается, отчет заполнен."""
+    simulation = load_simulation()
+    config = simulation.SimulationConfig(zones=6, days=1.0, start_moisture=(15.0, 25.0))
+
+    report = asyncio.run(simulation.async_run_simulation(config))
+
+    assert report.zones == 6
+    assert report.simulated_hours == 24
+    assert report.refreshes > 0
+    assert report.state_writes > 0
+    assert report.valve_operations > 0
+    assert report.water_used > 0
+    assert report.metrics
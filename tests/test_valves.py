@@ -0,0 +1,118 @@
+"""Тесты команд клапанам с подтверждением состояния."""
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.exceptions import HomeAssistantError  # noqa: E402
+
+from fake_hass import FakeHass, track_state_change_event  # noqa: E402
+from lawn_irrigation import valves  # noqa: E402
+from lawn_irrigation.metrics import VALVE_FAILURES, VALVE_RETRIES, RuntimeMetrics  # noqa: E402
+from lawn_irrigation.valves import EVENT_VALVE_FAILURE, MAX_ATTEMPTS, ValveCommander  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fast_valves(monkeypatch):
+    """Подписка на состояния через FakeHass и короткие ожидания клапанов."""
+    monkeypatch.setattr(valves, "async_track_state_change_event", track_state_change_event)
+    monkeypatch.setattr(valves, "persistent_notification", MagicMock())
+    monkeypatch.setattr(valves, "CONFIRM_TIMEOUT", 0.05)
+    monkeypatch.setattr(valves, "RETRY_BACKOFF", 0)
+
+
+def run(scenario):
+    """Выполнение сценария с клапанами switch.a и switch.b в состоянии off."""
+    async def main():
+        hass = FakeHass()
+        for zone_id in ("switch.a", "switch.b"):
+            hass.states.set(zone_id, "off")
+        await scenario(hass, ValveCommander(hass, RuntimeMetrics(enabled=True)))
+
+    asyncio.run(main())
+
+
+def test_group_command_is_confirmed_by_state():
+    """Группа клапанов получает одну команду, каждый подтверждается отдельно."""
+    async def scenario(hass, commander):
+        confirmed = []
+
+        failed = await commander.async_command(
+            "turn_on", ["switch.a", "switch.b"], confirmed.append
+        )
+
+        assert failed == []
+        assert hass.services.calls == [("turn_on", ["switch.a", "switch.b"])]
+        assert sorted(confirmed) == ["switch.a", "switch.b"]
+        assert commander.queue_depth == 0
+
+    run(scenario)
+
+
+def test_valve_already_in_target_state():
+    """Клапан, уже находящийся в нужном состоянии, подтверждается без события."""
+    async def scenario(hass, commander):
+        hass.stuck.add("switch.a")
+
+        assert await commander.async_command("turn_off", ["switch.a"]) == []
+
+    run(scenario)
+
+
+def test_only_unconfirmed_valves_are_retried():
+    """Повтор отправляется только клапанам, не подтвердившим команду."""
+    async def scenario(hass, commander):
+        hass.flaky.add("switch.a")
+
+        assert await commander.async_command("turn_on", ["switch.a", "switch.b"]) == []
+        assert hass.services.calls == [
+            ("turn_on", ["switch.a", "switch.b"]),
+            ("turn_on", ["switch.a"]),
+        ]
+        assert commander.metrics.counters[VALVE_RETRIES] == 1
+
+    run(scenario)
+
+
+def test_unresponsive_valve_fails_after_all_attempts():
+    """Клапан без ответа возвращается после MAX_ATTEMPTS попыток."""
+    async def scenario(hass, commander):
+        hass.stuck.add("switch.a")
+
+        assert await commander.async_command("turn_on", ["switch.a"]) == ["switch.a"]
+        assert len(hass.services.calls) == MAX_ATTEMPTS
+        assert commander.metrics.counters[VALVE_FAILURES] == 1
+        assert commander.queue_depth == 0
+
+    run(scenario)
+
+
+def test_service_error_does_not_decide_outcome():
+    """Исход команды решает состояние клапана, а не ошибка вызова службы."""
+    async def scenario(hass, commander):
+        original = hass.services.async_call
+
+        async def failing(*args, **kwargs):
+            await original(*args, **kwargs)
+            raise HomeAssistantError("нет ответа от шлюза")
+
+        hass.services.async_call = failing
+
+        assert await commander.async_command("turn_on", ["switch.a"]) == []
+
+    run(scenario)
+
+
+def test_escalation_fires_event_and_notification():
+    """Сбой клапана сообщается событием для автоматизаций и уведомлением."""
+    async def scenario(hass, commander):
+        commander.async_escalate("turn_off", ["switch.a"])
+
+        hass.bus.async_fire.assert_called_once_with(
+            EVENT_VALVE_FAILURE, {"service": "turn_off", "entity_id": ["switch.a"]}
+        )
+        valves.persistent_notification.async_create.assert_called_once()
+
+    run(scenario)
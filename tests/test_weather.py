@@ -0,0 +1,42 @@
+"""Тесты ожидаемых осадков по прогнозу."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from lawn_irrigation.weather import expected_rain  # noqa: E402
+
+NOW = datetime(2024, 6, 1, 14, 30, tzinfo=timezone.utc)
+
+
+def entries(start: datetime, step: timedelta, rain: list[float]) -> list[dict]:
+    """Записи прогноза с заданным шагом."""
+    return [
+        {"datetime": (start + step * index).isoformat(), "precipitation": value}
+        for index, value in enumerate(rain)
+    ]
+
+
+@pytest.mark.parametrize(
+    ("forecast", "window", "expected"),
+    [
+        # Суточный прогноз: в окно попадают 6 из 24 часов текущих суток
+        (entries(datetime(2024, 6, 1, tzinfo=timezone.utc), timedelta(days=1), [3, 5, 7]),
+         timedelta(hours=6), 0.8),
+        # 9,5 часа текущих суток и 2,5 часа следующих
+        (entries(datetime(2024, 6, 1, tzinfo=timezone.utc), timedelta(days=1), [3, 5, 7]),
+         timedelta(hours=12), 1.7),
+        # Почасовой прогноз: вторая половина текущего часа и первая следующего
+        (entries(datetime(2024, 6, 1, 13, tzinfo=timezone.utc), timedelta(hours=1), [1, 2, 3, 4]),
+         timedelta(hours=1), 2.5),
+        # Прошедшие записи не учитываются
+        (entries(datetime(2024, 6, 1, 10, tzinfo=timezone.utc), timedelta(hours=1), [9, 9, 9, 9]),
+         timedelta(hours=6), 0),
+        ([], timedelta(hours=6), 0),
+        ([{"datetime": None, "precipitation": 4}], timedelta(hours=6), 0),
+    ],
+)
+def test_expected_rain(forecast, window, expected):
+    """Осадки записей в доле их периода, попавшей в окно."""
+    assert expected_rain(forecast, window, NOW) == expected
@@ -0,0 +1,110 @@
+"""Тесты окон полива."""
+from datetime import datetime, time, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from lawn_irrigation.windows import next_window, pack_runs
+
+TZ = timezone(timedelta(hours=3))
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime:
+    """Момент в местном часовом поясе."""
+    return datetime(2024, 6, day, hour, minute, tzinfo=TZ)
+
+
+def run(zone_id, duration, flow_rate=10.0, cycle=0, soak=0):
+    """Заявка на полив зоны."""
+    return SimpleNamespace(
+        zone_id=zone_id, duration=duration, flow_rate=flow_rate, cycle=cycle, soak=soak
+    )
+
+
+@pytest.mark.parametrize(
+    ("now", "start", "end", "sunrise", "expected"),
+    [
+        # Окно через полночь, сейчас вечер до начала окна
+        (at(1, 20), time(22), time(6), None, (at(1, 22), at(2, 6))),
+        # Сейчас внутри окна после полуночи
+        (at(2, 3), time(22), time(6), None, (at(1, 22), at(2, 6))),
+        # Окно в пределах суток уже прошло — следующее завтра
+        (at(1, 8), time(4), time(7), None, (at(2, 4), at(2, 7))),
+        # Крайний срок — восход, если он известен
+        (at(1, 20), time(22), time(6), at(2, 4, 45), (at(1, 22), at(2, 4, 45))),
+        # Восход в UTC: начало окна считается по местному времени
+        (
+            at(1, 20), time(22), time(6), at(2, 4, 45).astimezone(timezone.utc),
+            (at(1, 22), at(2, 4, 45)),
+        ),
+        # Прошедший восход не учитывается
+        (at(1, 20), time(22), time(6), at(1, 4, 45), (at(1, 22), at(2, 6))),
+    ],
+)
+def test_next_window(now, start, end, sunrise, expected):
+    """Начало и крайний срок ближайшего окна."""
+    window = next_window(now, start, end, sunrise)
+
+    assert window == expected
+    assert [moment.utcoffset() for moment in window] == [now.utcoffset()] * 2
+
+
+def test_pack_runs_finishes_at_deadline():
+    """Полив начинается как можно позже и заканчивается к крайнему сроку."""
+    schedule = pack_runs(
+        [run("a", 30), run("b", 20)], 1, 0, at(1, 22), at(2, 6), at(1, 20)
+    )
+
+    assert schedule.start == at(2, 5, 10)
+    assert [(item.zone_id, item.start, item.end) for item in schedule.runs] == [
+        ("a", at(2, 5, 10), at(2, 5, 40)),
+        ("b", at(2, 5, 40), at(2, 6)),
+    ]
+    assert schedule.deferred == []
+
+
+@pytest.mark.parametrize(
+    ("max_concurrent", "flow_capacity", "start"),
+    [
+        (2, 0, at(2, 5, 30)),  # обе зоны одновременно
+        (2, 15, at(2, 5, 10)),  # расход позволяет только одну зону
+    ],
+)
+def test_pack_runs_lanes(max_concurrent, flow_capacity, start):
+    """Параллельные зоны ограничены числом слотов и расходом воды."""
+    schedule = pack_runs(
+        [run("a", 30), run("b", 20)],
+        max_concurrent, flow_capacity, at(1, 22), at(2, 6), at(1, 20),
+    )
+
+    assert schedule.start == start
+
+
+def test_pack_runs_defers_lowest_priority():
+    """Не поместившиеся в окно зоны с наименьшим приоритетом откладываются."""
+    schedule = pack_runs(
+        [run("a", 40), run("b", 30), run("c", 30)], 1, 0, at(1, 22), at(1, 23, 30), at(1, 20)
+    )
+
+    assert [item.zone_id for item in schedule.runs] == ["a", "b"]
+    assert schedule.deferred == ["c"]
+    assert schedule.start == at(1, 22, 20)
+
+
+def test_pack_runs_cycle_soak():
+    """Паузы пропитки отодвигают окончание зоны, но не занимают слот."""
+    schedule = pack_runs(
+        [run("a", 30, cycle=10, soak=20)], 1, 0, at(1, 22), at(2, 6), at(1, 20)
+    )
+
+    assert schedule.start == at(2, 4, 50)
+    assert schedule.runs[0].end == at(2, 6)
+
+
+def test_pack_runs_nothing_fits():
+    """Если не помещается ни одна зона, окно не начинается."""
+    schedule = pack_runs([run("a", 90)], 1, 0, at(1, 22), at(1, 23), at(1, 20))
+
+    assert schedule.start is None
+    assert schedule.runs == []
+    assert schedule.deferred == ["a"]
@@ -0,0 +1,74 @@
+"""Тесты настроек отдельных зон."""
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from lawn_irrigation.const import (  # noqa: E402
+    CONF_MOISTURE_THRESHOLD,
+    CONF_WATERING_DURATION,
+    CONF_ZONE_TYPE,
+    ZONE_PROFILES,
+)
+from lawn_irrigation.zone_config import build_zone_configs, describe_overrides  # noqa: E402
+
+GARDEN = ZONE_PROFILES["garden"]
+
+
+@pytest.mark.parametrize(
+    ("settings", "global_threshold", "expected"),
+    [
+        # Зона без настроек — общий порог записи
+        (None, 42, 42),
+        # Тип зоны без собственного порога — общий порог, а не профиль
+        ({CONF_ZONE_TYPE: "garden"}, 42, 42),
+        # Собственный порог зоны важнее общего
+        ({CONF_ZONE_TYPE: "garden", CONF_MOISTURE_THRESHOLD: 20}, 42, 20),
+        # Без общего порога — профиль типа зоны
+        ({CONF_ZONE_TYPE: "garden"}, None, GARDEN["moisture_threshold"]),
+    ],
+)
+def test_threshold_fallback(settings, global_threshold, expected):
+    """Порог: зона, затем общие настройки, затем профиль."""
+    zone_settings = {} if settings is None else {"switch.zone": settings}
+    configs = build_zone_configs(["switch.zone"], zone_settings, global_threshold, None)
+
+    assert configs["switch.zone"].moisture_threshold == expected
+
+
+def test_duration_fallback():
+    """Длительность наследует тот же порядок, что и порог."""
+    zone_settings = {
+        "switch.a": {CONF_ZONE_TYPE: "garden"},
+        "switch.b": {CONF_ZONE_TYPE: "garden", CONF_WATERING_DURATION: 10},
+    }
+    configs = build_zone_configs(["switch.a", "switch.b", "switch.c"], zone_settings, None, 25)
+
+    assert configs["switch.a"].watering_duration == 25
+    assert configs["switch.b"].watering_duration == 10
+    assert configs["switch.c"].watering_duration == 25
+    assert configs["switch.a"].flow_rate == GARDEN["flow_rate"]
+
+
+def test_options_change_moves_zone_threshold():
+    """Новый общий порог из опций меняет порог зон без собственного."""
+    zone_settings = {
+        "switch.a": {CONF_ZONE_TYPE: "garden"},
+        "switch.b": {CONF_ZONE_TYPE: "garden", CONF_MOISTURE_THRESHOLD: 20},
+    }
+    before = build_zone_configs(["switch.a", "switch.b"], zone_settings, 30, 30)
+    after = build_zone_configs(["switch.a", "switch.b"], zone_settings, 40, 30)
+
+    assert before["switch.a"].moisture_threshold == 30
+    assert after["switch.a"].moisture_threshold == 40
+    assert after["switch.b"].moisture_threshold == 20
+
+
+def test_describe_overrides():
+    """Форма опций перечисляет зоны с собственными значениями."""
+    zone_settings = {
+        "switch.a": {CONF_ZONE_TYPE: "garden"},
+        "switch.b": {CONF_MOISTURE_THRESHOLD: 20, CONF_WATERING_DURATION: 10},
+    }
+
+    assert describe_overrides(zone_settings) == "switch.b: порог 20 %, длительность 10 мин"
+    assert describe_overrides({}) == "нет"
@@ -0,0 +1,85 @@
+"""Тесты импорта зон полива."""
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from lawn_irrigation.zone_import import (  # noqa: E402
+    ZoneImportError,
+    parse_zone_definitions,
+    validate_zone_definitions,
+)
+
+SWITCHES = {"switch.a", "switch.b"}
+SENSORS = {"sensor.a"}
+
+
+@pytest.mark.parametrize(
+    "definition",
+    [
+        {"zone": ["switch.a"]},
+        {"zone": "switch.a", "zone_type": ["lawn"]},
+        {"zone": "switch.a", "soil_type": {"clay": 1}},
+        {"zone": "switch.a", "sensor": ["sensor.a"]},
+    ],
+)
+def test_non_string_values_reported(definition):
+    """Списки и словари вместо строк дают ошибку, а не исключение."""
+    result = validate_zone_definitions([definition], SWITCHES, SENSORS)
+
+    assert result.invalid
+    assert result.errors and result.errors[0].startswith("строка 1:")
+    assert result.zones == []
+
+
+@pytest.mark.parametrize("text", ["switch.a: 5", "switch.a: [1, 2]"])
+def test_settings_must_be_mapping(text):
+    """Настройки зоны в словарном YAML должны быть словарем."""
+    with pytest.raises(ZoneImportError):
+        parse_zone_definitions(text)
+
+
+def test_valid_definitions():
+    """Корректные описания из YAML и CSV."""
+    yaml_result = validate_zone_definitions(
+        parse_zone_definitions("switch.a:\n  sensor: sensor.a\nswitch.b:\n"), SWITCHES, SENSORS
+    )
+    csv_result = validate_zone_definitions(
+        parse_zone_definitions("zone,sensor\nswitch.a,sensor.a\nswitch.b,\n"), SWITCHES, SENSORS
+    )
+
+    for result in (yaml_result, csv_result):
+        assert not result.errors and not result.invalid
+        assert result.zones == ["switch.a", "switch.b"]
+        assert result.zone_sensors == {"switch.a": "sensor.a"}
+
+
+@pytest.mark.parametrize(
+    ("definition", "invalid"),
+    [
+        # Пустая зона в YAML: "- zone:" дает None
+        ({"zone": None, "sensor": "sensor.a"}, False),
+        ({"sensor": "sensor.a"}, False),
+        ({"zone": "  "}, False),
+        # Логические значения в числовых настройках
+        ({"zone": "switch.a", "moisture_threshold": True}, True),
+        ({"zone": "switch.a", "watering_duration": False}, True),
+        ({"zone": "switch.a", "flow_rate": "много"}, False),
+        ({"zone": "switch.a", "moisture_threshold": 150}, False),
+    ],
+)
+def test_rejected_definitions(definition, invalid):
+    """Пустая зона и некорректные числа дают ошибку строки, а не исключение."""
+    result = validate_zone_definitions([definition], SWITCHES, SENSORS)
+
+    assert result.errors and result.errors[0].startswith("строка 1:")
+    assert result.invalid is invalid
+    assert "switch.a" not in result.zone_settings
+
+
+def test_yaml_empty_zone():
+    """Запись "- zone:" из YAML."""
+    result = validate_zone_definitions(
+        parse_zone_definitions("- zone:\n  sensor: sensor.a\n"), SWITCHES, SENSORS
+    )
+
+    assert result.errors == ["строка 1: не указана зона"]
@@ -0,0 +1,162 @@
+"""Команды клапанам зон с подтверждением состояния."""
+import asyncio
+import logging
+from collections.abc import Callable
+
+from homeassistant.components import persistent_notification
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import DOMAIN
+from .metrics import STAGE_SERVICE_CALL, STAGE_VALVE_CONFIRM, RuntimeMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+CONFIRM_TIMEOUT = 20  # секунд на подтверждение состояния клапаном
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 2  # секунд перед повтором, удваивается с каждой попыткой
+
+EVENT_VALVE_FAILURE = f"{DOMAIN}_valve_failure"
+
+TARGET_STATES = {"turn_on": STATE_ON, "turn_off": STATE_OFF}
+
+
+class ValveCommander:
+    """Отправка команд клапанам с ожиданием их нового состояния.
+
+    Команда группе зон отправляется одним вызовом службы, подтверждения
+    всех зон ожидаются одновременно по событиям изменения состояния.
+    Не подтвердившие зоны получают команду повторно с нарастающей паузой.
+    """
+
+    def __init__(self, hass: HomeAssistant, metrics: RuntimeMetrics):
+        """Инициализация очереди команд."""
+        self.hass = hass
+        self.metrics = metrics
+        self.in_flight: dict[str, str] = {}  # зона → ожидаемое состояние
+
+    @property
+    def queue_depth(self) -> int:
+        """Число зон, ожидающих подтверждения команды."""
+        return len(self.in_flight)
+
+    async def async_command(
+        self,
+        service: str,
+        zone_ids: list[str],
+        on_confirm: Callable[[str], None] | None = None,
+    ) -> list[str]:
+        """Команда клапанам, возвращает зоны, так и не подтвердившие ее.
+
+        on_confirm вызывается для каждой зоны в момент подтверждения, не
+        дожидаясь повторов для остальных зон.
+        """
+        target = TARGET_STATES[service]
+        pending = list(dict.fromkeys(zone_ids))
+        backoff = RETRY_BACKOFF
+
+        for zone_id in pending:
+            self.in_flight[zone_id] = target
+        self.metrics.record_valve_queue(self.queue_depth)
+
+        try:
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                pending = await self._async_attempt(service, target, pending, on_confirm)
+                if not pending:
+                    return []
+                if attempt < MAX_ATTEMPTS:
+                    self.metrics.record_valve_retries(len(pending))
+                    _LOGGER.warning(
+                        "Клапаны не подтвердили %s (попытка %s из %s): %s",
+                        service, attempt, MAX_ATTEMPTS, pending,
+                    )
+                    await asyncio.sleep(backoff)
+                    backoff *= 2
+        finally:
+            for zone_id in zone_ids:
+                if self.in_flight.get(zone_id) == target:
+                    del self.in_flight[zone_id]
+
+        self.metrics.record_valve_failures(len(pending))
+        return pending
+
+    async def _async_attempt(
+        self,
+        service: str,
+        target: str,
+        zone_ids: list[str],
+        on_confirm: Callable[[str], None] | None,
+    ) -> list[str]:
+        """Одна попытка: вызов службы и ожидание состояний до крайнего срока."""
+        loop = self.hass.loop
+        waiters = {zone_id: loop.create_future() for zone_id in zone_ids}
+        started = self.metrics.start()
+
+        @callback
+        def confirm(zone_id: str) -> None:
+            waiter = waiters.get(zone_id)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(None)
+                self.metrics.stop(STAGE_VALVE_CONFIRM, started)
+                if on_confirm is not None:
+                    on_confirm(zone_id)
+
+        @callback
+        def state_changed(event: Event) -> None:
+            new_state = event.data["new_state"]
+            if new_state is not None and new_state.state == target:
+                confirm(event.data["entity_id"])
+
+        # Подписка до вызова службы, чтобы не пропустить быстрый ответ
+        unsub = async_track_state_change_event(self.hass, zone_ids, state_changed)
+        try:
+            # Крайний срок охватывает и вызов службы: зависшая интеграция
+            # клапана не должна блокировать очередь
+            async with asyncio.timeout(CONFIRM_TIMEOUT):
+                try:
+                    await self.hass.services.async_call(
+                        "switch", service, {"entity_id": zone_ids}, blocking=True
+                    )
+                except HomeAssistantError as err:
+                    _LOGGER.warning("Ошибка вызова switch.%s для %s: %s", service, zone_ids, err)
+                except Exception:
+                    # Исход команды решает подтверждение состояния, а не вызов службы
+                    _LOGGER.exception("Сбой вызова switch.%s для %s", service, zone_ids)
+                self.metrics.stop(STAGE_SERVICE_CALL, started)
+
+                # Клапан мог уже находиться в нужном состоянии
+                for zone_id in zone_ids:
+                    state = self.hass.states.get(zone_id)
+                    if state is not None and state.state == target:
+                        confirm(zone_id)
+
+                await asyncio.gather(*waiters.values())
+        except TimeoutError:
+            pass
+        finally:
+            unsub()
+            for waiter in waiters.values():
+                waiter.cancel()
+
+        # Неподтвержденные ожидания отменены по крайнему сроку
+        return [zone_id for zone_id, waiter in waiters.items() if waiter.cancelled()]
+
+    @callback
+    def async_escalate(self, service: str, zone_ids: list[str]) -> None:
+        """Сообщение о клапанах, не выполнивших команду после всех попыток.
+
+        Событие позволяет автоматизациям перекрыть общий кран или насос.
+        """
+        _LOGGER.error("Клапаны не выполнили %s после %s попыток: %s", service, MAX_ATTEMPTS, zone_ids)
+        self.hass.bus.async_fire(
+            EVENT_VALVE_FAILURE, {"service": service, "entity_id": zone_ids}
+        )
+        persistent_notification.async_create(
+            self.hass,
+            f"Клапаны не выполнили команду {service}: {', '.join(zone_ids)}. "
+            "Проверьте клапаны и при необходимости перекройте подачу воды.",
+            title="Сбой клапанов полива",
+            notification_id=f"{DOMAIN}_valve_failure",
+        )
@@ -0,0 +1,92 @@
+"""Учет расхода воды и времени работы зон."""
+from datetime import datetime
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10  # секунд
+
+
+class WaterUsageTracker:
+    """Накопительные счетчики воды и времени полива по зонам.
+
+    Счетчики увеличиваются один раз при закрытии клапана, начало
+    текущих поливов сохраняется, чтобы перезапуск HA не терял их.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        """Инициализация учета."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.usage")
+        self.zones: dict[str, dict] = {}
+        self.running: dict[str, str] = {}
+
+    async def async_load(self) -> None:
+        """Загрузка счетчиков из хранилища."""
+        data = await self._store.async_load() or {}
+        self.zones = data.get("zones", {})
+        self.running = data.get("running", {})
+
+    @callback
+    def async_zone_opened(self, zone_id: str, when: datetime) -> None:
+        """Фиксация открытия клапана зоны."""
+        if zone_id in self.running:
+            return
+        self.running[zone_id] = when.isoformat()
+        self._async_save()
+
+    @callback
+    def async_zone_closed(self, zone_id: str, when: datetime, flow_rate: float) -> dict | None:
+        """Начисление воды и времени при закрытии клапана зоны."""
+        started = self.running.pop(zone_id, None)
+        if started is None:
+            return None
+
+        minutes = max((when - dt_util.parse_datetime(started)).total_seconds() / 60, 0)
+        usage = self.zones.setdefault(zone_id, {"volume": 0.0, "run_time": 0.0})
+        usage["volume"] = round(usage["volume"] + minutes * flow_rate, 2)
+        usage["run_time"] = round(usage["run_time"] + minutes, 2)
+        usage["last_watered"] = started
+        usage["last_duration"] = round(minutes, 1)
+        self._async_save()
+        return usage
+
+    @callback
+    def async_seed_last_run(self, zone_id: str, started: datetime, ended: datetime) -> bool:
+        """Последний полив из истории регистратора, без начисления расхода.
+
+        Используется, только если время последнего полива зоны неизвестно.
+        """
+        usage = self.zones.setdefault(zone_id, {"volume": 0.0, "run_time": 0.0})
+        if usage.get("last_watered") is not None:
+            return False
+        usage["last_watered"] = started.isoformat()
+        usage["last_duration"] = round(max((ended - started).total_seconds() / 60, 0), 1)
+        self._async_save()
+        return True
+
+    @property
+    def total_volume(self) -> float:
+        """Суммарный расход воды по всем зонам, л."""
+        return round(sum(usage["volume"] for usage in self.zones.values()), 2)
+
+    @property
+    def total_run_time(self) -> float:
+        """Суммарное время полива по всем зонам, минут."""
+        return round(sum(usage["run_time"] for usage in self.zones.values()), 2)
+
+    @callback
+    def _async_save(self) -> None:
+        """Отложенное сохранение счетчиков."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _data_to_save(self) -> dict:
+        """Данные для записи в хранилище."""
+        return {"zones": self.zones, "running": self.running}
+
+    async def async_remove(self) -> None:
+        """Удаление счетчиков вместе с записью конфигурации."""
+        await self._store.async_remove()
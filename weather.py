@@ -0,0 +1,105 @@
+"""Кэш прогнозов погоды, общий для всех записей интеграции."""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+FORECAST_TTL = timedelta(minutes=30)
+FORECAST_TYPES = ("hourly", "daily")
+
+
+class WeatherForecastCache:
+    """Прогнозы погоды с ограниченным временем жизни.
+
+    Служба weather.get_forecasts вызывается для сущности не чаще одного
+    раза за FORECAST_TTL, одновременные запросы ждут один вызов.
+    """
+
+    def __init__(self, hass: HomeAssistant, ttl: timedelta = FORECAST_TTL):
+        """Инициализация кэша."""
+        self.hass = hass
+        self.ttl = ttl
+        self._entries: dict[str, tuple[datetime, list[dict]]] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    async def async_get_forecast(self, entity_id: str) -> list[dict]:
+        """Прогноз для сущности погоды из кэша или от службы."""
+        if (forecast := self._fresh(entity_id)) is not None:
+            return forecast
+
+        lock = self._locks.setdefault(entity_id, asyncio.Lock())
+        async with lock:
+            # Пока ждали блокировку, прогноз мог загрузить другой запрос
+            if (forecast := self._fresh(entity_id)) is not None:
+                return forecast
+
+            forecast = await self._async_fetch(entity_id)
+            self._evict()
+            if forecast is None:
+                # Устаревший прогноз лучше, чем никакого
+                return self._entries.get(entity_id, (None, []))[1]
+
+            self._entries[entity_id] = (dt_util.utcnow(), forecast)
+            return forecast
+
+    def _fresh(self, entity_id: str) -> list[dict] | None:
+        """Прогноз из кэша, если он еще не устарел."""
+        entry = self._entries.get(entity_id)
+        if entry is None or dt_util.utcnow() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+    def _evict(self) -> None:
+        """Удаление записей, устаревших более чем на два срока жизни."""
+        limit = dt_util.utcnow() - 2 * self.ttl
+        for entity_id in [key for key, (fetched, _) in self._entries.items() if fetched < limit]:
+            del self._entries[entity_id]
+
+    async def _async_fetch(self, entity_id: str) -> list[dict] | None:
+        """Запрос прогноза у службы weather.get_forecasts."""
+        for forecast_type in FORECAST_TYPES:
+            try:
+                response = await self.hass.services.async_call(
+                    "weather",
+                    "get_forecasts",
+                    {"entity_id": entity_id, "type": forecast_type},
+                    blocking=True,
+                    return_response=True,
+                )
+            except HomeAssistantError as err:
+                _LOGGER.debug("Прогноз %s для %s недоступен: %s", forecast_type, entity_id, err)
+                continue
+
+            return (response or {}).get(entity_id, {}).get("forecast", [])
+
+        return None
+
+
+def expected_rain(forecast: list[dict], window: timedelta, now: datetime | None = None) -> float:
+    """Сумма осадков по прогнозу в ближайшем окне, мм.
+
+    Запись прогноза относится к периоду до следующей записи: суточная —
+    к суткам, почасовая — к часу. Осадки записи считаются равномерными
+    по ее периоду и учитываются в доле периода, попавшей в окно.
+    """
+    now = now or dt_util.utcnow()
+    end = now + window
+
+    entries = sorted(
+        (when, item.get("precipitation") or 0)
+        for item in forecast
+        if (when := dt_util.parse_datetime(str(item.get("datetime", "")))) is not None
+    )
+    step = (entries[1][0] - entries[0][0] if len(entries) > 1 else None) or timedelta(hours=1)
+
+    total = 0.0
+    for when, rain in entries:
+        overlap = min(when + step, end) - max(when, now)
+        if overlap > timedelta(0):
+            total += rain * (overlap / step)
+    return round(total, 1)
@@ -0,0 +1,147 @@
+"""Окна полива: размещение запланированных зон до крайнего срока.
+
+Модуль не зависит от Home Assistant: на вход подаются заявки в порядке
+приоритета, лимиты планировщика и границы окна, на выходе — время
+запуска и расчетное расписание зон.
+"""
+import heapq
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+
+
+@dataclass(slots=True)
+class ScheduledRun:
+    """Расчетное время полива зоны."""
+
+    zone_id: str
+    start: datetime
+    end: datetime
+
+
+@dataclass(slots=True)
+class WateringSchedule:
+    """Расписание полива в окне."""
+
+    start: datetime | None = None
+    deadline: datetime | None = None
+    runs: list[ScheduledRun] = field(default_factory=list)
+    deferred: list[str] = field(default_factory=list)  # зоны, не поместившиеся в окно
+
+    def as_dict(self) -> dict:
+        """Представление для атрибутов датчика."""
+        return {
+            "window_start": self.start.isoformat() if self.start else None,
+            "deadline": self.deadline.isoformat() if self.deadline else None,
+            "scheduled_zones": len(self.runs),
+            "deferred_zones": self.deferred,
+        }
+
+
+def next_window(
+    now: datetime,
+    start: time,
+    end: time,
+    sunrise: datetime | None = None,
+) -> tuple[datetime, datetime]:
+    """Ближайшее окно полива (начало, крайний срок).
+
+    Крайний срок — ближайший восход, если он известен, иначе ближайшее
+    наступление end. Начало — последнее наступление start перед крайним
+    сроком; окно может переходить через полночь. start и end задаются в
+    часовом поясе now, восход приводится к нему же.
+    """
+    if sunrise is not None and sunrise > now:
+        deadline = sunrise.astimezone(now.tzinfo)
+    else:
+        deadline = datetime.combine(now.date(), end, now.tzinfo)
+        if deadline <= now:
+            deadline += timedelta(days=1)
+
+    window_start = datetime.combine(deadline.date(), start, deadline.tzinfo)
+    if window_start >= deadline:
+        window_start -= timedelta(days=1)
+
+    return window_start, deadline
+
+
+def pack_runs(
+    runs: Sequence,
+    max_concurrent: int,
+    flow_capacity: float,
+    window_start: datetime,
+    deadline: datetime,
+    now: datetime,
+) -> WateringSchedule:
+    """Размещение заявок так, чтобы полив закончился к крайнему сроку.
+
+    Заявки (zone_id, duration, flow_rate, cycle, soak) передаются в
+    порядке приоритета и раскладываются жадно по слотам, как их будет
+    запускать планировщик. Полив начинается как можно позже, чтобы
+    закончиться к крайнему сроку, но не раньше начала окна и текущего
+    момента. Заявки с наименьшим приоритетом, не поместившиеся в окно,
+    откладываются.
+    """
+    earliest = max(window_start, now)
+    available = (deadline - earliest).total_seconds() / 60
+    lanes = _lanes(runs, max_concurrent, flow_capacity)
+
+    # Длительность растет с числом заявок, ищем наибольший помещающийся префикс
+    low, high = 0, len(runs)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if _makespan(runs[:middle], lanes)[0] <= available:
+            low = middle
+        else:
+            high = middle - 1
+
+    fitted = runs[:low]
+    makespan, offsets = _makespan(fitted, lanes)
+    start = max(deadline - timedelta(minutes=makespan), earliest)
+
+    return WateringSchedule(
+        start=start if fitted else None,
+        deadline=deadline,
+        runs=[
+            ScheduledRun(
+                run.zone_id,
+                start + timedelta(minutes=begin),
+                start + timedelta(minutes=end),
+            )
+            for run, (begin, end) in zip(fitted, offsets)
+        ],
+        deferred=[run.zone_id for run in runs[low:]],
+    )
+
+
+def _lanes(runs: Sequence, max_concurrent: int, flow_capacity: float) -> int:
+    """Число одновременно открытых зон с учетом лимита расхода."""
+    lanes = max(max_concurrent, 1)
+    if flow_capacity and runs:
+        largest = max(run.flow_rate for run in runs)
+        if largest:
+            lanes = min(lanes, max(math.floor(flow_capacity / largest), 1))
+    return lanes
+
+
+def _makespan(runs: Sequence, lanes: int) -> tuple[float, list[tuple[float, float]]]:
+    """Общая длительность полива и интервалы зон, минут от начала.
+
+    Зона занимает слот на время полива; в режиме цикл-пропитка паузы
+    пропитки слот не занимают, но отодвигают окончание зоны.
+    """
+    free = [0.0] * lanes
+    offsets = []
+    makespan = 0.0
+
+    for run in runs:
+        begin = heapq.heappop(free)
+        heapq.heappush(free, begin + run.duration)
+
+        pulses = math.ceil(run.duration / run.cycle) if run.cycle else 1
+        end = begin + run.duration + (pulses - 1) * run.soak
+        offsets.append((begin, end))
+        makespan = max(makespan, end)
+
+    return makespan, offsets
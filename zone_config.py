@@ -0,0 +1,86 @@
+"""Настройки отдельных зон полива."""
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+
+from .const import (
+    CONF_ZONE_TYPE,
+    CONF_MOISTURE_THRESHOLD,
+    CONF_WATERING_DURATION,
+    CONF_FLOW_RATE,
+    CONF_SOIL_TYPE,
+    DEFAULT_ZONE_TYPE,
+    DEFAULT_SOIL_TYPE,
+    ZONE_PROFILES,
+)
+
+
+@dataclass(slots=True, frozen=True)
+class ZoneConfig:
+    """Итоговые настройки зоны: собственные значения поверх профиля типа."""
+
+    zone_id: str
+    zone_type: str
+    moisture_threshold: float  # %
+    watering_duration: float  # минут, максимальная длительность полива
+    flow_rate: float  # л/мин
+    soil_type: str
+    crop_coefficient: float
+    root_depth: float  # мм
+
+
+def build_zone_configs(
+    zones: Iterable[str],
+    zone_settings: Mapping[str, Mapping],
+    moisture_threshold: float | None = None,
+    watering_duration: float | None = None,
+) -> dict[str, ZoneConfig]:
+    """Построение настроек всех зон.
+
+    Порог влажности и длительность полива берутся из собственных
+    настроек зоны, затем из общих настроек записи и только затем из
+    профиля типа зоны. Зона без собственных настроек — газон.
+    """
+    configs = {}
+
+    for zone_id in zones:
+        settings = zone_settings.get(zone_id) or {}
+        profile = ZONE_PROFILES.get(settings.get(CONF_ZONE_TYPE), ZONE_PROFILES[DEFAULT_ZONE_TYPE])
+
+        configs[zone_id] = ZoneConfig(
+            zone_id=zone_id,
+            zone_type=settings.get(CONF_ZONE_TYPE, DEFAULT_ZONE_TYPE),
+            moisture_threshold=_setting(
+                settings, CONF_MOISTURE_THRESHOLD, moisture_threshold, profile["moisture_threshold"]
+            ),
+            watering_duration=_setting(
+                settings, CONF_WATERING_DURATION, watering_duration, profile["watering_duration"]
+            ),
+            flow_rate=settings.get(CONF_FLOW_RATE, profile["flow_rate"]),
+            soil_type=settings.get(CONF_SOIL_TYPE, DEFAULT_SOIL_TYPE),
+            crop_coefficient=profile["crop_coefficient"],
+            root_depth=profile["root_depth"],
+        )
+
+    return configs
+
+
+def describe_overrides(zone_settings: Mapping[str, Mapping]) -> str:
+    """Перечень зон, переопределяющих общий порог или длительность полива."""
+    lines = []
+    for zone_id, settings in zone_settings.items():
+        values = []
+        if settings.get(CONF_MOISTURE_THRESHOLD) is not None:
+            values.append(f"порог {settings[CONF_MOISTURE_THRESHOLD]} %")
+        if settings.get(CONF_WATERING_DURATION) is not None:
+            values.append(f"длительность {settings[CONF_WATERING_DURATION]} мин")
+        if values:
+            lines.append(f"{zone_id}: {', '.join(values)}")
+    return "\n".join(lines) or "нет"
+
+
+def _setting(settings: Mapping, key: str, default: float | None, fallback: float) -> float:
+    """Значение зоны, иначе общее значение записи, иначе значение профиля."""
+    value = settings.get(key)
+    if value is not None:
+        return value
+    return default if default is not None else fallback
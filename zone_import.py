@@ -0,0 +1,167 @@
+"""Массовый импорт зон полива из YAML или CSV."""
+import csv
+import io
+from collections.abc import Collection
+from dataclasses import dataclass, field
+
+import yaml
+
+from .const import (
+    CONF_ZONE_TYPE,
+    CONF_SOIL_TYPE,
+    CONF_MOISTURE_THRESHOLD,
+    CONF_WATERING_DURATION,
+    CONF_FLOW_RATE,
+    ZONE_TYPES,
+    SOIL_TYPES,
+)
+
+ZONE_KEY = "zone"
+SENSOR_KEY = "sensor"
+
+INVALID_DEFINITION = "invalid_zone_definition"  # ошибка формы: значение не того типа
+
+# Числовые настройки зоны и допустимые диапазоны, как в форме настройки
+NUMERIC_SETTINGS = {
+    CONF_MOISTURE_THRESHOLD: (0, 100),
+    CONF_WATERING_DURATION: (1, 120),
+    CONF_FLOW_RATE: (0, 1000),
+}
+
+
+class ZoneImportError(ValueError):
+    """Текст импорта не удалось разобрать."""
+
+
+@dataclass(slots=True)
+class ZoneImport:
+    """Результат проверки импортированных зон."""
+
+    zones: list[str] = field(default_factory=list)
+    zone_sensors: dict[str, str] = field(default_factory=dict)
+    zone_settings: dict[str, dict] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+    invalid: bool = False  # в описаниях есть значения не того типа
+
+
+def parse_zone_definitions(text: str) -> list[dict]:
+    """Разбор описаний зон.
+
+    CSV определяется по строке заголовка, начинающейся с колонки zone;
+    YAML может быть списком описаний или словарем зона → настройки.
+    """
+    text = text.strip()
+    first_line = text.partition("\n")[0]
+
+    if first_line.startswith(ZONE_KEY) and ("," in first_line or ";" in first_line):
+        delimiter = ";" if ";" in first_line else ","
+        reader = csv.DictReader(io.StringIO(text), delimiter=delimiter)
+        return [
+            {key.strip(): value.strip() for key, value in row.items() if key and value}
+            for row in reader
+        ]
+
+    try:
+        data = yaml.safe_load(text)
+    except yaml.YAMLError as err:
+        raise ZoneImportError(str(err)) from err
+
+    if isinstance(data, dict):
+        definitions = []
+        for zone_id, settings in data.items():
+            if settings is not None and not isinstance(settings, dict):
+                raise ZoneImportError(f"настройки зоны {zone_id} должны быть словарем")
+            definitions.append({ZONE_KEY: zone_id, **(settings or {})})
+        return definitions
+    if isinstance(data, list) and all(isinstance(item, dict) for item in data):
+        return data
+
+    raise ZoneImportError("ожидается список зон или словарь зона → настройки")
+
+
+def validate_zone_definitions(
+    definitions: list[dict],
+    switches: Collection[str],
+    sensors: Collection[str],
+) -> ZoneImport:
+    """Проверка всех описаний за один проход.
+
+    Ошибки собираются по всем строкам сразу, чтобы пользователь мог
+    исправить импорт за одну попытку.
+    """
+    result = ZoneImport()
+    seen = set()
+
+    for row, definition in enumerate(definitions, start=1):
+        # Значения из YAML могут быть списками и словарями: они не хешируются
+        # и не должны доходить до проверок по множествам
+        wrong = [
+            key for key in (ZONE_KEY, CONF_ZONE_TYPE, CONF_SOIL_TYPE, SENSOR_KEY)
+            if definition.get(key) is not None and not isinstance(definition[key], str)
+        ]
+        if wrong:
+            result.errors.append(f"строка {row}: {', '.join(wrong)} должно быть строкой")
+            result.invalid = True
+            continue
+
+        zone_id = (definition.get(ZONE_KEY) or "").strip()
+        if not zone_id:
+            result.errors.append(f"строка {row}: не указана зона")
+            continue
+        if zone_id not in switches:
+            result.errors.append(f"строка {row}: переключатель {zone_id} не найден")
+            continue
+        if zone_id in seen:
+            result.errors.append(f"строка {row}: зона {zone_id} указана повторно")
+            continue
+        seen.add(zone_id)
+
+        settings = {}
+
+        zone_type = definition.get(CONF_ZONE_TYPE)
+        if zone_type is not None:
+            if zone_type in ZONE_TYPES:
+                settings[CONF_ZONE_TYPE] = zone_type
+            else:
+                result.errors.append(f"строка {row}: неизвестный тип зоны {zone_type}")
+
+        soil_type = definition.get(CONF_SOIL_TYPE)
+        if soil_type is not None:
+            if soil_type in SOIL_TYPES:
+                settings[CONF_SOIL_TYPE] = soil_type
+            else:
+                result.errors.append(f"строка {row}: неизвестный тип почвы {soil_type}")
+
+        for key, (minimum, maximum) in NUMERIC_SETTINGS.items():
+            raw = definition.get(key)
+            if raw is None:
+                continue
+            # bool — подкласс int: true из YAML не должен стать единицей
+            if isinstance(raw, bool):
+                value = None
+                result.invalid = True
+            else:
+                try:
+                    value = float(raw)
+                except (TypeError, ValueError):
+                    value = None
+            if value is None or not minimum <= value <= maximum:
+                result.errors.append(
+                    f"строка {row}: {key} должно быть числом от {minimum} до {maximum}"
+                )
+                continue
+            settings[key] = value
+
+        sensor_id = definition.get(SENSOR_KEY)
+        if sensor_id:
+            if sensor_id in sensors:
+                result.zone_sensors[zone_id] = sensor_id
+            else:
+                result.errors.append(f"строка {row}: датчик {sensor_id} не найден")
+
+        result.zones.append(zone_id)
+        # Зона без собственных настроек получает общие настройки записи
+        if settings:
+            result.zone_settings[zone_id] = settings
+
+    return result
@@ -0,0 +1,36 @@
+"""Индекс соответствия зон полива и датчиков влажности."""
+from collections.abc import Iterable, Mapping
+
+
+def match_zone_sensor(zone_id: str, sensor_ids: Iterable[str]) -> str | None:
+    """Подбор датчика влажности для зоны по имени сущности."""
+    keywords = zone_id.lower().split("_")
+
+    for sensor_id in sensor_ids:
+        if zone_id in sensor_id or any(keyword in sensor_id.lower() for keyword in keywords):
+            return sensor_id
+
+    return None
+
+
+def build_zone_sensor_index(
+    zones: Iterable[str],
+    sensor_ids: Iterable[str],
+    explicit: Mapping[str, str] | None = None,
+) -> dict[str, str | None]:
+    """Построение индекса зона → датчик влажности.
+
+    Явное сопоставление из конфигурации имеет приоритет, подбор по имени
+    используется только для зон без явно указанного датчика.
+    """
+    explicit = explicit or {}
+    sensor_ids = list(sensor_ids)
+    index = {}
+
+    for zone_id in zones:
+        sensor_id = explicit.get(zone_id)
+        if not sensor_id:
+            sensor_id = match_zone_sensor(zone_id, sensor_ids)
+        index[zone_id] = sensor_id
+
+    return index